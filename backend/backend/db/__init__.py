@@ -0,0 +1,17 @@
+'''Database backends that time every new connection for /api/dbstats/.
+
+settings.py uses backend.db.postgresql (and backend.db.sqlite3 for local
+runs) as the ENGINE. Each is the stock Django backend with its
+get_new_connection timed, which is a plain connect without persistent
+connections and the pool checkout with DB_POOL=1. Reused persistent
+connections don't call it, so they cost nothing here.
+'''
+import time
+from backend.metrics import checkout_stats
+
+class CheckoutTimingMixin:
+    def get_new_connection(self, conn_params):
+        start = time.monotonic()
+        connection = super().get_new_connection(conn_params)
+        checkout_stats.record(time.monotonic() - start)
+        return connection
@@ -0,0 +1,5 @@
+from django.db.backends.sqlite3 import base
+from backend.db import CheckoutTimingMixin
+
+class DatabaseWrapper(CheckoutTimingMixin, base.DatabaseWrapper):
+    pass
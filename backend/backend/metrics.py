@@ -0,0 +1,75 @@
+import bisect
+import re
+
+# Same bucket bounds and metric names as the bot's metrics.py, so bot and backend series line up
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "demure_request_seconds": "Backend request latency by method and endpoint, measured by the server.",
+    "demure_request_errors_total": "Backend responses with status >= 400.",
+}
+
+def endpoint(path):
+    '''Path with numeric ids collapsed, e.g. /api/wishlist/{id}/add_games/, matching the bot's endpoint label.'''
+    return re.sub(r"/\d+(?=/|$)", "/{id}", path)
+
+def format_labels(labels, **extra):
+    items = [*labels, *extra.items()]
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+class RequestMetrics:
+    '''Per-process request histograms and error counters in the Prometheus text format.'''
+    def __init__(self):
+        self.histograms = {}  # sorted label items -> [bucket counts, count, sum]
+        self.errors = {}  # sorted label items -> count
+
+    def observe(self, seconds, **labels):
+        key = tuple(sorted(labels.items()))
+        histogram = self.histograms.setdefault(key, [[0] * (len(BUCKETS) + 1), 0, 0.0])
+        histogram[0][bisect.bisect_left(BUCKETS, seconds)] += 1
+        histogram[1] += 1
+        histogram[2] += seconds
+
+    def error(self, **labels):
+        key = tuple(sorted(labels.items()))
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+    def render(self):
+        name = "demure_request_seconds"
+        lines = [f"# HELP {name} {HELP[name]}", f"# TYPE {name} histogram"]
+        for labels, (counts, count, total) in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, bucket in zip((*BUCKETS, "+Inf"), counts):
+                cumulative += bucket
+                lines.append(f"{name}_bucket{format_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+        name = "demure_request_errors_total"
+        lines += [f"# HELP {name} {HELP[name]}", f"# TYPE {name} counter"]
+        lines += [f"{name}{format_labels(labels)} {count}" for labels, count in sorted(self.errors.items())]
+        return "\n".join(lines) + "\n"
+
+request_metrics = RequestMetrics()
+
+class CheckoutStats:
+    '''Per-process totals for time spent acquiring a database connection, fed by backend.db.'''
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self):
+        return {
+            "checkouts": self.count,
+            "avg_wait_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_wait_ms": round(self.max * 1000, 3),
+        }
+
+checkout_stats = CheckoutStats()
@@ -0,0 +1,37 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from .metrics import endpoint, request_metrics
+
+class RequestMetricsMiddleware:
+    '''Time every request under the bot's demure_request_seconds name, labelled upstream="backend".
+
+    The bot records the same series from the client side, so the difference
+    between the two is network, queueing and serialization overhead.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, seconds):
+        labels = {"upstream": "backend", "method": request.method, "endpoint": endpoint(request.path)}
+        request_metrics.observe(seconds, **labels)
+        if response.status_code >= 400:
+            request_metrics.error(status=response.status_code, **labels)
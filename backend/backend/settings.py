@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,6 +74,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
 
 
 # Database
@@ -80,15 +82,57 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'demurebot',
-        'USER': 'postgres',
+        # Django's backend with connection checkouts timed (backend/db/)
+        'ENGINE': 'backend.db.postgresql',
+        'NAME': os.getenv("POSTGRES_DB", 'demurebot'),
+        'USER': os.getenv("POSTGRES_USER", 'postgres'),
         'PASSWORD': os.getenv("POSTGRES_PASSWORD"),
-        'HOST': 'localhost',
-        'PORT': '5432'
+        'HOST': os.getenv("POSTGRES_HOST", 'localhost'),
+        'PORT': os.getenv("POSTGRES_PORT", '5432'),
+        # Keep connections open between requests and check them before reuse
+        'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        'CONN_HEALTH_CHECKS': os.getenv("DB_CONN_HEALTH_CHECKS", "1") == "1",
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv("DB_CONNECT_TIMEOUT", 5)),
+        },
+    }
+}
+
+# psycopg 3 connection pool (DB_POOL=1). Django doesn't allow pooling together
+# with persistent connections, so CONN_MAX_AGE is forced to 0 when enabled.
+if os.getenv("DB_POOL") == "1":
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+        'max_size': int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+        'timeout': float(os.getenv("DB_POOL_TIMEOUT", 10)),
+        'max_idle': float(os.getenv("DB_POOL_MAX_IDLE", 300)),
+        'max_lifetime': float(os.getenv("DB_POOL_MAX_LIFETIME", 3600)),
+        'check': ConnectionPool.check_connection,
+    }
+
+# Local stand-in for tests and benchmarks, e.g. SQLITE_PATH=/tmp/demurebot.sqlite3
+if os.getenv("SQLITE_PATH"):
+    DATABASES['default'] = {
+        'ENGINE': 'backend.db.sqlite3',
+        'NAME': os.getenv("SQLITE_PATH"),
+    }
+
+# Cache
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at e.g.
+# django.core.cache.backends.redis.RedisCache to share it between workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv("CACHE_BACKEND", 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv("CACHE_LOCATION", 'demurebot'),
     }
 }
 
+WISHLIST_CACHE_TIMEOUT = int(os.getenv("WISHLIST_CACHE_TIMEOUT", 3600))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -138,4 +182,6 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
        'rest_framework.authentication.TokenAuthentication',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'PAGE_SIZE': 50,
 }
\ No newline at end of file
@@ -1,9 +1,55 @@
 from django.contrib import admin
-from .models import Wishlist, Game
+from django.db.models import Count
+from .cache import wishlist_cache
+from .models import Wishlist, WishlistGame, Game, PriceSnapshot
+
+class WishlistGameInline(admin.TabularInline):
+    model = WishlistGame
+    autocomplete_fields = ['game']
+    extra = 0
 
 class WishlistAdmin(admin.ModelAdmin):
     list_display = ['userid', 'username', 'game_count']
-    filter_horizontal = ['games']
+    inlines = [WishlistGameInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(num_games=Count('games'))
+
+    # Admin edits are write paths too; save_related runs after the wishlist and its inline rows are saved
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        wishlist_cache.invalidate(form.instance.pk)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        wishlist_cache.invalidate(obj.pk)
+
+    def delete_queryset(self, request, queryset):
+        userids = list(queryset.values_list('pk', flat=True))
+        super().delete_queryset(request, queryset)
+        wishlist_cache.invalidate_many(userids)
+
+class PriceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['game', 'price', 'regular', 'shop', 'seen_at']
+
+class GameAdmin(admin.ModelAdmin):
+    search_fields = ['name', 'title']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        wishlist_cache.invalidate_watchers([obj.pk])
+
+    def delete_model(self, request, obj):
+        # Memberships go with the game, so find its watchers first
+        watchers = wishlist_cache.watchers([obj.pk])
+        super().delete_model(request, obj)
+        wishlist_cache.invalidate_many(watchers)
+
+    def delete_queryset(self, request, queryset):
+        watchers = wishlist_cache.watchers(list(queryset.values_list('pk', flat=True)))
+        super().delete_queryset(request, queryset)
+        wishlist_cache.invalidate_many(watchers)
 
-admin.site.register(Game)
+admin.site.register(Game, GameAdmin)
+admin.site.register(PriceSnapshot, PriceSnapshotAdmin)
 admin.site.register(Wishlist, WishlistAdmin)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import json
+from functools import wraps
+from django.db import IntegrityError
+from django.http import HttpResponseNotModified, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.authtoken.models import Token
+from .cache import wishlist_cache, etag_matches
+from .models import Wishlist, Game, game_key
+
+# Async counterparts of the WishlistViewSet read/add/remove paths for ASGI
+# deployments. DRF views are sync-only, so these are plain Django views that
+# check the same token and return the same payloads.
+
+def token_required(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        keyword, _, key = request.headers.get('Authorization', '').partition(' ')
+        if keyword != 'Token' or not key or not await Token.objects.filter(key=key, user__is_active=True).aexists():
+            return JsonResponse({"detail": "Invalid token."}, status=401)
+        return await view(request, *args, **kwargs)
+    # Token-authenticated like the DRF views, so no CSRF cookie is involved
+    return csrf_exempt(wrapper)
+
+async def get_wishlist(userid):
+    try:
+        return await Wishlist.objects.aget(pk=userid)
+    except Wishlist.DoesNotExist:
+        return None
+
+def request_data(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+@token_required
+async def wishlist_detail(request, userid):
+    if request.method != 'GET':
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    entry, version = await wishlist_cache.aget(userid)
+    if entry is None:
+        wishlist = await get_wishlist(userid)
+        if wishlist is None:
+            return JsonResponse({"detail": "Not found."}, status=404)
+        games = [game async for game in wishlist.games.order_by('name').values('name', 'itad_id', 'title')]
+        entry = await wishlist_cache.aset(userid, {
+            "userid": wishlist.userid,
+            "username": wishlist.username,
+            "games": games,
+            "game_count": len(games),
+        }, version)
+
+    if etag_matches(request, entry['etag']):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(entry['data'])
+    response['ETag'] = entry['etag']
+    return response
+
+@token_required
+async def add_game(request, userid):
+    if request.method != 'POST':
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    data = request_data(request)
+    name = data.get('name')
+    if not name:
+        return JsonResponse(["Game data must include a 'name' field."], status=400, safe=False)
+
+    # First add creates the wishlist, as in WishlistViewSet.add_game
+    wishlist, _ = await Wishlist.objects.aget_or_create(userid=userid, defaults={'username': data.get('username') or str(userid)})
+    # Any spelling with the same normalized key is the same game
+    game, created = await Game.objects.aget_or_create(key=game_key(name), defaults={'name': name, 'title': name})
+    if not created and await wishlist.games.filter(pk=game.pk).aexists():
+        return JsonResponse({"name": game.name, "status": "already_present"})
+    try:
+        await wishlist.games.aadd(game)
+    except IntegrityError:
+        # Lost a race with a concurrent add of the same game
+        return JsonResponse({"name": game.name, "status": "already_present"})
+    await wishlist_cache.ainvalidate(userid)
+    return JsonResponse({"name": game.name, "status": "added"})
+
+@token_required
+async def remove_game(request, userid):
+    if request.method != 'DELETE':
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    name = request_data(request).get('name')
+    if not name:
+        return JsonResponse(["Game data must include a 'name' field."], status=400, safe=False)
+
+    wishlist = await get_wishlist(userid)
+    game = await Game.objects.filter(key=game_key(name)).afirst()
+    if wishlist is None or game is None or not await wishlist.games.filter(pk=game.pk).aexists():
+        return JsonResponse({"name": name, "status": "not_present"})
+    await wishlist.games.aremove(game)
+    await wishlist_cache.ainvalidate(userid)
+    return JsonResponse({"name": game.name, "status": "removed"})
@@ -0,0 +1,111 @@
+import hashlib
+import json
+from uuid import uuid4
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import WishlistGame
+
+# Per-user cache of the serialized wishlist. Every write path invalidates the
+# entry, so a cached payload is always what retrieve would return. That
+# includes changes to a game's own fields (title, ITAD id), which drop the
+# entries of every wishlist containing the game.
+#
+# Entries are tagged with the user's current version, a random token that
+# every invalidation replaces. A reader that missed before a write commits
+# still stores what it read, but under the old version, so the entry is
+# never served.
+
+class WishlistCache:
+    def __init__(self, alias='default'):
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def key(self, userid):
+        return f"wishlist:{userid}"
+
+    def version_key(self, userid):
+        return f"wishlist-version:{userid}"
+
+    def entry(self, data, version):
+        body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+        return {"data": data, "etag": f'"{hashlib.md5(body.encode()).hexdigest()}"', "version": version}
+
+    def count(self, entry):
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def current(self, values, userid):
+        '''The entry in a get_many() result if it was stored under the user's current version, else None.'''
+        entry, version = values.get(self.key(userid)), values.get(self.version_key(userid))
+        return self.count(entry if entry is not None and version is not None and entry["version"] == version else None)
+
+    def get(self, userid):
+        '''(cached {"data", "etag"} or None, the version to store a freshly read wishlist under).'''
+        values = self.cache.get_many([self.key(userid), self.version_key(userid)])
+        version = values.get(self.version_key(userid))
+        if version is None:
+            # Never seen, or evicted: a new token, so no earlier entry can match it
+            self.cache.add(self.version_key(userid), uuid4().hex, None)
+            version = self.cache.get(self.version_key(userid))
+        return self.current(values, userid), version
+
+    def set(self, userid, data, version):
+        entry = self.entry(data, version)
+        self.cache.set(self.key(userid), entry, settings.WISHLIST_CACHE_TIMEOUT)
+        return entry
+
+    def invalidate(self, userid):
+        self.invalidate_many([userid])
+
+    def invalidate_many(self, userids):
+        self.cache.set_many({self.version_key(userid): uuid4().hex for userid in userids}, None)
+        self.cache.delete_many([self.key(userid) for userid in userids])
+
+    def watchers(self, names):
+        '''User ids of the wishlists that contain any of the given games.'''
+        return list(WishlistGame.objects.filter(game_id__in=names).values_list('wishlist_id', flat=True).distinct())
+
+    def invalidate_watchers(self, names):
+        '''Drop the cached wishlists that contain any of the given games.'''
+        self.invalidate_many(self.watchers(names))
+
+    async def aget(self, userid):
+        values = await self.cache.aget_many([self.key(userid), self.version_key(userid)])
+        version = values.get(self.version_key(userid))
+        if version is None:
+            await self.cache.aadd(self.version_key(userid), uuid4().hex, None)
+            version = await self.cache.aget(self.version_key(userid))
+        return self.current(values, userid), version
+
+    async def aset(self, userid, data, version):
+        entry = self.entry(data, version)
+        await self.cache.aset(self.key(userid), entry, settings.WISHLIST_CACHE_TIMEOUT)
+        return entry
+
+    async def ainvalidate(self, userid):
+        await self.cache.aset(self.version_key(userid), uuid4().hex, None)
+        await self.cache.adelete(self.key(userid))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+wishlist_cache = WishlistCache()
+
+def etag_matches(request, etag):
+    '''True if the request's If-None-Match covers the given ETag.'''
+    header = request.headers.get('If-None-Match', '')
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
@@ -0,0 +1,59 @@
+import json
+import os
+import time
+from urllib.error import URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from django.core.management.base import BaseCommand, CommandError
+from gamesdb.cache import wishlist_cache
+from gamesdb.models import Game
+
+def lookup_ids(base_url, key, titles, timeout):
+    '''{title: ITAD id or None} from ITAD's batch title lookup.'''
+    url = f"{base_url}/lookup/id/title/v1?{urlencode({'key': key})}"
+    request = Request(url, data=json.dumps(titles).encode(), headers={'Content-Type': 'application/json'}, method='POST')
+    with urlopen(request, timeout=timeout) as response:
+        return json.load(response)
+
+class Command(BaseCommand):
+    help = "Fill in missing ITAD ids from ITAD's batch title lookup, batch-size games per request."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="titles sent per lookup request")
+        parser.add_argument('--delay', type=float, default=0.2, help="seconds to wait between requests")
+        parser.add_argument('--base-url', default="https://api.isthereanydeal.com")
+        parser.add_argument('--key', default=os.getenv("ITAD_TOKEN"), help="ITAD API key, ITAD_TOKEN by default")
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        if not options['key']:
+            raise CommandError("An ITAD API key is required (--key or ITAD_TOKEN).")
+
+        # Keyset pagination by name; games that stay unresolved are skipped rather than retried
+        last, resolved, missing = '', 0, 0
+        while True:
+            batch = list(Game.objects.filter(itad_id__isnull=True, name__gt=last)
+                         .order_by('name').only('name', 'title')[:options['batch_size']])
+            if not batch:
+                break
+            last = batch[-1].name
+            try:
+                found = lookup_ids(options['base_url'], options['key'], [game.title or game.name for game in batch],
+                                   options['timeout'])
+            except (URLError, TimeoutError, ValueError) as e:
+                raise CommandError(f"ITAD lookup failed after {last!r}: {e}")
+
+            updated = []
+            for game in batch:
+                game.itad_id = found.get(game.title or game.name)
+                if game.itad_id:
+                    updated.append(game)
+            Game.objects.bulk_update(updated, ['itad_id'])
+            # ITAD ids are part of every serialized wishlist holding the game
+            wishlist_cache.invalidate_watchers([game.name for game in updated])
+            resolved += len(updated)
+            missing += len(batch) - len(updated)
+            if len(batch) == options['batch_size']:
+                time.sleep(options['delay'])
+
+        self.stderr.write(f"Resolved {resolved} ITAD ids, {missing} titles not found.")
@@ -0,0 +1,42 @@
+import gzip
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from gamesdb.transfer import export_lines, import_lines
+
+def open_file(path, mode):
+    '''Open path for text I/O; "-" is stdin/stdout and a .gz suffix is gzip-compressed.'''
+    if path == '-':
+        return sys.stdin if 'r' in mode else sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+class Command(BaseCommand):
+    help = "Export or import every game and wishlist as NDJSON, streamed in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['export', 'import'])
+        parser.add_argument('path', nargs='?', default='-', help="NDJSON file, .gz for gzip, - for stdout/stdin")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="rows fetched per query when exporting")
+        parser.add_argument('--batch-size', type=int, default=1000, help="rows written per transaction when importing")
+
+    def handle(self, *args, **options):
+        if options['action'] == 'export':
+            output = open_file(options['path'], 'w')
+            try:
+                output.writelines(export_lines(chunk_size=options['chunk_size']))
+            finally:
+                if output is not sys.stdout:
+                    output.close()
+            return
+
+        source = open_file(options['path'], 'r')
+        try:
+            counts = import_lines(source, batch_size=options['batch_size'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        self.stderr.write(f"Imported {counts['games']} games, {counts['wishlists']} wishlists "
+                          f"and {counts['memberships']} wishlist games.")
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamesdb', '0002_alter_wishlist_games_alter_wishlist_userid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='itad_id',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='title',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.CreateModel(
+            name='PriceSnapshot',
+            fields=[
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='gamesdb.game')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('regular', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('shop', models.CharField(max_length=100)),
+                ('seen_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_titles(apps, schema_editor):
+    '''Seed the canonical title from the stored name, in batches.
+
+    ITAD ids can't be resolved offline; the backfill_itad_ids command fills
+    them in with ITAD's batch title lookup, and the bot's sale notifier does
+    the same for games it sees first.
+    '''
+    Game = apps.get_model('gamesdb', 'Game')
+    last = None
+    while True:
+        games = Game.objects.filter(title='').order_by('name')
+        if last is not None:
+            games = games.filter(name__gt=last)
+        batch = list(games[:BATCH_SIZE])
+        if not batch:
+            break
+        for game in batch:
+            game.title = game.name
+        Game.objects.bulk_update(batch, ['title'])
+        last = batch[-1].name
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamesdb', '0003_game_itad_id_game_title_pricesnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_titles, migrations.RunPython.noop),
+    ]
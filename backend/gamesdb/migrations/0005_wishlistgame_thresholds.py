@@ -0,0 +1,47 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:00
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamesdb', '0004_backfill_game_title'),
+    ]
+
+    operations = [
+        # Adopt the existing many-to-many table as an explicit model without touching its rows
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='WishlistGame',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gamesdb.game')),
+                        ('wishlist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gamesdb.wishlist')),
+                    ],
+                    options={
+                        'db_table': 'gamesdb_wishlist_games',
+                        'unique_together': {('wishlist', 'game')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='wishlist',
+                    name='games',
+                    field=models.ManyToManyField(blank=True, related_name='wishlists', through='gamesdb.WishlistGame', to='gamesdb.game'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='wishlistgame',
+            name='target_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.AddField(
+            model_name='wishlistgame',
+            name='min_discount',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(100)]),
+        ),
+    ]
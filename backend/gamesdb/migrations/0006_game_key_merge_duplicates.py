@@ -0,0 +1,97 @@
+import re
+import unicodedata
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def game_key(name):
+    # Frozen copy of gamesdb.models.game_key as of this migration, so the keys
+    # it writes don't change if the model's normalization does later
+    folded = unicodedata.normalize('NFKC', name).casefold()
+    return re.sub(r'[\W_]+', '', folded) or folded.strip()
+
+
+def backfill_keys(apps, schema_editor):
+    '''Compute the normalized key of every game, in batches.'''
+    Game = apps.get_model('gamesdb', 'Game')
+    last = ''
+    while True:
+        batch = list(Game.objects.filter(name__gt=last).order_by('name')[:BATCH_SIZE])
+        if not batch:
+            break
+        for game in batch:
+            game.key = game_key(game.name)
+        Game.objects.bulk_update(batch, ['key'])
+        last = batch[-1].name
+
+
+def merge_duplicates(apps, schema_editor):
+    '''Fold games whose names share a key into one row, BATCH_SIZE keys at a time.
+
+    The survivor is the row that already has an ITAD id, else the first name.
+    Wishlist memberships move to it, except where the wishlist already has the
+    survivor: then the duplicate's membership is dropped, after copying any
+    alert threshold the kept membership doesn't set. The duplicates' price
+    snapshots are dropped: the notifier records a fresh baseline on its next
+    pass.
+    '''
+    Game = apps.get_model('gamesdb', 'Game')
+    WishlistGame = apps.get_model('gamesdb', 'WishlistGame')
+    PriceSnapshot = apps.get_model('gamesdb', 'PriceSnapshot')
+    duplicated = (
+        Game.objects.values('key').annotate(rows=models.Count('name')).filter(rows__gt=1).order_by('key')
+    )
+    last = ''
+    while True:
+        keys = list(duplicated.filter(key__gt=last).values_list('key', flat=True)[:BATCH_SIZE])
+        if not keys:
+            break
+        groups = {}
+        for game in Game.objects.filter(key__in=keys).order_by('name'):
+            groups.setdefault(game.key, []).append(game)
+
+        survivor = {}  # duplicate name -> surviving name
+        for games in groups.values():
+            keep = min(games, key=lambda game: (game.itad_id is None, game.name))
+            survivor.update({game.name: keep.name for game in games if game is not keep})
+
+        kept = {(membership.wishlist_id, membership.game_id): membership
+                for membership in WishlistGame.objects.filter(game_id__in=set(survivor.values()))}
+        moved, filled, dropped = {}, {}, []
+        for membership in WishlistGame.objects.filter(game_id__in=survivor).order_by('pk'):
+            target = (membership.wishlist_id, survivor[membership.game_id])
+            keep = kept.get(target)
+            if keep is None:
+                membership.game_id = target[1]
+                kept[target] = moved[membership.pk] = membership
+                continue
+            dropped.append(membership.pk)
+            for field in ('target_price', 'min_discount'):
+                if getattr(keep, field) is None and getattr(membership, field) is not None:
+                    setattr(keep, field, getattr(membership, field))
+                    if keep.pk not in moved:
+                        filled[keep.pk] = keep
+        WishlistGame.objects.filter(pk__in=dropped).delete()
+        WishlistGame.objects.bulk_update(moved.values(), ['game', 'target_price', 'min_discount'])
+        WishlistGame.objects.bulk_update(filled.values(), ['target_price', 'min_discount'])
+        PriceSnapshot.objects.filter(game_id__in=survivor).delete()
+        Game.objects.filter(name__in=survivor).delete()
+        last = keys[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamesdb', '0005_wishlistgame_thresholds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='key',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.RunPython(backfill_keys, migrations.RunPython.noop),
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+TRIGRAM_INDEX = django.contrib.postgres.indexes.GinIndex(
+    fields=['key'], name='gamesdb_game_key_trgm', opclasses=['gin_trgm_ops'],
+)
+
+
+def add_trigram_index(apps, schema_editor):
+    # GIN and pg_trgm are Postgres features; the SQLite stand-in just goes without the index
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.add_index(apps.get_model('gamesdb', 'Game'), TRIGRAM_INDEX)
+
+
+def remove_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('gamesdb', 'Game'), TRIGRAM_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    # Separate from 0006 so that Postgres doesn't alter the table in the same
+    # transaction as the merge's pending deferred foreign key checks
+
+    dependencies = [
+        ('gamesdb', '0006_game_key_merge_duplicates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='game',
+            name='key',
+            field=models.CharField(editable=False, max_length=255, unique=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='game', index=TRIGRAM_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(add_trigram_index, remove_trigram_index),
+            ],
+        ),
+    ]
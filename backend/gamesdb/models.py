@@ -1,7 +1,52 @@
+import re
+import unicodedata
+from django.contrib.postgres.indexes import GinIndex
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
+
+def game_key(name):
+    '''Identity of a game name: casefolded, with whitespace and punctuation removed ("ELDEN RING" == "elden-ring").'''
+    folded = unicodedata.normalize('NFKC', name).casefold()
+    # Names made only of punctuation still need a distinct key
+    return re.sub(r'[\W_]+', '', folded) or folded.strip()
+
+class GameManager(models.Manager):
+    def resolve(self, names):
+        '''Map each name to the stored name of the game with the same normalized key, for games that exist.'''
+        keys = {name: game_key(name) for name in names}
+        stored = dict(self.filter(key__in=set(keys.values())).values_list('key', 'name'))
+        return {name: stored[key] for name, key in keys.items() if key in stored}
+
+    def resolve_or_create(self, names):
+        '''Like resolve, but creates the missing games in bulk, each under the first spelling it was requested with.'''
+        resolved = self.resolve(names)
+        missing = [name for name in names if name not in resolved]
+        if missing:
+            new = {}
+            for name in missing:
+                new.setdefault(game_key(name), name)
+            self.bulk_create([Game(name=name, title=name, key=key) for key, name in new.items()], ignore_conflicts=True)
+            resolved.update(self.resolve(missing))
+        return resolved
 
 class Game(models.Model):
     name = models.CharField(primary_key=True, max_length=255, unique=True)
+    itad_id = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    title = models.CharField(max_length=255, blank=True)
+    key = models.CharField(max_length=255, unique=True, editable=False)
+
+    objects = GameManager()
+
+    class Meta:
+        indexes = [
+            # Substring and similarity search on the key; created on Postgres only (see migration 0007)
+            GinIndex(name='gamesdb_game_key_trgm', fields=['key'], opclasses=['gin_trgm_ops']),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.key = game_key(self.name)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -9,10 +54,42 @@ class Game(models.Model):
 class Wishlist(models.Model):
     userid = models.BigIntegerField(primary_key=True, unique=True)
     username = models.CharField(max_length=150)
-    games = models.ManyToManyField(Game, related_name='wishlists', blank=True)
+    games = models.ManyToManyField(Game, related_name='wishlists', blank=True, through='WishlistGame')
 
     def __str__(self):
         return f"{self.username}'s wishlist"
     
     def game_count(self):
-        return self.games.count()
\ No newline at end of file
+        # Querysets annotated with num_games (see WishlistViewSet) avoid a COUNT per row
+        if hasattr(self, 'num_games'):
+            return self.num_games
+        return self.games.count()
+    game_count.admin_order_field = 'num_games'
+
+class WishlistGame(models.Model):
+    '''A game on a wishlist, with the user's alert threshold. No threshold means alert on any sale.'''
+    wishlist = models.ForeignKey(Wishlist, on_delete=models.CASCADE)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    target_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True,
+                                       validators=[MinValueValidator(0)])
+    min_discount = models.PositiveSmallIntegerField(null=True, blank=True,
+                                                    validators=[MinValueValidator(1), MaxValueValidator(100)])
+
+    class Meta:
+        # The table Django created for the implicit many-to-many, kept so existing rows stay put
+        db_table = 'gamesdb_wishlist_games'
+        unique_together = [('wishlist', 'game')]
+
+    def __str__(self):
+        return f"{self.wishlist_id}: {self.game_id}"
+
+class PriceSnapshot(models.Model):
+    '''Last-seen best deal for a game, one row per game.'''
+    game = models.OneToOneField(Game, primary_key=True, on_delete=models.CASCADE, related_name='snapshot')
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    regular = models.DecimalField(max_digits=10, decimal_places=2)
+    shop = models.CharField(max_length=100)
+    seen_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.game_id}: {self.price} at {self.shop}"
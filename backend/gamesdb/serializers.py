@@ -1,15 +1,37 @@
 from rest_framework import serializers
-from .models import Game, Wishlist
+from .models import Game, Wishlist, PriceSnapshot
 from rest_framework.decorators import action
 
 class GameSerializer(serializers.ModelSerializer):
     class Meta:
         model = Game
-        fields = ['name']
+        fields = ['name', 'itad_id', 'title']
     
 class WishlistSerializer(serializers.ModelSerializer):
     games = GameSerializer(many=True, required=False)
 
     class Meta:
         model = Wishlist
-        fields = ['userid', 'username', 'games', 'game_count']
\ No newline at end of file
+        fields = ['userid', 'username', 'games', 'game_count']
+
+class PriceSnapshotSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='game_id', read_only=True)
+
+    class Meta:
+        model = PriceSnapshot
+        fields = ['name', 'price', 'regular', 'shop', 'seen_at']
+
+class SnapshotInputSerializer(serializers.Serializer):
+    '''One freshly fetched best deal, as posted by the bot.'''
+    name = serializers.CharField(max_length=255)
+    itad_id = serializers.CharField(max_length=64, required=False)
+    title = serializers.CharField(max_length=255, required=False)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    regular = serializers.DecimalField(max_digits=10, decimal_places=2)
+    shop = serializers.CharField(max_length=100)
+
+class ThresholdSerializer(serializers.Serializer):
+    '''Alert threshold for one wishlisted game. Leaving both fields empty alerts on any sale.'''
+    name = serializers.CharField(max_length=255)
+    target_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False, allow_null=True)
+    min_discount = serializers.IntegerField(min_value=1, max_value=100, required=False, allow_null=True)
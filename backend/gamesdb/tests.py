@@ -1,3 +1,442 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+from django.contrib.admin.utils import quote
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections
+from django.db.models.query import QuerySet
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.mixins import RetrieveModelMixin
+from rest_framework.test import APIClient, APITestCase
+from .cache import wishlist_cache
+from .models import Game, Wishlist, game_key
 
-# Create your tests here.
+def make_wishlists(count, games_per_wishlist=3):
+    names = [f"Game {n}" for n in range(games_per_wishlist)]
+    games = Game.objects.bulk_create([Game(name=name, title=name, key=game_key(name)) for name in names])
+    wishlists = Wishlist.objects.bulk_create([Wishlist(userid=n, username=f"user{n}") for n in range(1, count + 1)])
+    through = Wishlist.games.through
+    through.objects.bulk_create([through(wishlist=wishlist, game=game) for wishlist in wishlists for game in games])
+    return wishlists
+
+class QueryCountMixin:
+    def count_queries(self, func):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        return len(queries)
+
+class WishlistQueryTests(QueryCountMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("bot")
+        self.client.force_authenticate(self.user)
+        cache.clear()
+
+    def test_list_is_paginated_and_constant(self):
+        make_wishlists(120)
+        # COUNT for the paginator, the annotated page, and the games prefetch
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/wishlist/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 120)
+        self.assertEqual(len(response.data["results"]), 50)
+        self.assertEqual(response.data["results"][0]["game_count"], 3)
+
+    def test_retrieve(self):
+        make_wishlists(1, games_per_wishlist=40)
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/wishlist/1/")
+        self.assertEqual(response.data["game_count"], 40)
+        self.assertEqual(len(response.data["games"]), 40)
+
+    def test_bulk_add_is_constant(self):
+        Wishlist.objects.create(userid=1, username="one")
+        Wishlist.objects.create(userid=2, username="two")
+        small = self.count_queries(lambda: self.client.post(
+            "/api/wishlist/1/add_games/", {"names": ["a", "b"]}, format="json"))
+        large = self.count_queries(lambda: self.client.post(
+            "/api/wishlist/2/add_games/", {"names": [f"Game {n}" for n in range(200)]}, format="json"))
+        self.assertEqual(small, large)
+        self.assertEqual(Wishlist.objects.get(userid=2).games.count(), 200)
+
+    def test_bulk_add_reports_diff(self):
+        Wishlist.objects.create(userid=1, username="one")
+        self.client.post("/api/wishlist/1/add_games/", {"names": ["a"]}, format="json")
+        response = self.client.post("/api/wishlist/1/add_games/", {"names": ["a", "b"]}, format="json")
+        self.assertEqual(response.data, {"added": ["b"], "already_present": ["a"]})
+
+    def test_sync_replaces_set(self):
+        Wishlist.objects.create(userid=1, username="one")
+        self.client.post("/api/wishlist/1/add_games/", {"names": ["a", "b"]}, format="json")
+        response = self.client.put("/api/wishlist/1/sync/", {"names": ["b", "c"]}, format="json")
+        self.assertEqual(response.data, {"added": ["c"], "removed": ["a"]})
+        self.assertEqual(set(Wishlist.objects.get(userid=1).games.values_list("name", flat=True)), {"b", "c"})
+
+    def test_single_add_and_remove_are_idempotent(self):
+        Wishlist.objects.create(userid=1, username="one")
+        first = self.client.post("/api/wishlist/1/add_game/", {"name": "a"}, format="json")
+        second = self.client.post("/api/wishlist/1/add_game/", {"name": "a"}, format="json")
+        self.assertEqual(first.data, {"name": "a", "status": "added"})
+        self.assertEqual(second.data, {"name": "a", "status": "already_present"})
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/wishlist/1/contains/?name=a&name=b")
+        self.assertEqual(response.data, {"a": True, "b": False})
+        # Like the other actions, a user id that isn't a number is a 404 rather than a server error
+        self.assertEqual(self.client.get("/api/wishlist/abc/contains/?name=a").status_code, 404)
+
+        first = self.client.delete("/api/wishlist/1/remove_game/", {"name": "a"}, format="json")
+        second = self.client.delete("/api/wishlist/1/remove_game/", {"name": "a"}, format="json")
+        self.assertEqual(first.data["status"], "removed")
+        self.assertEqual(second.data["status"], "not_present")
+
+    def test_retrieve_is_cached_with_etag(self):
+        make_wishlists(1)
+        first = self.client.get("/api/wishlist/1/")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/wishlist/1/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+
+        # Writes invalidate the cached copy and change the ETag
+        self.client.post("/api/wishlist/1/add_game/", {"name": "New"}, format="json")
+        third = self.client.get("/api/wishlist/1/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(third.data["game_count"], 4)
+        self.assertNotEqual(third["ETag"], first["ETag"])
+
+    def test_a_read_overlapping_a_write_does_not_cache_stale_data(self):
+        make_wishlists(1)
+        retrieve = RetrieveModelMixin.retrieve
+
+        def racing_retrieve(view, request, *args, **kwargs):
+            response = retrieve(view, request, *args, **kwargs)
+            # A write commits and invalidates after this reader read the old rows, but before it caches them
+            Wishlist.games.through.objects.filter(wishlist_id=1, game_id="Game 0").delete()
+            wishlist_cache.invalidate(1)
+            return response
+
+        with mock.patch.object(RetrieveModelMixin, "retrieve", racing_retrieve):
+            stale = self.client.get("/api/wishlist/1/")
+        self.assertEqual(stale.data["game_count"], 3)
+        self.assertEqual(self.client.get("/api/wishlist/1/").data["game_count"], 2)
+
+    def test_game_renames_invalidate_the_cached_wishlists(self):
+        make_wishlists(2)
+        first = self.client.get("/api/wishlist/1/")
+        other = self.client.get("/api/wishlist/2/")
+        snapshot = {"name": "Game 0", "itad_id": "id-0", "title": "Game Zero", "price": "5.00", "regular": "10.00", "shop": "Steam"}
+        self.client.post("/api/games/snapshots/", [snapshot], format="json")
+
+        for userid, previous in ((1, first), (2, other)):
+            response = self.client.get(f"/api/wishlist/{userid}/", HTTP_IF_NONE_MATCH=previous["ETag"])
+            self.assertEqual(response.status_code, 200)
+            self.assertIn({"name": "Game 0", "itad_id": "id-0", "title": "Game Zero"}, response.data["games"])
+
+        # A snapshot that only moves the price leaves the cached wishlists alone
+        cached = self.client.get("/api/wishlist/1/")
+        self.client.post("/api/games/snapshots/", [{**snapshot, "price": "4.00"}], format="json")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/wishlist/1/", HTTP_IF_NONE_MATCH=cached["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_first_add_creates_the_wishlist(self):
+        response = self.client.post("/api/wishlist/42/add_game/", {"name": "Hades", "username": "newcomer"}, format="json")
+        self.assertEqual(response.data["status"], "added")
+        self.assertEqual(Wishlist.objects.get(pk=42).username, "newcomer")
+
+        response = self.client.post("/api/wishlist/43/add_games/", {"names": ["Hades", "Celeste"]}, format="json")
+        self.assertEqual(response.data["added"], ["Hades", "Celeste"])
+        self.assertEqual(Wishlist.objects.get(pk=43).games.count(), 2)
+
+        # Rejected adds don't create the wishlist
+        self.assertEqual(self.client.post("/api/wishlist/45/add_game/", {}, format="json").status_code, 400)
+        self.assertEqual(self.client.post("/api/wishlist/45/add_games/", {"names": [""]}, format="json").status_code, 400)
+        self.assertEqual(self.client.put("/api/wishlist/45/threshold/", {"name": "a", "min_discount": 0}, format="json").status_code, 400)
+        self.assertFalse(Wishlist.objects.filter(pk=45).exists())
+
+        # Removing from a wishlist that doesn't exist yet is just "not present"
+        response = self.client.delete("/api/wishlist/44/remove_games/", {"names": ["Hades"]}, format="json")
+        self.assertEqual(response.data["not_present"], ["Hades"])
+        self.assertFalse(Wishlist.objects.filter(pk=44).exists())
+
+    def test_thresholds_are_stored_and_listed_with_watchers(self):
+        self.client.post("/api/wishlist/1/add_games/", {"names": ["a", "b"]}, format="json")
+        response = self.client.put("/api/wishlist/1/threshold/", {"name": "a", "target_price": "9.99"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        # Setting a threshold on a game that isn't tracked yet adds it
+        self.client.put("/api/wishlist/2/threshold/", {"name": "a", "min_discount": 50}, format="json")
+        response = self.client.put("/api/wishlist/2/threshold/", {"name": "a", "min_discount": 150}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get("/api/wishlist/watched/")
+        games = {game["name"]: game for game in response.data["games"]}
+        self.assertEqual(games["a"]["users"], [1, 2])
+        self.assertEqual(games["a"]["targets"], [9.99, None])
+        self.assertEqual(games["a"]["discounts"], [None, 50])
+        self.assertEqual(games["b"]["targets"], [None])
+
+    def test_watched_clamps_the_page_size(self):
+        make_wishlists(2)
+        for limit, expected in (("0", 1), ("-5", 1), ("2", 2), ("100000", 3)):
+            response = self.client.get(f"/api/wishlist/watched/?limit={limit}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["games"]), expected)
+        self.assertEqual(self.client.get("/api/wishlist/watched/?limit=0").data["next"], "Game 0")
+        self.assertEqual(self.client.get("/api/wishlist/watched/?limit=x").status_code, 400)
+
+    def test_names_resolve_through_the_normalized_key(self):
+        self.client.post("/api/wishlist/1/add_game/", {"name": "Elden Ring"}, format="json")
+        response = self.client.post("/api/wishlist/2/add_games/", {"names": ["ELDEN RING", "elden-ring", "Hades"]}, format="json")
+        self.assertEqual(response.data, {"added": ["Elden Ring", "Hades"], "already_present": []})
+        self.assertEqual(Game.objects.filter(key="eldenring").count(), 1)
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/wishlist/2/contains/?name=elden%20ring&name=Celeste")
+        self.assertEqual(response.data, {"elden ring": True, "Celeste": False})
+
+        response = self.client.delete("/api/wishlist/1/remove_game/", {"name": "eLdEn RiNg"}, format="json")
+        self.assertEqual(response.data, {"name": "Elden Ring", "status": "removed"})
+        response = self.client.delete("/api/wishlist/2/remove_games/", {"names": ["elden ring", "celeste"]}, format="json")
+        self.assertEqual(response.data, {"removed": ["Elden Ring"], "not_present": ["celeste"]})
+
+    def test_games_are_keyset_paginated(self):
+        make_wishlists(1, games_per_wishlist=25)
+        with self.assertNumQueries(2):
+            first = self.client.get("/api/wishlist/1/games/?limit=10").data
+        self.assertEqual(first["count"], 25)
+        self.assertEqual(first["next"], "Game 17")
+
+        names = [game["name"] for game in first["games"]]
+        after = first["next"]
+        while after:
+            with self.assertNumQueries(1):
+                page = self.client.get(f"/api/wishlist/1/games/?limit=10&after={after}").data
+            self.assertNotIn("count", page)
+            names.extend(game["name"] for game in page["games"])
+            after = page["next"]
+        self.assertEqual(names, sorted(f"Game {n}" for n in range(25)))
+
+class WishlistAdminQueryTests(QueryCountMixin, TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", password="unused")
+        self.client.force_login(self.admin)
+
+    def test_changelist_is_constant(self):
+        make_wishlists(5)
+        small = self.count_queries(lambda: self.client.get("/admin/gamesdb/wishlist/"))
+        Wishlist.objects.all().delete()
+        Game.objects.all().delete()
+        make_wishlists(80)
+        large = self.count_queries(lambda: self.client.get("/admin/gamesdb/wishlist/"))
+        self.assertEqual(small, large)
+
+    def test_admin_edits_invalidate_the_cached_wishlists(self):
+        cache.clear()
+        make_wishlists(1)
+        api = APIClient()
+        api.force_authenticate(self.admin)
+        etag = api.get("/api/wishlist/1/")["ETag"]
+
+        url = reverse("admin:gamesdb_game_change", args=[quote("Game 1")])
+        response = self.client.post(url, {"name": "Game 1", "title": "Game One", "itad_id": "id-1"})
+        self.assertEqual(response.status_code, 302)
+        response = api.get("/api/wishlist/1/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn({"name": "Game 1", "itad_id": "id-1", "title": "Game One"}, response.data["games"])
+
+        etag = response["ETag"]
+        self.client.post(reverse("admin:gamesdb_game_delete", args=[quote("Game 2")]), {"post": "yes"})
+        response = api.get("/api/wishlist/1/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.data["game_count"], 2)
+
+class AsyncWishlistViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_wishlists(1)
+        token = Token.objects.create(user=User.objects.create_user("bot"))
+        self.auth = {"Authorization": f"Token {token.key}"}
+
+    async def test_requires_a_valid_token(self):
+        for headers in ({}, {"Authorization": "Token wrong"}, {"Authorization": "Bearer x"}):
+            response = await self.async_client.get("/api/async/wishlist/1/", headers=headers)
+            self.assertEqual(response.status_code, 401)
+
+    async def test_missing_wishlist_is_404(self):
+        response = await self.async_client.get("/api/async/wishlist/2/", headers=self.auth)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_detail_is_cached_with_etag(self):
+        first = await self.async_client.get("/api/async/wishlist/1/", headers=self.auth)
+        self.assertEqual(first.json()["game_count"], 3)
+        second = await self.async_client.get("/api/async/wishlist/1/", headers={**self.auth, "If-None-Match": first["ETag"]})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+        # Same payload and ETag as the DRF view
+        drf = await self.async_client.get("/api/wishlist/1/", headers=self.auth)
+        self.assertEqual(drf["ETag"], first["ETag"])
+
+        await self.async_client.post("/api/async/wishlist/1/add_game/", {"name": "New"}, content_type="application/json", headers=self.auth)
+        third = await self.async_client.get("/api/async/wishlist/1/", headers={**self.auth, "If-None-Match": first["ETag"]})
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(third.json()["game_count"], 4)
+
+    async def test_add_and_remove_are_idempotent(self):
+        async def add(name, userid=1):
+            response = await self.async_client.post(f"/api/async/wishlist/{userid}/add_game/", {"name": name, "username": "new"},
+                                              content_type="application/json", headers=self.auth)
+            return response.json()
+
+        async def remove(name):
+            response = await self.async_client.delete("/api/async/wishlist/1/remove_game/", {"name": name},
+                                                content_type="application/json", headers=self.auth)
+            return response.json()
+
+        self.assertEqual(await add("Hades"), {"name": "Hades", "status": "added"})
+        self.assertEqual(await add("HADES"), {"name": "Hades", "status": "already_present"})
+        self.assertEqual(await remove("hades"), {"name": "Hades", "status": "removed"})
+        self.assertEqual(await remove("hades"), {"name": "hades", "status": "not_present"})
+        # The first add creates the wishlist
+        self.assertEqual(await add("Hades", userid=5), {"name": "Hades", "status": "added"})
+        self.assertEqual((await Wishlist.objects.aget(pk=5)).username, "new")
+
+        response = await self.async_client.post("/api/async/wishlist/1/add_game/", {}, content_type="application/json", headers=self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    async def test_concurrent_add_of_the_same_game_is_already_present(self):
+        # The membership check passed, then another request inserted the row first
+        with mock.patch.object(QuerySet, "bulk_create", side_effect=IntegrityError):
+            response = await self.async_client.post("/api/async/wishlist/1/add_game/", {"name": "Celeste"},
+                                              content_type="application/json", headers=self.auth)
+        self.assertEqual(response.json(), {"name": "Celeste", "status": "already_present"})
+
+class TransferTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_superuser("admin", password="unused"))
+
+    def export(self):
+        response = self.client.get("/api/wishlist/export/")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return b"".join(response.streaming_content)
+
+    def test_export_import_round_trip(self):
+        make_wishlists(30, games_per_wishlist=4)
+        Wishlist.objects.create(userid=99, username="empty")
+        Wishlist.games.through.objects.filter(wishlist_id=1, game_id="Game 0").update(target_price="9.99", min_discount=40)
+        exported = self.export()
+        self.assertEqual(exported.count(b"\n"), 4 + 31)
+
+        Wishlist.objects.all().delete()
+        Game.objects.all().delete()
+        response = self.client.post("/api/wishlist/import/", exported, content_type="application/x-ndjson")
+        self.assertEqual(response.data, {"games": 4, "wishlists": 31, "memberships": 120})
+        self.assertEqual(self.export(), exported)
+
+        # Importing again changes nothing
+        self.client.post("/api/wishlist/import/", exported, content_type="application/x-ndjson")
+        self.assertEqual(Wishlist.games.through.objects.count(), 120)
+
+    def test_import_command_batches_and_reports_bad_lines(self):
+        lines = [json.dumps({"type": "wishlist", "userid": n, "username": f"user{n}", "games": [{"name": f"game {n % 7}"}]})
+                 for n in range(1, 51)]
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as source:
+            source.write("\n".join(lines) + "\n")
+        call_command("wishlists", "import", source.name, "--batch-size", "10", stderr=io.StringIO())
+        os.unlink(source.name)
+        self.assertEqual(Wishlist.objects.count(), 50)
+        self.assertEqual(Game.objects.count(), 7)
+
+        response = self.client.post("/api/wishlist/import/", b'{"type": "wishlist", "userid": "x"}\n',
+                                    content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 400)
+
+class BackfillItadIdsTests(TestCase):
+    def test_resolves_missing_ids_in_batches(self):
+        Game.objects.bulk_create([Game(name=f"Game {n}", title=f"Game {n}", key=game_key(f"Game {n}")) for n in range(5)])
+        Game.objects.filter(name="Game 0").update(itad_id="kept")
+        batches = []
+
+        def lookup(base_url, key, titles, timeout):
+            batches.append(titles)
+            return {title: None if title == "Game 3" else f"id-{title[-1]}" for title in titles}
+
+        with mock.patch("gamesdb.management.commands.backfill_itad_ids.lookup_ids", side_effect=lookup):
+            call_command("backfill_itad_ids", "--key", "k", "--batch-size", "2", "--delay", "0", stderr=io.StringIO())
+
+        self.assertEqual(batches, [["Game 1", "Game 2"], ["Game 3", "Game 4"]])
+        self.assertEqual(dict(Game.objects.values_list("name", "itad_id")),
+                         {"Game 0": "kept", "Game 1": "id-1", "Game 2": "id-2", "Game 3": None, "Game 4": "id-4"})
+
+class MetricsTests(APITestCase):
+    def test_requests_are_timed_under_the_bot_metric_names(self):
+        make_wishlists(1)
+        self.client.force_authenticate(User.objects.create_user("bot"))
+        self.client.get("/api/wishlist/1/")
+        self.client.post("/api/wishlist/1/add_games/", {"names": "not a list"}, format="json")
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_superuser("admin", password="unused"))
+        body = self.client.get("/api/metrics/").content.decode()
+        labels = 'endpoint="/api/wishlist/{id}/",method="GET",upstream="backend"'
+        self.assertIn(f'demure_request_seconds_count{{{labels}}}', body)
+        self.assertIn('demure_request_errors_total{endpoint="/api/wishlist/{id}/add_games/",method="POST",'
+                      'status="400",upstream="backend"} 1', body)
+
+    def test_new_connections_are_timed_by_the_backend(self):
+        self.client.force_authenticate(User.objects.create_superuser("admin", password="unused"))
+        before = self.client.get("/api/dbstats/").data["checkout"]["checkouts"]
+        # The test case's own connection stays open; a second one is a real connect
+        extra = connections.create_connection("default")
+        extra.ensure_connection()
+        extra.ensure_connection()
+        extra.close()
+        self.assertEqual(self.client.get("/api/dbstats/").data["checkout"]["checkouts"], before + 1)
+
+class MergeDuplicatesMigrationTests(TransactionTestCase):
+    before = [('gamesdb', '0005_wishlistgame_thresholds')]
+    after = [('gamesdb', '0006_game_key_merge_duplicates')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_merge_keeps_thresholds_set_on_duplicates(self):
+        apps = self.migrate(self.before)
+        Game = apps.get_model('gamesdb', 'Game')
+        Wishlist = apps.get_model('gamesdb', 'Wishlist')
+        WishlistGame = apps.get_model('gamesdb', 'WishlistGame')
+        Game.objects.create(name="ELDEN RING", title="ELDEN RING", itad_id="id-elden")
+        Game.objects.create(name="Elden Ring", title="Elden Ring")
+        for userid in (1, 2, 3):
+            Wishlist.objects.create(userid=userid, username=f"user{userid}")
+        # Both spellings on one wishlist: the kept row has no threshold, the duplicate's $5 target must survive
+        WishlistGame.objects.create(wishlist_id=1, game_id="ELDEN RING", min_discount=None)
+        WishlistGame.objects.create(wishlist_id=1, game_id="Elden Ring", target_price="5.00")
+        # Both set a minimum discount: the kept row's wins, and the duplicate's target fills the unset field
+        WishlistGame.objects.create(wishlist_id=2, game_id="ELDEN RING", min_discount=50)
+        WishlistGame.objects.create(wishlist_id=2, game_id="Elden Ring", min_discount=20, target_price="7.50")
+        # Only the duplicate: the membership moves with its threshold
+        WishlistGame.objects.create(wishlist_id=3, game_id="Elden Ring", min_discount=30)
+
+        apps = self.migrate(self.after)
+        rows = apps.get_model('gamesdb', 'WishlistGame').objects.order_by('wishlist_id').values_list(
+            'wishlist_id', 'game_id', 'target_price', 'min_discount')
+        self.assertEqual([(userid, game, None if target is None else str(target), discount)
+                          for userid, game, target, discount in rows], [
+            (1, "ELDEN RING", "5.00", None),
+            (2, "ELDEN RING", "7.50", 50),
+            (3, "ELDEN RING", None, 30),
+        ])
+        self.assertEqual(list(apps.get_model('gamesdb', 'Game').objects.values_list('name', 'key')), [("ELDEN RING", "eldenring")])
@@ -0,0 +1,130 @@
+import json
+from django.db import reset_queries, transaction
+from .cache import wishlist_cache
+from .models import Game, Wishlist, WishlistGame, game_key
+
+# NDJSON backup format, one record per line: every game first, then every
+# wishlist with its games and alert thresholds.
+#
+#   {"type": "game", "name": "Hades", "title": "Hades", "itad_id": "018d..."}
+#   {"type": "wishlist", "userid": 1, "username": "ann", "games": [{"name": "Hades", "target_price": "9.99"}]}
+
+def dumps(record):
+    return json.dumps(record, separators=(',', ':')) + '\n'
+
+def membership(game_id, target_price, min_discount):
+    entry = {"name": game_id}
+    if target_price is not None:
+        entry["target_price"] = str(target_price)
+    if min_discount is not None:
+        entry["min_discount"] = min_discount
+    return entry
+
+def export_lines(chunk_size=2000):
+    '''Yield the NDJSON export of every game and wishlist.
+
+    Each table is read with .iterator(chunk_size=...), and wishlists are
+    merged with their memberships in userid order, so memory stays flat
+    however large the tables are.
+    '''
+    games = Game.objects.order_by('name').values_list('name', 'title', 'itad_id')
+    for name, title, itad_id in games.iterator(chunk_size=chunk_size):
+        yield dumps({"type": "game", "name": name, "title": title, "itad_id": itad_id})
+
+    memberships = (
+        WishlistGame.objects.order_by('wishlist_id', 'game_id')
+        .values_list('wishlist_id', 'game_id', 'target_price', 'min_discount')
+        .iterator(chunk_size=chunk_size)
+    )
+    pending = next(memberships, None)
+    wishlists = Wishlist.objects.order_by('userid').values_list('userid', 'username')
+    for userid, username in wishlists.iterator(chunk_size=chunk_size):
+        entries = []
+        while pending is not None and pending[0] <= userid:
+            if pending[0] == userid:
+                entries.append(membership(*pending[1:]))
+            pending = next(memberships, None)
+        yield dumps({"type": "wishlist", "userid": userid, "username": username, "games": entries})
+
+def import_games(records):
+    with transaction.atomic():
+        Game.objects.bulk_create([
+            Game(name=record["name"], title=record.get("title") or record["name"],
+                 itad_id=record.get("itad_id"), key=game_key(record["name"]))
+            for record in records
+        ], ignore_conflicts=True)
+    reset_queries()
+
+def import_wishlists(records):
+    '''Upsert a batch of wishlists and insert their memberships, in one transaction.'''
+    wishlists = {record["userid"]: record for record in records}
+    with transaction.atomic():
+        Wishlist.objects.bulk_create(
+            [Wishlist(userid=userid, username=record["username"]) for userid, record in wishlists.items()],
+            update_conflicts=True, unique_fields=['userid'], update_fields=['username'],
+        )
+        # Names resolve through the normalized key, as for the API's add paths
+        resolved = Game.objects.resolve_or_create([entry["name"] for record in records for entry in record["games"]])
+        WishlistGame.objects.bulk_create([
+            WishlistGame(wishlist_id=userid, game_id=resolved[entry["name"]],
+                         target_price=entry.get("target_price"), min_discount=entry.get("min_discount"))
+            for userid, record in wishlists.items() for entry in record["games"]
+        ], ignore_conflicts=True)
+    wishlist_cache.invalidate_many(wishlists)
+    # With DEBUG on, Django keeps the SQL of every query; a long import would grow with it
+    reset_queries()
+
+def import_lines(lines, batch_size=1000):
+    '''Load NDJSON lines written by export_lines. Returns the number of games, wishlists and memberships read.
+
+    Records are applied in batches of about batch_size rows, each in its own
+    transaction, so an import of any size holds one batch in memory. Existing
+    games and memberships are kept and usernames are updated, so re-running
+    an import is harmless. A malformed line raises ValueError; the batches
+    before it stay committed.
+    '''
+    counts = {"games": 0, "wishlists": 0, "memberships": 0}
+    games, wishlists, rows = [], [], 0
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode()
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            kind = record["type"]
+            if kind == "game":
+                record["name"] = str(record["name"])
+            elif kind == "wishlist":
+                record["userid"] = int(record["userid"])
+                record["username"] = str(record["username"])
+                if not all(isinstance(entry["name"], str) for entry in record["games"]):
+                    raise ValueError("game names must be strings")
+            else:
+                raise ValueError(f"unknown record type {kind!r}")
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Line {number}: {e}") from None
+
+        if kind == "game":
+            games.append(record)
+            counts["games"] += 1
+            if len(games) >= batch_size:
+                import_games(games)
+                games = []
+        else:
+            if games:
+                import_games(games)
+                games = []
+            wishlists.append(record)
+            rows += len(record["games"]) + 1
+            counts["wishlists"] += 1
+            counts["memberships"] += len(record["games"])
+            if rows >= batch_size:
+                import_wishlists(wishlists)
+                wishlists, rows = [], 0
+
+    if games:
+        import_games(games)
+    if wishlists:
+        import_wishlists(wishlists)
+    return counts
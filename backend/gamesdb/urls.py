@@ -1,10 +1,18 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import WishlistViewSet
+from .views import WishlistViewSet, GameViewSet, db_stats, cache_stats, metrics
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'wishlist', WishlistViewSet, basename='wishlist')
+router.register(r'games', GameViewSet, basename='games')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('dbstats/', db_stats, name='db-stats'),
+    path('cachestats/', cache_stats, name='cache-stats'),
+    path('metrics/', metrics, name='metrics'),
+    path('async/wishlist/<int:userid>/', async_views.wishlist_detail, name='async-wishlist-detail'),
+    path('async/wishlist/<int:userid>/add_game/', async_views.add_game, name='async-wishlist-add-game'),
+    path('async/wishlist/<int:userid>/remove_game/', async_views.remove_game, name='async-wishlist-remove-game'),
 ]
\ No newline at end of file
@@ -1,36 +1,88 @@
-from rest_framework import viewsets
-from .models import Wishlist, Game
-from .serializers import WishlistSerializer
+from django.db import connection, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework import status, viewsets
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser, SAFE_METHODS
+from backend.metrics import checkout_stats, request_metrics
+from .cache import wishlist_cache, etag_matches
+from .models import Wishlist, Game, PriceSnapshot, game_key
+from .serializers import WishlistSerializer, GameSerializer, PriceSnapshotSerializer, SnapshotInputSerializer
+from .serializers import ThresholdSerializer
+from .transfer import export_lines, import_lines
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 
 class WishlistViewSet(viewsets.ModelViewSet):
     queryset = Wishlist.objects.all()
     serializer_class = WishlistSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            # Read paths serialize game_count and nested games for every row.
+            # Write actions skip this so game_count isn't read from a stale annotation.
+            queryset = queryset.annotate(num_games=Count('games')).prefetch_related('games').order_by('userid')
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        """Serve the wishlist from the per-user cache, answering 304 when the client's ETag matches."""
+        pk = kwargs['pk']
+        entry, version = wishlist_cache.get(pk)
+        if entry is None:
+            entry = wishlist_cache.set(pk, super().retrieve(request, *args, **kwargs).data, version)
+        if etag_matches(request, entry['etag']):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': entry['etag']})
+        return Response(entry['data'], headers={'ETag': entry['etag']})
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        wishlist_cache.invalidate(serializer.instance.pk)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Every write to a wishlist (update, destroy, add/remove/sync actions) drops its cached copy
+        if request.method not in SAFE_METHODS and self.kwargs.get('pk') is not None:
+            wishlist_cache.invalidate(self.kwargs['pk'])
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def wishlist_id(self):
+        """The pk from the URL as a user id, without requiring the wishlist to exist."""
+        try:
+            return int(self.kwargs['pk'])
+        except ValueError:
+            raise NotFound()
+
+    def get_or_create_wishlist(self, request):
+        """The URL's wishlist, created on a user's first add so the bot never has to create it separately.
+
+        Called after the request is validated and inside the write's transaction,
+        so a rejected or failed add never leaves an empty wishlist behind.
+        """
+        username = request.data.get('username') or str(self.wishlist_id())
+        wishlist, _ = Wishlist.objects.get_or_create(userid=self.wishlist_id(), defaults={'username': username})
+        return wishlist
+
     @action(detail=True, methods=['post'], url_path='add_game')
     def add_game(self, request, pk=None):
-        wishlist = self.get_object()
-
+        """Idempotently add one game, creating the wishlist if needed. Reports whether it was added or already present."""
         # Get the game data from the request
         game_name = request.data.get('name', None)
         
         if not game_name:
             raise ValidationError("Game data must include a 'name' field.")
         
-        # Find or create the game based on the name
-        game, created = Game.objects.get_or_create(name=game_name)
-        
-        # Add the game to the wishlist
-        wishlist.games.add(game)
+        # Create the wishlist and game if needed and add it unless it is already present
+        with transaction.atomic():
+            wishlist = self.get_or_create_wishlist(request)
+            stored, added = self.add_names(wishlist, [game_name])
 
-        # Return the updated wishlist
-        return Response(self.get_serializer(wishlist).data)
+        return Response({"name": stored[0], "status": "added" if added else "already_present"})
     
     @action(detail=True, methods=['delete'], url_path='remove_game')
     def remove_game(self, request, pk=None):
-        wishlist = self.get_object()
+        """Idempotently remove one game. Reports whether it was removed or not present."""
 
         # Get the game data from the request
         game_name = request.data.get('name', None)
@@ -38,14 +90,270 @@ class WishlistViewSet(viewsets.ModelViewSet):
         if not game_name:
             raise ValidationError("Game data must include a 'name' field.")
         
-        # Find the game based on the name
+        # Delete the membership directly; a missing game is simply not present
+        stored = Game.objects.resolve([game_name]).get(game_name)
+        deleted = 0
+        if stored is not None:
+            deleted, _ = Wishlist.games.through.objects.filter(wishlist_id=self.wishlist_id(), game_id=stored).delete()
+
+        return Response({"name": stored or game_name, "status": "removed" if deleted else "not_present"})
+
+    @action(detail=True, methods=['get'], url_path='games')
+    def games(self, request, pk=None):
+        """One page of the wishlist's games with their thresholds, keyset-paginated by name on the through table.
+
+        The first page (no 'after') also carries the total count, so clients
+        can show "page x of y" without fetching the rest.
+        """
+        after = request.query_params.get('after', '')
         try:
-            game = Game.objects.get(name=game_name)
-        except Game.DoesNotExist:
-            raise ValidationError("Game not found.")
-        
-        # Remove the game from the wishlist
-        wishlist.games.remove(game)
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 100))
+        except ValueError:
+            raise ValidationError("'limit' must be an integer.")
+
+        memberships = Wishlist.games.through.objects.filter(wishlist_id=self.wishlist_id())
+        page = list(
+            memberships.filter(game_id__gt=after).order_by('game_id')
+            .values('game_id', 'game__title', 'game__itad_id', 'target_price', 'min_discount')[:limit]
+        )
+        data = {
+            "games": [{"name": row['game_id'], "title": row['game__title'] or row['game_id'], "itad_id": row['game__itad_id'],
+                       "target_price": row['target_price'], "min_discount": row['min_discount']} for row in page],
+            "next": page[-1]['game_id'] if len(page) == limit else None,
+        }
+        if not after:
+            data["count"] = memberships.count()
+        return Response(data)
+
+    @action(detail=True, methods=['get'], url_path='contains')
+    def contains(self, request, pk=None):
+        """Check membership of one or more ?name= games with a single query, matching names by their normalized key."""
+        names = request.query_params.getlist('name')
+        if not names:
+            raise ValidationError("Query must include at least one 'name' parameter.")
+
+        keys = {name: game_key(name) for name in names}
+        present = set(
+            Wishlist.games.through.objects.filter(wishlist_id=self.wishlist_id(), game__key__in=set(keys.values()))
+            .values_list('game__key', flat=True)
+        )
+        return Response({name: key in present for name, key in keys.items()})
+
+    def get_names(self, request):
+        """Validated, de-duplicated 'names' list from the request body."""
+        names = request.data.get('names', None)
+        if not isinstance(names, list) or not all(isinstance(name, str) and name for name in names):
+            raise ValidationError("Request must include a 'names' list of game names.")
+        return list(dict.fromkeys(names))
+
+    def add_names(self, wishlist, names):
+        """Insert missing games and memberships in bulk.
+
+        Names resolve to existing games through their normalized key, and a new
+        game is stored under the first spelling it was requested with. Returns
+        (stored names in request order, the ones newly added).
+        """
+        through = Wishlist.games.through
+        resolved = Game.objects.resolve_or_create(names)
+        stored = list(dict.fromkeys(resolved[name] for name in names))
+        present = set(through.objects.filter(wishlist_id=wishlist.pk, game_id__in=stored).values_list('game_id', flat=True))
+        added = [name for name in stored if name not in present]
+        through.objects.bulk_create([through(wishlist_id=wishlist.pk, game_id=name) for name in added], ignore_conflicts=True)
+        return stored, added
+
+    @action(detail=True, methods=['post'], url_path='add_games')
+    def add_games(self, request, pk=None):
+        names = self.get_names(request)
+
+        with transaction.atomic():
+            wishlist = self.get_or_create_wishlist(request)
+            stored, added = self.add_names(wishlist, names)
+
+        return Response({
+            "added": added,
+            "already_present": [name for name in stored if name not in added],
+        })
+
+    @action(detail=True, methods=['delete'], url_path='remove_games')
+    def remove_games(self, request, pk=None):
+        names = self.get_names(request)
+
+        through = Wishlist.games.through
+        with transaction.atomic():
+            resolved = Game.objects.resolve(names)
+            memberships = through.objects.filter(wishlist_id=self.wishlist_id(), game_id__in=set(resolved.values()))
+            removed = set(memberships.values_list('game_id', flat=True))
+            memberships.delete()
+
+        return Response({
+            "removed": list(dict.fromkeys(resolved[name] for name in names if resolved.get(name) in removed)),
+            "not_present": [name for name in names if resolved.get(name) not in removed],
+        })
+
+    @action(detail=True, methods=['put'], url_path='threshold')
+    def threshold(self, request, pk=None):
+        """Set the target price and/or minimum discount that a game's sale must meet to alert, adding the game if needed."""
+        serializer = ThresholdSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        with transaction.atomic():
+            wishlist = self.get_or_create_wishlist(request)
+            stored, _ = self.add_names(wishlist, [data['name']])
+            Wishlist.games.through.objects.filter(wishlist_id=wishlist.pk, game_id=stored[0]).update(
+                target_price=data.get('target_price'), min_discount=data.get('min_discount'))
+
+        return Response({"name": stored[0], "target_price": data.get('target_price'), "min_discount": data.get('min_discount')})
+
+    @action(detail=True, methods=['put'], url_path='sync')
+    def sync(self, request, pk=None):
+        """Atomically replace the wishlist's games with the given names."""
+        wishlist = self.get_object()
+        names = self.get_names(request)
+
+        through = Wishlist.games.through
+        with transaction.atomic():
+            # Lock the wishlist so concurrent syncs apply one after the other
+            wishlist = Wishlist.objects.select_for_update().get(pk=wishlist.pk)
+            memberships = through.objects.filter(wishlist_id=wishlist.pk)
+            current = set(memberships.values_list('game_id', flat=True))
+            stored, added = self.add_names(wishlist, names)
+            removed = sorted(current.difference(stored))
+            memberships.filter(game_id__in=removed).delete()
+
+        return Response({"added": added, "removed": removed})
+
+    @action(detail=False, methods=['get'], url_path='export', permission_classes=[IsAdminUser])
+    def export(self, request):
+        """Every game and wishlist as NDJSON (see transfer.py), streamed so memory stays flat at any table size."""
+        response = StreamingHttpResponse(export_lines(), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="wishlists.ndjson"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAdminUser])
+    def import_wishlists(self, request):
+        """Load an NDJSON export from the request body, read line by line and written in batched transactions."""
+        if request.stream is None:
+            raise ValidationError("Request body must be an NDJSON export.")
+        try:
+            counts = import_lines(request.stream)
+        except ValueError as e:
+            raise ValidationError(str(e))
+        return Response(counts)
+
+    @action(detail=False, methods=['get'], url_path='watched')
+    def watched(self, request):
+        """Every wishlisted game with its watchers and their alert thresholds, keyset-paginated by name."""
+        after = request.query_params.get('after', '')
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 500)), 5000))
+        except ValueError:
+            raise ValidationError("'limit' must be an integer.")
+
+        through = Wishlist.games.through
+        page = list(
+            through.objects.filter(game_id__gt=after)
+            .order_by('game_id')
+            .values_list('game_id', 'game__itad_id')
+            .distinct()[:limit]
+        )
+        itad_ids = dict(page)
+
+        # One query for all watchers of this page of games, as parallel users/targets/discounts columns
+        watchers = {name: ([], [], []) for name in itad_ids}
+        rows = through.objects.filter(game_id__in=itad_ids).values_list('game_id', 'wishlist_id', 'target_price', 'min_discount')
+        for name, userid, target, discount in rows:
+            users, targets, discounts = watchers[name]
+            users.append(userid)
+            targets.append(None if target is None else float(target))
+            discounts.append(discount)
+
+        return Response({
+            "games": [{"name": name, "itad_id": itad_ids[name], "users": users, "targets": targets, "discounts": discounts}
+                      for name, (users, targets, discounts) in watchers.items()],
+            "next": page[-1][0] if len(page) == limit else None,
+        })
+
+class GameViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Game.objects.order_by('name')
+    serializer_class = GameSerializer
+
+    @action(detail=False, methods=['post'], url_path='snapshots')
+    def snapshots(self, request):
+        """Store the latest best deals and return the games whose deal changed since the last snapshot."""
+        serializer = SnapshotInputSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        rows = {row['name']: row for row in serializer.validated_data}
+        now = timezone.now()
+
+        with transaction.atomic():
+            games = Game.objects.in_bulk(list(rows))
+            # One indexed lookup for every previous snapshot in the batch
+            previous = PriceSnapshot.objects.in_bulk(list(games))
+
+            renamed, created, updated, changed = [], [], [], []
+            for name, game in games.items():
+                row = rows[name]
+                itad_id = row.get('itad_id', game.itad_id)
+                title = row.get('title', game.title)
+                if (itad_id, title) != (game.itad_id, game.title):
+                    game.itad_id, game.title = itad_id, title
+                    renamed.append(game)
+
+                snapshot = previous.get(name)
+                if snapshot is None:
+                    created.append(PriceSnapshot(game=game, price=row['price'], regular=row['regular'],
+                                                 shop=row['shop'], seen_at=now))
+                    continue
+                if (snapshot.price, snapshot.shop) != (row['price'], row['shop']):
+                    changed.append(name)
+                snapshot.price, snapshot.regular, snapshot.shop, snapshot.seen_at = row['price'], row['regular'], row['shop'], now
+                updated.append(snapshot)
+
+            Game.objects.bulk_update(renamed, ['itad_id', 'title'])
+            PriceSnapshot.objects.bulk_create(created)
+            PriceSnapshot.objects.bulk_update(updated, ['price', 'regular', 'shop', 'seen_at'])
+
+        # Titles and ITAD ids are part of every serialized wishlist holding the game
+        if renamed:
+            wishlist_cache.invalidate_watchers([game.name for game in renamed])
+        return Response({"changed": changed, "created": len(created)})
+
+    @action(detail=False, methods=['get'], url_path='titles')
+    def titles(self, request):
+        """Compact name/title/ITAD id rows for seeding the bot's title index, keyset-paginated by name."""
+        after = request.query_params.get('after', '')
+        limit = 5000
+        rows = list(
+            Game.objects.filter(name__gt=after).order_by('name').values('name', 'title', 'itad_id')[:limit]
+        )
+        return Response({"games": rows, "next": rows[-1]['name'] if len(rows) == limit else None})
+
+    @action(detail=False, methods=['get'], url_path='latest')
+    def latest(self, request):
+        """Stored snapshots for the given comma-separated game names, matched by normalized key."""
+        names = [name for name in request.query_params.get('names', '').split(',') if name]
+        snapshots = PriceSnapshot.objects.filter(game__key__in={game_key(name) for name in names})
+        return Response(PriceSnapshotSerializer(snapshots, many=True).data)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def db_stats(request):
+    """Connection checkout timings for this process, plus psycopg pool stats when pooling is enabled."""
+    stats = {"checkout": checkout_stats.as_dict()}
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        stats["pool"] = pool.get_stats()
+    return Response(stats)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """Wishlist cache hit ratio for this process."""
+    return Response({"wishlist": wishlist_cache.stats()})
 
-        # Return the updated wishlist
-        return Response(self.get_serializer(wishlist).data)
\ No newline at end of file
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """Request latency histograms for this process in the Prometheus text format."""
+    return HttpResponse(request_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,90 @@
+'''Alert evaluation over every subscription: a Python loop per row vs Subscriptions' NumPy columns.
+
+Builds --sizes subscriptions spread over --games games, about a third with a
+target price, a third with a minimum discount and the rest alerting on any
+sale. Then it reprices --changed of the games and finds the subscriptions to
+alert. "loop" walks the rows in Python, the way the notifier used to walk
+each game's watchers. "numpy" is Subscriptions.alerts. Both must return the
+same alerts. "build" is the one-off cost of add() + freeze() per pass.
+
+    python benchmarks/alert_eval.py --sizes 10000 100000 1000000 --games 50000
+'''
+import argparse
+import random
+import time
+from common import print_table
+from subscriptions import Subscriptions
+
+def make_watched(size, games, seed=0):
+    '''watched/ style pages: name -> (users, targets, discounts).'''
+    rng = random.Random(seed)
+    watched = {}
+    for user in range(size):
+        users, targets, discounts = watched.setdefault(f"Game {rng.randrange(games)}", ([], [], []))
+        kind = rng.randrange(3)
+        users.append(user)
+        targets.append(round(rng.uniform(1, 30), 2) if kind == 0 else None)
+        discounts.append(rng.randrange(10, 95) if kind == 1 else None)
+    return watched
+
+def loop_alerts(watched, deals):
+    alerts = []
+    for name, (users, targets, discounts) in watched.items():
+        deal = deals.get(name)
+        if deal is None:
+            continue
+        price, regular = deal
+        if price >= regular:
+            continue
+        cut = round((1 - price / regular) * 100, 6)
+        for user, target, discount in zip(users, targets, discounts):
+            if (target is None or price <= target) and (discount is None or cut >= discount):
+                alerts.append((user, name))
+    return alerts
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--games", type=int, default=50_000)
+    parser.add_argument("--changed", type=float, default=0.1, help="fraction of games whose deal changed this pass")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        watched = make_watched(size, args.games)
+        rng = random.Random(1)
+        deals = {name: (round(rng.uniform(1, 40), 2), 40.0) for name in watched if rng.random() < args.changed}
+
+        def build():
+            subscriptions = Subscriptions()
+            for name, (users, targets, discounts) in watched.items():
+                subscriptions.add(name, users, targets, discounts)
+            return subscriptions.freeze()
+
+        build_s, subscriptions = best_of(1, build)
+        loop_s, expected = best_of(args.repeat, lambda: loop_alerts(watched, deals))
+        numpy_s, alerts = best_of(args.repeat, lambda: subscriptions.alerts(deals))
+        matches_s, _ = best_of(args.repeat, lambda: subscriptions.matches(*subscriptions.price_vectors(deals)))
+        assert sorted(alerts) == sorted(expected)
+        rows.append({
+            "subscriptions": size,
+            "alerts": len(alerts),
+            "build_ms": round(build_s * 1000, 1),
+            "loop_ms": round(loop_s * 1000, 2),
+            "numpy_ms": round(numpy_s * 1000, 2),
+            "mask_only_ms": round(matches_s * 1000, 2),
+            "speedup": round(loop_s / numpy_s, 1),
+        })
+    print_table(f"{args.games} games, {args.changed:.0%} repriced (best of {args.repeat})", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND = ROOT / "backend"
+TESTS = ROOT / "tests"
+
+# Bot modules live at the repository root, the Django project under backend/, fakes under tests/
+for path in (ROOT, BACKEND, TESTS):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+def percentile(samples, pct):
+    '''Nearest-rank percentile of a list of numbers.'''
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def latency_summary(samples):
+    '''p50/p95/p99/max of latencies in seconds, reported in milliseconds.'''
+    return {f"p{pct}": round(percentile(samples, pct) * 1000, 2) for pct in (50, 95, 99)} | {
+        "max": round(max(samples, default=0) * 1000, 2),
+    }
+
+def print_table(title, rows):
+    '''Print a list of dicts as an aligned table.'''
+    print(f"\n{title}")
+    if not rows:
+        return
+    columns = list(rows[0])
+    widths = {col: max(len(col), *(len(str(row[col])) for row in rows)) for col in columns}
+    print("  ".join(col.ljust(widths[col]) for col in columns))
+    for row in rows:
+        print("  ".join(str(row[col]).ljust(widths[col]) for col in columns))
@@ -0,0 +1,106 @@
+'''Per-request database connection cost with and without persistent connections.
+
+Serves the same authenticated wishlist read over HTTP from a real server in
+three configurations, each in its own server process:
+
+    fresh       DB_CONN_MAX_AGE=0 (a new Postgres connection per request)
+    persistent  DB_CONN_MAX_AGE=60 with health checks
+    pool        DB_POOL=1 (psycopg 3 pool)
+
+Django's request_started/request_finished signals close or return the
+connection between requests, which the test client skips, so only a server
+shows the difference. The server is manage.py runserver --nothreading (one
+thread, so a persistent connection is reused by the next request) or
+gunicorn's sync workers with --server gunicorn.
+
+Reports request latency next to the connection checkouts the server recorded
+(the /api/dbstats/ endpoint, timed by the backend.db database backends).
+Needs the Postgres database configured through the POSTGRES_* variables;
+SQLite connections are too cheap to be meaningful.
+
+    python benchmarks/db_connections.py --requests 2000
+'''
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import aiohttp
+from common import BACKEND, latency_summary, print_table
+from wsgi_vs_asgi import free_port, manage, wait_for_port
+
+CONFIGS = {
+    "fresh": {"DB_CONN_MAX_AGE": "0"},
+    "persistent": {"DB_CONN_MAX_AGE": "60"},
+    "pool": {"DB_POOL": "1"},
+}
+
+SEED = '''
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+from gamesdb.models import Wishlist
+user, _ = User.objects.get_or_create(username="bench")
+user.is_staff = True  # for /api/dbstats/
+user.save()
+token, _ = Token.objects.get_or_create(user=user)
+Wishlist.objects.get_or_create(userid=1, defaults={"username": "bench"})
+print(token.key)
+'''
+
+async def measure(base_url, token, requests):
+    headers = {"Authorization": f"Token {token}"}
+    async with aiohttp.ClientSession(headers=headers) as session:
+        async def get(url):
+            async with session.get(url) as response:
+                assert response.status == 200, response.status
+                return await response.json()
+
+        await get(f"{base_url}/api/wishlist/1/")  # warm up
+        before = (await get(f"{base_url}/api/dbstats/"))["checkout"]
+        latencies = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            await get(f"{base_url}/api/wishlist/1/")
+            latencies.append(time.perf_counter() - start)
+        after = (await get(f"{base_url}/api/dbstats/"))["checkout"]
+
+    # The stats endpoint's own request counts too, like the warm-up did in before
+    checkouts = after["checkouts"] - before["checkouts"]
+    total_ms = after["avg_wait_ms"] * after["checkouts"] - before["avg_wait_ms"] * before["checkouts"]
+    return {**latency_summary(latencies), "checkouts": checkouts,
+            "avg_wait_ms": round(total_ms / checkouts, 3) if checkouts else 0.0, "max_wait_ms": after["max_wait_ms"]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--server", choices=["runserver", "gunicorn"], default="runserver")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn sync workers")
+    args = parser.parse_args()
+
+    base = dict(os.environ, DJANGO_SETTINGS_MODULE="backend.settings")
+    base.setdefault("SECRET_KEY", "benchmark")
+    base.pop("SQLITE_PATH", None)
+    manage(base, "migrate", "-v", "0")
+    token = manage(base, "shell", "-c", SEED).strip().splitlines()[-1]
+
+    rows = []
+    for name, overrides in CONFIGS.items():
+        port = free_port()
+        if args.server == "gunicorn":
+            command = ["gunicorn", "backend.wsgi:application", "--workers", str(args.workers), "--bind", f"127.0.0.1:{port}"]
+        else:
+            command = [sys.executable, "manage.py", "runserver", f"127.0.0.1:{port}", "--noreload", "--nothreading"]
+        server = subprocess.Popen(command, cwd=BACKEND, env={**base, **overrides},
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            asyncio.run(wait_for_port(port))
+            rows.append({"config": name, **asyncio.run(measure(f"http://127.0.0.1:{port}", token, args.requests))})
+        finally:
+            server.terminate()
+            server.wait()
+
+    print_table(f"{args.requests} sequential requests over HTTP ({args.server}, ms)", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+'''End-to-end load on the ITAD cog: simulated Discord traffic, fake ITAD, real backend.
+
+Imports bot.py and loads the IsThereAnyDeal cog into it without connecting to
+Discord. Commands arrive as a Poisson process at --rate per second for
+--duration seconds. Each one goes through the bot's own parsing, hooks and
+metrics (bot.invoke) on a fake message. Replies cost
+--discord-latency seconds, like a round trip to Discord. After an !itad
+reply offers the 👀 prompt, the author reacts with probability --react,
+--react-delay seconds later on average.
+
+Titles are Zipf-distributed over a --titles game catalog, and users are
+drawn from --users seeded wishlists. ITAD is tests/fake_itad.py, with
+--itad-latency and --itad-error-rate. The backend is the Django project on a
+throwaway SQLite file (or the configured Postgres with --postgres), served
+by manage.py runserver, or by gunicorn with --workers when --server gunicorn
+is given. On SQLite, concurrent writes can fail with "database is locked",
+which shows up as backend errors on the add/remove endpoints. The client-side ITAD limiter is
+raised to --itad-rate; pass --itad-rate 5 to include the production limit.
+
+Reports throughput, per-command latency (arrival to completion), upstream
+calls and event-loop lag. --json saves the results and --baseline compares
+them with a saved run, so a change can be measured against the tree before
+it:
+
+    python benchmarks/e2e_load.py --rate 20 --duration 30 --json before.json
+    python benchmarks/e2e_load.py --rate 20 --duration 30 --baseline before.json
+'''
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from common import BACKEND, latency_summary, print_table
+from wsgi_vs_asgi import SEED, free_port, manage, wait_for_port
+
+MIX = {"itad": 35, "wishlist": 20, "wish": 15, "deals": 10, "compare": 8, "unwish": 7, "alert": 5}
+
+def parse_mix(text):
+    '''"itad=50,wishlist=50" -> {"itad": 50, "wishlist": 50}'''
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(MIX)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown commands: {', '.join(sorted(unknown))}")
+    return mix
+
+def make_catalog(titles, seed=0):
+    '''FakeITAD games: "Game n" titles, about a third of them on sale.'''
+    rng = random.Random(seed)
+    games = {}
+    for n in range(titles):
+        regular = rng.choice((9.99, 19.99, 29.99, 59.99))
+        price = round(regular * rng.choice((0.25, 0.5, 0.75)), 2) if rng.random() < 0.3 else regular
+        games[f"Game {n}"] = {"id": f"id-{n}", "price": price, "regular": regular, "shop": rng.choice(("Steam", "GOG", "Epic"))}
+    return games
+
+class Workload:
+    '''Command lines for the mix, with titles Zipf-distributed over the catalog.'''
+    def __init__(self, args, seed=0):
+        self.rng = random.Random(seed)
+        self.titles = [f"Game {n}" for n in range(args.titles)]
+        self.weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(args.titles)))
+        self.commands, self.command_weights = zip(*args.mix.items())
+        self.users = args.users
+
+    def title(self):
+        return self.rng.choices(self.titles, cum_weights=self.weights)[0]
+
+    def next(self):
+        '''(user id, command name, argument string) of the next invocation.'''
+        command = self.rng.choices(self.commands, self.command_weights)[0]
+        user = self.rng.randint(1, self.users)
+        if command == "compare":
+            argument = " | ".join(self.title() for _ in range(self.rng.randint(2, 4)))
+        elif command == "wish":
+            argument = ", ".join(self.title() for _ in range(self.rng.randint(1, 3)))
+        elif command == "alert":
+            argument = f"{self.title()}, {self.rng.choice(('9.99', '50%', ''))}".rstrip(", ")
+        elif command == "wishlist":
+            argument = ""
+        else:
+            argument = self.title()
+        return user, command, argument
+
+class Discord:
+    '''The Discord side of the bot: messages with unique ids, and sends that take a round trip.'''
+    def __init__(self, latency):
+        self.latency = latency
+        self.ids = itertools.count(10**17)
+        self.sends = 0
+        self.channel = SimpleNamespace(id=1, send=self.send)
+
+    async def send(self, content=None, *, embed=None, view=None, **kwargs):
+        self.sends += 1
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(id=next(self.ids), content=content, embed=embed)
+
+    def message(self, user, content):
+        author = SimpleNamespace(id=user, name=f"user{user}", bot=False, mention=f"<@{user}>",
+                                 guild_permissions=SimpleNamespace(administrator=False))
+        return SimpleNamespace(id=next(self.ids), content=content, author=author, channel=self.channel,
+                               guild=None, attachments=[], _state=None)
+
+def context_class(discord_side):
+    from discord.ext import commands
+    from discord.ext.commands.view import StringView
+
+    class LoadContext(commands.Context):
+        '''A prefix-command context whose replies go to the fake Discord and are kept for inspection.'''
+        @classmethod
+        def parse(cls, bot, message):
+            # What bot.get_context does for a "!" message, minus the check against the logged-in user
+            view = StringView(message.content)
+            view.skip_string("!")
+            invoked_with = view.get_word()
+            return cls(prefix="!", view=view, bot=bot, message=message, invoked_with=invoked_with,
+                       command=bot.all_commands.get(invoked_with))
+
+        async def send(self, content=None, **kwargs):
+            message = await discord_side.send(content, **kwargs)
+            self.replies = getattr(self, "replies", []) + [message]
+            return message
+
+        async def reply(self, content=None, **kwargs):
+            return await self.send(content, **kwargs)
+
+    return LoadContext
+
+async def measure_lag(samples, interval, stop):
+    '''Append how late each interval-second sleep wakes up until stop is set.'''
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+async def run_load(args, bot, cog, discord_side):
+    context = context_class(discord_side)
+    # Separate streams, so that the arrivals and commands of a seed don't depend on how the run went
+    workload = Workload(args, seed=args.seed)
+    arrivals, rng = random.Random(args.seed), random.Random(args.seed + 1)
+    latencies, errors, lag = {}, {}, []
+    reactions = 0
+    in_flight = peak = 0
+
+    async def react(user, message):
+        nonlocal reactions
+        await asyncio.sleep(rng.expovariate(1 / args.react_delay))
+        payload = SimpleNamespace(message_id=message.id, user_id=user, emoji="👀", channel_id=discord_side.channel.id)
+        start = time.perf_counter()
+        try:
+            await cog.on_raw_reaction_add(payload)
+        except Exception:
+            errors["reaction"] = errors.get("reaction", 0) + 1
+            return
+        latencies.setdefault("reaction", []).append(time.perf_counter() - start)
+        reactions += 1
+
+    async def invoke(user, command, argument):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        start = time.perf_counter()
+        ctx = context.parse(bot, discord_side.message(user, f"!{command} {argument}".rstrip()))
+        try:
+            await bot.invoke(ctx)
+        finally:
+            in_flight -= 1
+        if ctx.command_failed:
+            errors[command] = errors.get(command, 0) + 1
+            return
+        latencies.setdefault(command, []).append(time.perf_counter() - start)
+        replies = getattr(ctx, "replies", [])
+        if command == "itad" and replies and replies[-1].embed and "React with" in (replies[-1].embed.description or ""):
+            if rng.random() < args.react:
+                await react(user, replies[-1])
+
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_lag(lag, args.lag_interval, stop))
+    tasks = []
+    started = time.perf_counter()
+    deadline = started + args.duration
+    next_arrival = started
+    while True:
+        next_arrival += arrivals.expovariate(args.rate)
+        if next_arrival >= deadline:
+            break
+        await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+        tasks.append(asyncio.create_task(invoke(*workload.next())))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    commands = len(tasks)
+    summary = {
+        "commands": commands,
+        "seconds": round(elapsed, 1),
+        "offered_per_s": args.rate,
+        "completed_per_s": round(sum(map(len, latencies.values())) / elapsed, 1),
+        "errors": sum(errors.values()),
+        "peak_in_flight": peak,
+        "reactions": reactions,
+        "discord_sends": discord_side.sends,
+    }
+    per_command = [{"command": name, "count": len(samples), "errors": errors.get(name, 0), **latency_summary(samples)}
+                   for name, samples in sorted(latencies.items(), key=lambda item: -len(item[1]))]
+    per_command += [{"command": name, "count": 0, "errors": count, **latency_summary([])}
+                    for name, count in errors.items() if name not in latencies]
+    return summary, per_command, {"ticks": len(lag), **latency_summary(lag)}
+
+def upstream_rows(fake, cog):
+    '''Requests per upstream endpoint, from the bot's own demure_request_seconds histograms.'''
+    from metrics import metrics
+    rows = []
+    for labels, count, p50, p95, total in metrics.summary("demure_request_seconds"):
+        rows.append({
+            "upstream": labels["upstream"],
+            "method": labels["method"],
+            "endpoint": labels["endpoint"],
+            "requests": count,
+            "errors": metrics.counter("demure_request_errors_total", **labels),
+            "p50_ms~": round(p50 * 1000, 1),
+            "p95_ms~": round(p95 * 1000, 1),
+        })
+    itad_side = {
+        "lookups": fake.count("/games/lookup/v1"),
+        "price_calls": fake.count("/games/prices/"),
+        "price_ids": sum(len(body) for path, body in fake.calls if path == "/games/prices/"),
+        "injected_errors": fake.errors,
+        "rejected": fake.rejected,
+        **cog.itad_client.stats(),
+    }
+    return rows, itad_side
+
+def compare(rows, baseline, name, columns):
+    '''rows with a "<column> Δ%" next to each column, against the baseline row of the same name(row).'''
+    previous = {name(row): row for row in baseline}
+    compared = []
+    for row in rows:
+        before = previous.get(name(row), {})
+        out = {"": name(row)}
+        for column in columns:
+            out[column] = row[column]
+            old = before.get(column)
+            out[f"{column} Δ%"] = f"{(row[column] - old) / old * 100:+.1f}" if old else "-"
+        compared.append(out)
+    return compared
+
+async def main_async(args, port):
+    from fake_itad import FakeITAD
+    from bot import bot
+    from itad import IsThereAnyDeal
+
+    fake = FakeITAD(make_catalog(args.titles), latency=args.itad_latency, error_rate=args.itad_error_rate, seed=args.seed)
+    url = await fake.start()
+    discord_side = Discord(args.discord_latency)
+    bot.get_channel = lambda channel_id: discord_side.channel
+    cog = IsThereAnyDeal(bot)
+    cog.BASE_URL = url
+    cog.BACKEND_URL = f"http://127.0.0.1:{port}/api/wishlist/"
+    cog.GAMES_URL = f"http://127.0.0.1:{port}/api/games/"
+    await bot.add_cog(cog)
+    # The daily sale notifier waits for a gateway connection that never comes; alert_eval.py covers it
+    cog.notify_sales.cancel()
+    try:
+        # Let the title index finish seeding from the backend, like a bot that has been up for a while
+        while cog.seed_titles.is_running():
+            await asyncio.sleep(0.05)
+        results = await run_load(args, bot, cog, discord_side)
+        return (*results, *upstream_rows(fake, cog))
+    finally:
+        await bot.remove_cog(cog.qualified_name)
+        await fake.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=20.0, help="command invocations per second")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--mix", type=parse_mix, default=MIX, help="command weights, e.g. itad=50,wishlist=30,wish=20")
+    parser.add_argument("--react", type=float, default=0.3, help="fraction of !itad prompts reacted to")
+    parser.add_argument("--react-delay", type=float, default=1.0, help="mean seconds before reacting")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--titles", type=int, default=2000)
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="seconds per reply sent to Discord")
+    parser.add_argument("--itad-latency", type=float, default=0.1)
+    parser.add_argument("--itad-error-rate", type=float, default=0.0, help="fraction of ITAD requests answered with 503")
+    parser.add_argument("--itad-rate", type=float, default=1000.0, help="client-side ITAD requests per second")
+    parser.add_argument("--server", choices=["runserver", "gunicorn"], default="runserver")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--postgres", action="store_true", help="use the configured Postgres database")
+    parser.add_argument("--lag-interval", type=float, default=0.01, help="event-loop lag probe period in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log", action="store_true", help="keep the bot's INFO logging (one line per command)")
+    parser.add_argument("--json", help="save the results to this file")
+    parser.add_argument("--baseline", help="compare with results saved by an earlier --json run")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="backend.settings")
+    env.setdefault("SECRET_KEY", "benchmark")
+    if not args.postgres:
+        env["SQLITE_PATH"] = os.path.join(tmp.name, "bench.sqlite3")
+    manage(env, "migrate", "-v", "0")
+    token = manage(env, "shell", "-c", SEED.replace("__USERS__", str(args.users)).replace("__GAMES__", str(args.titles))).strip().splitlines()[-1]
+
+    port = free_port()
+    if args.server == "gunicorn":
+        command = ["gunicorn", "backend.wsgi:application", "--workers", str(args.workers), "--threads", "8",
+                   "--bind", f"127.0.0.1:{port}"]
+    else:
+        command = [sys.executable, "manage.py", "runserver", f"127.0.0.1:{port}", "--noreload"]
+    server = subprocess.Popen(command, cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    # utils reads these at import time, so they are set before bot.py and itad.py are imported
+    os.environ.update({
+        "DB_TOKEN": token,
+        "PREFIX_COMMANDS": "1",
+        "SHARDED": "0",
+        "STATE_URL": "",
+        "METRICS_PORT": "0",
+        "ITAD_RATE": str(args.itad_rate),
+        "ITAD_BURST": str(max(10, int(args.itad_rate))),
+        "LOG_FILE": os.path.join(tmp.name, "runtime.log"),
+        "SNAPSHOT_PATH": os.path.join(tmp.name, "snapshot.json.gz"),
+        "TITLE_INDEX_PATH": os.path.join(tmp.name, "titles.idx"),
+    })
+    try:
+        asyncio.run(wait_for_port(port))
+        from utils import logger
+        if not args.log:
+            logger.setLevel(logging.WARNING)
+        summary, per_command, lag, upstream, itad_side = asyncio.run(main_async(args, port))
+    finally:
+        server.terminate()
+        server.wait()
+        tmp.cleanup()
+
+    title = f"{args.rate:g}/s for {args.duration:g}s, {args.users} users, {args.titles} titles, backend on {args.server} + {'postgres' if args.postgres else 'sqlite'}"
+    print_table(title, [summary])
+    print_table("Per command (ms, arrival to completion)", per_command)
+    print_table("Event-loop lag (ms)", [lag])
+    print_table("Upstream requests (~ bucket-interpolated)", upstream)
+    print_table(f"Fake ITAD (latency {args.itad_latency:g}s, error rate {args.itad_error_rate:g})", [itad_side])
+
+    results = {"args": {key: value for key, value in vars(args).items() if key not in ("json", "baseline")},
+               "summary": summary, "commands": per_command, "lag": lag, "upstream": upstream, "itad": itad_side}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        def run(row):
+            return "run"
+        def upstream_name(row):
+            return f"{row['upstream']} {row['method']} {row['endpoint']}"
+        print_table(f"Against {args.baseline}", compare([summary], [baseline["summary"]], run, ["completed_per_s", "errors"]))
+        print_table("Per command against baseline", compare(per_command, baseline["commands"], lambda row: row["command"],
+                                                            ["count", "p50", "p95", "p99"]))
+        print_table("Event-loop lag against baseline", compare([lag], [baseline["lag"]], run, ["p50", "p99", "max"]))
+        print_table("Upstream requests against baseline", compare(upstream, baseline["upstream"], upstream_name, ["requests"]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+'''Gateway load across shard processes, with and without the shared cache.
+
+Replays one stream of simulated gateway events against 1..N worker
+processes. Like the real gateway, each worker only receives the events of
+its own shards, at the stream's arrival times. Every event is
+zlib-decompressed and JSON-decoded. A --commands fraction are /itad
+interactions (titles Zipf-distributed like real traffic), which also run the
+cog's lookup + price path against one fake ITAD server. With the shared
+cache, the workers share a StateServer.
+
+Reports achieved throughput, event latency (arrival to handled, so it
+includes queueing behind a saturated event loop) and upstream ITAD calls per
+configuration.
+
+    python benchmarks/gateway_load.py --processes 1 2 4 --events 100000 --rate 40000
+'''
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import time
+import zlib
+from aiohttp import web
+from common import latency_summary, print_table
+
+def make_events(args, seed=0):
+    '''(guild_id, title or None) pairs: guild snowflakes spread over shards, popular titles asked about most.'''
+    rng = random.Random(seed)
+    titles = [f"Game {n}" for n in range(args.titles)]
+    weights = [1 / (rank + 1) for rank in range(args.titles)]
+    return [(rng.getrandbits(40) << 22, rng.choices(titles, weights)[0] if rng.random() < args.commands else None)
+            for _ in range(args.events)]
+
+def make_payload(guild_id, title, size, rng):
+    '''A compressed gateway payload of roughly size bytes: an /itad interaction, or other guild chatter.'''
+    member = {"user": {"id": str(rng.getrandbits(60)), "username": f"user{rng.getrandbits(20)}"},
+              "roles": [str(rng.getrandbits(60)) for _ in range(size // 40)]}
+    if title:
+        event = {"t": "INTERACTION_CREATE", "d": {"guild_id": str(guild_id), "type": 2, "member": member,
+                 "data": {"name": "itad", "options": [{"name": "name", "value": title}]}}}
+    else:
+        event = {"t": "MESSAGE_CREATE", "d": {"guild_id": str(guild_id), "member": member,
+                 "content": "".join(rng.choices("abcdefghij ", k=size // 4))}}
+    return zlib.compress(json.dumps({"op": 0, **event}).encode())
+
+async def worker_loop(shards, shard_count, url, state_url, args):
+    import itad
+    from itad import IsThereAnyDeal
+
+    class Bot:
+        shard_ids = shards
+    Bot.shard_count = shard_count
+
+    itad.state_url = state_url
+    cog = IsThereAnyDeal(Bot())
+    cog.BASE_URL = url
+    await cog.open_sessions()
+    cog.itad_client.bucket.rate = cog.itad_client.bucket.capacity = 100_000
+
+    # The gateway only delivers a shard's own guilds to the process running it
+    rng = random.Random(hash(tuple(shards)))
+    interval = 1 / args.rate
+    events = [(n * interval, make_payload(guild_id, title, args.payload, rng))
+              for n, (guild_id, title) in enumerate(make_events(args)) if (guild_id >> 22) % shard_count in shards]
+    latencies = []
+    tasks = []
+
+    async def command(arrival, title):
+        game = await cog.get_game_by_name(title)
+        if game and game.get("found"):
+            await cog.get_prices_batch([game["game"]["id"]])
+        latencies.append(time.perf_counter() - arrival)
+
+    start = time.perf_counter()
+    for offset, raw in events:
+        arrival = start + offset
+        if arrival > time.perf_counter():
+            await asyncio.sleep(arrival - time.perf_counter())
+        event = json.loads(zlib.decompress(raw))
+        if event["t"] == "INTERACTION_CREATE":
+            tasks.append(asyncio.create_task(command(arrival, event["d"]["data"]["options"][0]["value"])))
+        else:
+            latencies.append(time.perf_counter() - arrival)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    await cog.close_sessions()
+    shared_hits = cog.lookup_cache.shared_hits + cog.price_cache.shared_hits
+    return {"events": len(events), "elapsed": elapsed, "latencies": latencies, "shared_hits": shared_hits}
+
+def worker(shards, shard_count, url, state_url, args, results):
+    results.put(asyncio.run(worker_loop(shards, shard_count, url, state_url, args)))
+
+async def run_config(processes, shared, args):
+    from cluster import shard_blocks
+    from fake_itad import FakeITAD
+    from state import StateServer
+
+    fake = FakeITAD({f"Game {n}": {"id": f"id-{n}", "price": 5.0, "regular": 10.0, "shop": "GOG"}
+                     for n in range(args.titles)}, latency=args.latency)
+    url = await fake.start()
+    state_url, runner = "", None
+    if shared:
+        runner = web.AppRunner(StateServer().app())
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        state_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [context.Process(target=worker, args=(block, args.shards, url, state_url, args, results))
+               for block in shard_blocks(args.shards, processes)]
+    for process in workers:
+        process.start()
+    outputs = [await asyncio.to_thread(results.get) for _ in workers]
+    for process in workers:
+        await asyncio.to_thread(process.join)
+
+    await fake.close()
+    if runner:
+        await runner.cleanup()
+
+    events = sum(output["events"] for output in outputs)
+    return {
+        "processes": processes,
+        "shared_cache": shared,
+        "events_per_s": round(events / max(output["elapsed"] for output in outputs)),
+        **latency_summary([latency for output in outputs for latency in output["latencies"]]),
+        "itad_lookups": fake.count("/games/lookup/v1"),
+        "itad_prices": fake.count("/games/prices/"),
+        "shared_hits": sum(output["shared_hits"] for output in outputs),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--rate", type=float, default=40_000, help="offered gateway events per second, all shards")
+    parser.add_argument("--commands", type=float, default=0.02, help="fraction of events that are /itad commands")
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--titles", type=int, default=2000)
+    parser.add_argument("--payload", type=int, default=2048, help="approximate decoded payload size in bytes")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake ITAD response latency in seconds")
+    args = parser.parse_args()
+
+    rows = []
+    for processes in args.processes:
+        for shared in (False, True):
+            rows.append(asyncio.run(run_config(processes, shared, args)))
+    print_table(f"{args.events} events at {args.rate:.0f}/s over {args.shards} shards, "
+                f"{args.commands:.0%} commands (latency in ms)", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+'''Event-loop stall caused by logging: handlers on the loop vs behind a QueueListener.
+
+Runs --tasks coroutines that each log --records lines, next to a ticker that
+sleeps 1ms and records how late it wakes up (event-loop lag). The "direct"
+setup attaches a StreamHandler and a FileHandler to the logger, as utils.py
+used to. The "queue" setup attaches the same handlers through
+utils.queue_logging. --slow-io adds a delay to every write, to mimic a busy
+disk or a blocked console pipe.
+
+    python benchmarks/logging_stall.py --records 2000 --tasks 10 --slow-io 0 0.2
+'''
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from common import latency_summary, print_table
+from utils import queue_logging
+
+class SlowStream:
+    '''File-like wrapper that sleeps before every write.'''
+    def __init__(self, stream, delay):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, text):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+def make_handlers(path, delay):
+    formatter = logging.Formatter('%(asctime)s:%(levelname)s:%(name)s: %(message)s')
+    console = logging.StreamHandler(SlowStream(open(os.devnull, "w"), delay))
+    file = logging.FileHandler(path)
+    file.stream = SlowStream(file.stream, delay)
+    for handler in (console, file):
+        handler.setFormatter(formatter)
+    return [console, file]
+
+async def workload(logger, tasks, records):
+    lags, calls = [], []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    async def chatty(task):
+        for n in range(records):
+            start = time.perf_counter()
+            logger.info(f"task {task} handled event {n}", extra={"command": "itad", "user": task})
+            calls.append(time.perf_counter() - start)
+            await asyncio.sleep(0)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(chatty(task) for task in range(tasks)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    return elapsed, lags, calls
+
+def run(mode, delay, args, directory):
+    logger = logging.getLogger(f"bench.{mode}.{delay}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handlers = make_handlers(os.path.join(directory, f"{mode}-{delay}.log"), delay / 1000)
+    listener = None
+    if mode == "queue":
+        listener = queue_logging(logger, handlers)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+
+    elapsed, lags, calls = asyncio.run(workload(logger, args.tasks, args.records))
+    drain = time.perf_counter()
+    if listener:
+        listener.stop()
+    drain = time.perf_counter() - drain
+    for handler in handlers:
+        handler.close()
+
+    lag = latency_summary(lags)
+    return {
+        "setup": mode,
+        "io_delay_ms": delay,
+        "records_per_s": round(args.tasks * args.records / elapsed),
+        "on_loop_ms_per_record": round(sum(calls) / len(calls) * 1000, 4),
+        "lag_p50": lag["p50"],
+        "lag_p99": lag["p99"],
+        "lag_max": lag["max"],
+        "drain_s": round(drain, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=2000, help="records logged per task")
+    parser.add_argument("--tasks", type=int, default=10)
+    parser.add_argument("--slow-io", type=float, nargs="+", default=[0.0, 0.2], help="delay per write in ms")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for delay in args.slow_io:
+            for mode in ("direct", "queue"):
+                rows.append(run(mode, delay, args, directory))
+    print_table(f"{args.tasks} tasks x {args.records} records (lag in ms, drain = time to flush the queue at exit)", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+'''Reaction dispatch cost: one wait_for check per prompt vs the ReactionRegistry.
+
+The old flow registered a wait_for('reaction_add') per !itad result, so every
+reaction in every guild ran every pending check. This replays the same
+stream of reaction events against both strategies with thousands of pending
+prompts and reports per-event dispatch cost.
+
+    python benchmarks/reactions.py --pending 1000 5000 20000 --events 50000
+'''
+import argparse
+import random
+import time
+from common import print_table
+from reactions import ReactionRegistry
+
+class Event:
+    __slots__ = ("message_id", "user_id", "emoji")
+
+    def __init__(self, message_id, user_id, emoji):
+        self.message_id = message_id
+        self.user_id = user_id
+        self.emoji = emoji
+
+def make_events(pending, count, hit_rate):
+    '''Mostly unrelated reactions, with hit_rate of them claiming a pending prompt.'''
+    events = []
+    for _ in range(count):
+        if random.random() < hit_rate:
+            message_id = random.randrange(pending)
+            events.append(Event(message_id, message_id, '👀'))
+        else:
+            events.append(Event(10**9 + random.randrange(10**6), random.randrange(10**6), '👍'))
+    return events
+
+def wait_for_checks(pending, events):
+    '''Mimics discord.py's listener list: each event runs every pending check until one matches.'''
+    listeners = []
+    for message_id in range(pending):
+        def check(event, message_id=message_id):
+            return event.user_id == message_id and event.emoji == '👀' and event.message_id == message_id
+        listeners.append(check)
+
+    start = time.perf_counter()
+    claimed = 0
+    for event in events:
+        for index, check in enumerate(listeners):
+            if check(event):
+                del listeners[index]
+                claimed += 1
+                break
+    return time.perf_counter() - start, claimed
+
+def registry_dispatch(pending, events):
+    registry = ReactionRegistry(timeout=60.0)
+    for message_id in range(pending):
+        registry.register(message_id, message_id, '👀', (0, f"Game {message_id}"))
+
+    start = time.perf_counter()
+    claimed = 0
+    for event in events:
+        if registry.pop(event.message_id, event.user_id, event.emoji) is not None:
+            claimed += 1
+    registry.expire()
+    return time.perf_counter() - start, claimed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pending", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--hit-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    random.seed(0)
+    rows = []
+    for pending in args.pending:
+        events = make_events(pending, args.events, args.hit_rate)
+        for name, strategy in (("wait_for", wait_for_checks), ("registry", registry_dispatch)):
+            elapsed, claimed = strategy(pending, events)
+            rows.append({
+                "strategy": name,
+                "pending": pending,
+                "events": len(events),
+                "claimed": claimed,
+                "us/event": round(elapsed / len(events) * 1e6, 3),
+                "events/s": round(len(events) / elapsed),
+            })
+
+    print_table("Reaction dispatch", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+'''Build, load and query cost of the local title index over a synthetic catalog.
+
+Generates --titles game-like names, builds a TitleIndex, round-trips it
+through its on-disk format, and times exact, prefix/autocomplete and
+typo queries. Memory is the tracemalloc peak of a separate build.
+
+    python benchmarks/title_index.py --titles 100000 --queries 2000
+'''
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from common import percentile, print_table
+from titles import TitleIndex
+
+WORDS = ("dark", "souls", "elden", "ring", "hollow", "knight", "dead", "cells", "star", "wars", "legend",
+         "dragon", "quest", "final", "fantasy", "witcher", "wild", "hunt", "city", "skylines", "stardew",
+         "valley", "portal", "half", "life", "hades", "celeste", "terraria", "factorio", "rim", "world",
+         "mass", "effect", "age", "empires", "civilization", "doom", "eternal", "blood", "borne", "sekiro",
+         "shadow", "tomb", "raider", "crusader", "kings", "europa", "universalis", "total", "war", "space")
+
+def make_titles(count, seed=0):
+    '''Titles drawn from common game words plus a few thousand made-up ones, like a real catalog's long tail.'''
+    rng = random.Random(seed)
+    syllables = ["ka", "to", "ri", "ne", "sha", "vo", "lin", "dar", "mor", "eth", "qua", "zin", "bel", "gor", "ul"]
+    vocabulary = list(WORDS) + ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(5000)]
+    titles = set()
+    while len(titles) < count:
+        name = " ".join(rng.choice(WORDS if rng.random() < 0.4 else vocabulary).title()
+                        for _ in range(rng.randint(2, 4)))
+        if rng.random() < 0.3:
+            name += f" {rng.randint(2, 9)}"
+        if rng.random() < 0.2:
+            name += f": {rng.choice(WORDS).title()} Edition"
+        titles.add(name)
+    return sorted(titles)
+
+def typo(title, rng):
+    chars = list(title)
+    index = rng.randrange(len(chars))
+    op = rng.random()
+    if op < 0.33:
+        del chars[index]
+    elif op < 0.66:
+        chars.insert(index, rng.choice("abcdefghijklmnopqrstuvwxyz"))
+    else:
+        chars[index] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(chars)
+
+def timed(queries, func):
+    '''Latency percentiles in microseconds.'''
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        latencies.append(time.perf_counter() - start)
+    return {f"p{pct}": round(percentile(latencies, pct) * 1e6, 1) for pct in (50, 95, 99)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    titles = make_titles(args.titles)
+    pairs = [(title, f"id-{n}") for n, title in enumerate(titles)]
+
+    start = time.perf_counter()
+    index = TitleIndex()
+    index.add_many(pairs)
+    build = time.perf_counter() - start
+
+    # Separate pass for memory, since tracing slows the build down
+    tracemalloc.start()
+    TitleIndex().add_many(pairs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "titles.idx")
+        start = time.perf_counter()
+        index.save(path)
+        save = time.perf_counter() - start
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        index = TitleIndex.load(path)
+        load = time.perf_counter() - start
+
+    print_table(f"{len(index)} titles", [{
+        "build_s": round(build, 2),
+        "save_s": round(save, 2),
+        "load_s": round(load, 2),
+        "file_mb": round(size / 1e6, 1),
+        "build_peak_mb": round(peak / 1e6, 1),
+    }])
+
+    rng = random.Random(1)
+    sample = rng.sample(titles, min(args.queries, len(titles)))
+    typos = [typo(title, rng) for title in sample]
+    prefixes = [title[:rng.randint(3, 8)] for title in sample]
+    found = sum(1 for query, title in zip(typos, sample) if any(t == title for _, t, _ in index.search(query, limit=3)))
+
+    rows = [
+        {"query": "exact", **timed(sample, index.exact)},
+        {"query": "autocomplete", **timed(prefixes, index.suggest)},
+        {"query": "typo search", **timed(typos, lambda q: index.search(q, limit=3))},
+    ]
+    print_table(f"Query latency (us), typo recall@3 = {found / len(sample):.1%}", rows)
+
+if __name__ == "__main__":
+    main()
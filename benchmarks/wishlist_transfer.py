@@ -0,0 +1,109 @@
+'''Streaming NDJSON export/import of wishlists vs serializing everything in one response.
+
+Generates --wishlists wishlists of --per-wishlist games each (1M wishlist
+game rows by default) drawn from --games titles. Then it times, each in a
+fresh process so that peak RSS is that phase's own:
+
+  import        manage.py wishlists import (batched bulk inserts)
+  export        manage.py wishlists export (iterator-backed stream)
+  in-memory     the pre-streaming way: every wishlist with nested games
+                through WishlistSerializer(many=True) and JSONRenderer
+
+Uses a throwaway SQLite file unless --postgres is given. On SQLite the
+import's RSS creeps up until the sqlite3 module's 128-statement cache is
+full, because every batch's IN list has a different length; the transfer
+code itself holds one batch.
+
+    python benchmarks/wishlist_transfer.py --wishlists 50000 --per-wishlist 20
+'''
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from common import BACKEND, print_table
+
+PHASE = '''
+import json, resource, time
+from django.core.management import call_command
+start = time.perf_counter()
+__BODY__
+print(json.dumps({"seconds": time.perf_counter() - start,
+                  "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+'''
+
+IN_MEMORY = '''
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from gamesdb.models import Wishlist
+from gamesdb.serializers import WishlistSerializer
+wishlists = Wishlist.objects.annotate(num_games=Count('games')).prefetch_related('games').order_by('userid')
+body = JSONRenderer().render(WishlistSerializer(wishlists, many=True).data)
+'''
+
+def write_export(path, args):
+    '''An export file in the transfer.py format, written line by line.'''
+    rng = random.Random(0)
+    titles = [f"Game {n}" for n in range(args.games)]
+    with open(path, "w") as out:
+        for title in titles:
+            out.write(json.dumps({"type": "game", "name": title, "title": title, "itad_id": None}) + "\n")
+        for userid in range(1, args.wishlists + 1):
+            games = [{"name": name} for name in rng.sample(titles, args.per_wishlist)]
+            if rng.random() < 0.3:
+                games[0]["target_price"] = "9.99"
+            out.write(json.dumps({"type": "wishlist", "userid": userid, "username": f"user{userid}", "games": games}) + "\n")
+
+def phase(env, body):
+    script = PHASE.replace("__BODY__", body)
+    output = subprocess.run([sys.executable, "manage.py", "shell", "-c", script], cwd=BACKEND, env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wishlists", type=int, default=50_000)
+    parser.add_argument("--per-wishlist", type=int, default=20)
+    parser.add_argument("--games", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--skip-in-memory", action="store_true", help="skip the single-response baseline")
+    parser.add_argument("--postgres", action="store_true", help="use the configured Postgres database")
+    args = parser.parse_args()
+
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="backend.settings")
+    env.setdefault("SECRET_KEY", "benchmark")
+    with tempfile.TemporaryDirectory() as tmp:
+        if not args.postgres:
+            env["SQLITE_PATH"] = os.path.join(tmp, "bench.sqlite3")
+        subprocess.run([sys.executable, "manage.py", "migrate", "-v", "0"], cwd=BACKEND, env=env, check=True)
+        source, target = os.path.join(tmp, "source.ndjson"), os.path.join(tmp, "export.ndjson")
+        write_export(source, args)
+
+        rows = args.wishlists * args.per_wishlist
+        phases = [
+            ("import", f"call_command('wishlists', 'import', {source!r}, batch_size={args.batch_size})"),
+            ("export", f"call_command('wishlists', 'export', {target!r}, chunk_size={args.chunk_size})"),
+        ]
+        if not args.skip_in_memory:
+            phases.append(("in-memory", IN_MEMORY))
+        results = []
+        for name, body in phases:
+            result = phase(env, body)
+            results.append({
+                "phase": name,
+                "rows": rows,
+                "seconds": round(result["seconds"], 1),
+                "rows_per_s": round(rows / result["seconds"]),
+                "peak_rss_mb": round(result["peak_rss_mb"]),
+            })
+        with open(target) as exported:
+            lines = sum(1 for _ in exported)
+        assert lines == args.games + args.wishlists, lines
+
+    print_table(f"{rows} wishlist games ({args.wishlists} wishlists x {args.per_wishlist}, {args.games} titles)", results)
+
+if __name__ == "__main__":
+    main()
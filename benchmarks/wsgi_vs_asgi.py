@@ -0,0 +1,144 @@
+'''Compare the DRF wishlist API under WSGI with the async views under ASGI.
+
+Runs gunicorn (sync DRF views) and uvicorn (async views) against the same
+database, reseeded before each server so both see the same rows, drives both
+with a few hundred concurrent aiohttp clients doing a mix of reads, adds and
+removes, and reports throughput and latency.
+
+Uses a throwaway SQLite file unless --postgres is given, in which case the
+database from backend/backend/settings.py is used. Needs gunicorn and uvicorn.
+
+    python benchmarks/wsgi_vs_asgi.py --clients 300 --duration 20
+'''
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import aiohttp
+from common import BACKEND, latency_summary, print_table
+
+SEED = '''
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+from gamesdb.models import Game, Wishlist, game_key
+user, _ = User.objects.get_or_create(username="bench")
+token, _ = Token.objects.get_or_create(user=user)
+games = Game.objects.bulk_create([Game(name=f"Game {n}", title=f"Game {n}", key=game_key(f"Game {n}")) for n in range(__GAMES__)], ignore_conflicts=True)
+wishlists = Wishlist.objects.bulk_create([Wishlist(userid=n, username=f"user{n}") for n in range(1, __USERS__ + 1)], ignore_conflicts=True)
+through = Wishlist.games.through
+through.objects.bulk_create([through(wishlist_id=w.userid, game_id=f"Game {(w.userid + k) % __GAMES__}") for w in wishlists for k in range(20)], ignore_conflicts=True)
+print(token.key)
+'''
+
+# Undo the previous run's adds and removes so each server starts from the same rows
+RESET = '''
+from django.core.cache import cache
+from gamesdb.models import Game, Wishlist
+Wishlist.games.through.objects.all().delete()
+Game.objects.filter(name__startswith="Bench ").delete()
+cache.clear()
+'''
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def manage(env, *args):
+    return subprocess.run([sys.executable, "manage.py", *args], cwd=BACKEND, env=env,
+                          check=True, capture_output=True, text=True).stdout
+
+async def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start.")
+
+async def load(base_url, token, clients, duration, users):
+    latencies, errors = [], 0
+    headers = {"Authorization": f"Token {token}"}
+    deadline = time.monotonic() + duration
+
+    async def client(session):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            userid = random.randint(1, users)
+            roll = random.random()
+            if roll < 0.8:
+                method, url, body = "GET", f"{base_url}{userid}/", None
+            elif roll < 0.9:
+                method, url, body = "POST", f"{base_url}{userid}/add_game/", {"name": f"Bench {random.randint(0, 50)}"}
+            else:
+                method, url, body = "DELETE", f"{base_url}{userid}/remove_game/", {"name": f"Bench {random.randint(0, 50)}"}
+            start = time.perf_counter()
+            try:
+                async with session.request(method, url, json=body) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+        started = time.monotonic()
+        await asyncio.gather(*(client(session) for _ in range(clients)))
+        elapsed = time.monotonic() - started
+    return {"requests": len(latencies), "errors": errors, "rps": round(len(latencies) / elapsed, 1), **latency_summary(latencies)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--postgres", action="store_true", help="use the configured Postgres database")
+    args = parser.parse_args()
+
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="backend.settings")
+    env.setdefault("SECRET_KEY", "benchmark")
+    tmp = tempfile.TemporaryDirectory()
+    if not args.postgres:
+        env["SQLITE_PATH"] = os.path.join(tmp.name, "bench.sqlite3")
+
+    manage(env, "migrate", "-v", "0")
+    seed = SEED.replace("__USERS__", str(args.users)).replace("__GAMES__", str(args.games))
+
+    servers = [
+        ("wsgi (DRF)", ["gunicorn", "backend.wsgi:application", "--workers", str(args.workers), "--threads", "8"], "/api/wishlist/"),
+        ("asgi (async)", ["uvicorn", "backend.asgi:application", "--workers", str(args.workers), "--log-level", "warning"], "/api/async/wishlist/"),
+    ]
+    rows = []
+    for name, command, path in servers:
+        manage(env, "shell", "-c", RESET)
+        token = manage(env, "shell", "-c", seed).strip().splitlines()[-1]
+        port = free_port()
+        bind = ["--bind", f"127.0.0.1:{port}"] if command[0] == "gunicorn" else ["--host", "127.0.0.1", "--port", str(port)]
+        server = subprocess.Popen(command + bind, cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            asyncio.run(wait_for_port(port))
+            result = asyncio.run(load(f"http://127.0.0.1:{port}{path}", token, args.clients, args.duration, args.users))
+        finally:
+            server.terminate()
+            server.wait()
+        rows.append({"server": name, **result})
+
+    print_table(f"{args.clients} clients, {args.duration:g}s, {args.workers} workers", rows)
+    tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,96 @@
+import asyncio
+import signal
+import time
 import discord
 from discord.ext import commands
-from utils import logger, bot_token
+from utils import logger, bot_token, prefix_commands, sharded, shard_count, shard_ids, metrics_port
+from metrics import metrics, start_metrics_server
 
 # SETUP INTENTS
+# Without prefix commands the bot never reads messages, so it doesn't subscribe to them at all;
+# every command, the admin ones included, is also a slash command
 intents = discord.Intents.default()
-intents.message_content = True
+intents.message_content = prefix_commands
+intents.messages = prefix_commands
 
 # SETUP BOT
-bot = commands.Bot(command_prefix='!',intents=intents, help_command=commands.DefaultHelpCommand(
+# A sharded process runs SHARD_IDS out of SHARD_COUNT shards (all of them if unset) on one event loop
+if sharded:
+    bot_class, shard_options = commands.AutoShardedBot, {"shard_count": shard_count, "shard_ids": shard_ids}
+else:
+    bot_class, shard_options = commands.Bot, {}
+bot = bot_class(command_prefix='!' if prefix_commands else commands.when_mentioned, intents=intents, **shard_options,
+                help_command=commands.DefaultHelpCommand(
     sort_commands = True,
     show_parameter_descriptions = False,
 ))
 
 # BOT EVENTS
 @bot.event
-async def on_ready():
-    logger.info(f"Logged in as {bot.user}")
+async def setup_hook():
     from itad import IsThereAnyDeal
     await bot.add_cog(IsThereAnyDeal(bot))
     logger.info(f"Registered ITAD cog to bot.")
+    if metrics_port:
+        await start_metrics_server(metrics_port)
+        logger.info(f"Serving metrics on http://127.0.0.1:{metrics_port}/metrics")
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            bot.loop.add_signal_handler(signum, lambda name=signum.name: asyncio.create_task(graceful_shutdown(name)))
+        except NotImplementedError:  # Windows event loops
+            pass
+    # Commands are global, so only one process of a cluster needs to sync them
+    if not shard_ids or 0 in shard_ids:
+        synced = await bot.tree.sync()
+        logger.info(f"Synced {len(synced)} slash commands.")
+
+@bot.event
+async def on_ready():
+    logger.info(f"Logged in as {bot.user}" + (f" on shards {sorted(bot.shards)} of {bot.shard_count}" if sharded else ""))
 
 @bot.event
 async def on_message(message):
-    if message.author == bot.user:
+    if not prefix_commands or message.author == bot.user:
         return
     await bot.process_commands(message)
     
+# COMMAND METRICS AND LOGGING
+@bot.before_invoke
+async def start_timer(ctx):
+    ctx.started = time.perf_counter()
+
+@bot.after_invoke
+async def log_command(ctx):
+    # Runs whether or not the command raised
+    elapsed = time.perf_counter() - ctx.started
+    metrics.observe("demure_command_seconds", elapsed, command=ctx.command.qualified_name)
+    if ctx.command_failed:
+        metrics.inc("demure_command_errors_total", command=ctx.command.qualified_name)
+    latency_ms = round(elapsed * 1000, 1)
+    logger.info(f"{ctx.command.qualified_name} by {ctx.author.id} took {latency_ms}ms", extra={
+        "command": ctx.command.qualified_name, "user": ctx.author.id,
+        "guild": ctx.guild.id if ctx.guild else None, "latency_ms": latency_ms,
+    })
+
 # PEACEFUL SHUTDOWN
-@bot.command(hidden=True)
+async def graceful_shutdown(reason):
+    '''Close the bot; closing unloads the cogs, and the ITAD cog saves its state to disk as it unloads.'''
+    if bot.is_closed():
+        return
+    logger.info(f"Bot shutting down from {reason}.")
+    await bot.close()
+
+@bot.hybrid_command(hidden=True)
+@commands.guild_only()
+@discord.app_commands.default_permissions(administrator=True)
 async def shutdown(ctx):
     '''Shuts down bot after saving data to disc (admin only command)'''
     if not ctx.author.guild_permissions.administrator:
         return
-    logger.info(f"Bot shutting down from shutdown command.")
-    itad_cog = bot.get_cog("IsThereAnyDeal")
-    itad_cog.save()
-    await bot.close()
+    if ctx.interaction:
+        # The interaction has to be answered before the connection closes
+        await ctx.send("Shutting down.", ephemeral=True)
+    await graceful_shutdown("shutdown command")
 
 # COMMAND NOT FOUND ERRORS
 @bot.event
@@ -46,4 +101,6 @@ async def on_command_error(ctx, error):
     raise error
 
 # RUN BOT
-bot.run(bot_token)
\ No newline at end of file
+# Importing the module (e.g. from benchmarks) sets up the bot without connecting
+if __name__ == "__main__":
+    bot.run(bot_token)
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+class AsyncTTLCache:
+    '''Bounded LRU cache with per-entry TTL and single-flight loading.
+
+    Concurrent misses for the same key share one in-flight fetch. Fetches that
+    return None are treated as failures and are not cached. With a shared
+    state backend set, local misses are looked up there before fetching and
+    fetched values are written back, so other processes can reuse them.
+    '''
+    def __init__(self, name, ttl, maxsize, shared=None):
+        self.name = name
+        self.shared = shared
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_hits = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        '''Return a fresh cached value or None.'''
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl=None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def dump(self):
+        '''[key, wall-clock expiry, value] for every fresh entry, least recently used first.'''
+        now, wall = time.monotonic(), time.time()
+        return [[key, wall + expires - now, value] for key, (expires, value) in self._data.items() if expires > now]
+
+    def restore(self, entries):
+        '''Load entries written by dump(), skipping any that expired in the meantime.'''
+        wall = time.time()
+        for key, expires, value in entries:
+            if expires > wall:
+                self.set(key, value, expires - wall)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    async def get_or_fetch(self, key, fetch):
+        '''Return the cached value for key, calling fetch() once on a miss.'''
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, fetch))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+        # Shield so one cancelled caller doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _load(self, key, fetch):
+        try:
+            if self.shared:
+                found = await self.get_shared([key])
+                if key in found:
+                    return found[key]
+            value = await fetch()
+            if value is not None:
+                await self.set_many({key: value})
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def shared_key(self, key):
+        return f"{self.name}:{key}"
+
+    async def get_shared(self, keys):
+        '''Pull keys from the shared backend into the local cache. Returns {key: value} for those found.'''
+        stored = await self.shared.get_many([self.shared_key(key) for key in keys])
+        found = {key: stored[self.shared_key(key)] for key in keys if self.shared_key(key) in stored}
+        for key, value in found.items():
+            self.set(key, value)
+        self.shared_hits += len(found)
+        return found
+
+    async def get_many(self, keys):
+        '''{key: value} for every key cached locally or in the shared backend.'''
+        found = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+        # Shared hits count as local misses here, as they do in get_or_fetch
+        self.hits += len(found)
+        self.misses += len(missing)
+        if missing and self.shared:
+            found.update(await self.get_shared(missing))
+        return found
+
+    async def set_many(self, items):
+        '''Cache several values locally and in the shared backend.'''
+        for key, value in items.items():
+            self.set(key, value)
+        if self.shared and items:
+            await self.shared.set_many({self.shared_key(key): value for key, value in items.items()}, self.ttl)
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "shared_hits": self.shared_hits,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
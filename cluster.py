@@ -0,0 +1,82 @@
+'''Run the bot as several processes, each owning a contiguous block of shards.
+
+Every process is a sharded bot.py with its own event loop, so gateway events
+and command work spread over cores. With --state, a shared cache server
+(state.py) is started too and every process reuses the others' ITAD responses.
+
+    python cluster.py --clusters 4 --shards 16 --state
+'''
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import aiohttp
+from utils import logger, bot_token, metrics_port, log_file, snapshot_path, title_index_path
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def shard_blocks(shard_count, clusters):
+    '''Split range(shard_count) into `clusters` contiguous, nearly equal blocks.'''
+    size, extra = divmod(shard_count, clusters)
+    blocks, start = [], 0
+    for cluster in range(clusters):
+        end = start + size + (cluster < extra)
+        blocks.append(list(range(start, end)))
+        start = end
+    return [block for block in blocks if block]
+
+def process_path(path, shard):
+    '''path for the process whose block starts at shard: snapshot.json.gz -> snapshot-4.json.gz.'''
+    directory, name = os.path.split(path)
+    stem, dot, extension = name.partition(".")
+    return os.path.join(directory, f"{stem}-{shard}{dot}{extension}")
+
+async def recommended_shards():
+    '''Shard count Discord recommends for this bot token.'''
+    headers = {"Authorization": f"Bot {bot_token}"}
+    async with aiohttp.ClientSession(headers=headers) as session:
+        async with session.get("https://discord.com/api/v10/gateway/bot") as response:
+            response.raise_for_status()
+            return (await response.json())["shards"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clusters", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shards", type=int, help="total shard count (default: Discord's recommendation)")
+    parser.add_argument("--state", action="store_true", help="start a shared cache server for the cluster")
+    parser.add_argument("--state-port", type=int, default=8765)
+    args = parser.parse_args()
+
+    shard_count = args.shards or asyncio.run(recommended_shards())
+    env = dict(os.environ, SHARDED="1", SHARD_COUNT=str(shard_count))
+    processes = []
+    if args.state:
+        processes.append(subprocess.Popen([sys.executable, os.path.join(HERE, "state.py"), "--port", str(args.state_port)]))
+        env["STATE_URL"] = f"http://127.0.0.1:{args.state_port}"
+
+    for index, block in enumerate(shard_blocks(shard_count, args.clusters)):
+        logger.info(f"Starting cluster for shards {block[0]}-{block[-1]} of {shard_count}.")
+        cluster_env = dict(env, SHARD_IDS=",".join(map(str, block)))
+        # Every process saves its own caches and title index on shutdown, all at the same time,
+        # and rotates its own log: several processes rotating one file race and lose lines
+        cluster_env["SNAPSHOT_PATH"] = process_path(snapshot_path, block[0])
+        cluster_env["TITLE_INDEX_PATH"] = process_path(title_index_path, block[0])
+        cluster_env["LOG_FILE"] = process_path(log_file, block[0])
+        if metrics_port:
+            cluster_env["METRICS_PORT"] = str(metrics_port + index)
+        processes.append(subprocess.Popen([sys.executable, os.path.join(HERE, "bot.py")], env=cluster_env))
+
+    # Pass SIGTERM/SIGINT on to every process of the cluster
+    def stop(signum, frame):
+        for process in processes:
+            process.send_signal(signum)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for process in processes:
+        process.wait()
+
+if __name__ == "__main__":
+    main()
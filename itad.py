@@ -1,8 +1,88 @@
 from discord.ext import commands, tasks
+from discord import app_commands
 import discord
-import asyncio
 import aiohttp
-from utils import logger, itad_auth, db_token
+import asyncio
+import os
+from utils import logger, log_bad_response, itad_auth, db_token, normalize_title, split_names, NAME_SEPARATOR
+from utils import lookup_cache_ttl, lookup_cache_size, price_cache_ttl, price_cache_size
+from utils import price_batch_size, notify_send_concurrency, time
+from utils import itad_rate, itad_burst, itad_max_retries, itad_timeout, title_index_path
+from utils import state_url, snapshot_path
+from pool import create_session
+from itad_client import ITADClient
+from cache import AsyncTTLCache
+from notifier import SaleNotifier, best_deal
+from pages import PageView
+from titles import TitleIndex, normalize
+from reactions import ReactionRegistry
+from state import shared_state
+from snapshot import read_snapshot, write_snapshot
+from metrics import metrics, endpoint
+
+SHOPS_PER_PAGE = 10
+GAMES_PER_PAGE = 10
+
+def format_deal(deal):
+    '''One line summary of a /games/prices/ deal.'''
+    price = deal.get("price", {}).get("amount", "N/A")
+    text = f"${price} at {deal.get('shop', {}).get('name', 'Unknown')}"
+    if deal.get("cut"):
+        text += f" (-{deal['cut']}%)"
+    if "amount" in deal.get("storeLow", {}):
+        text += f" · shop low ${deal['storeLow']['amount']}"
+    return text
+
+def choices(names, prefix=""):
+    '''Autocomplete choices for names, prefixed with the already typed part of a comma separated list.'''
+    values = (prefix + name for name in names)
+    return [app_commands.Choice(name=value, value=value) for value in values if len(value) <= 100][:25]
+
+def parse_threshold(text):
+    '''(target price, minimum discount) from "9.99", "$9.99" or "50%"; (None, None) for no threshold, (False, False) if invalid.'''
+    text = (text or "").strip()
+    if not text:
+        return None, None
+    try:
+        if text.endswith("%"):
+            discount = int(text[:-1])
+            return (None, discount) if 1 <= discount <= 100 else (False, False)
+        target = float(text.lstrip("$"))
+        return (target, None) if 0 <= target < 1e8 else (False, False)
+    except ValueError:
+        return False, False
+
+def split_alert(text):
+    '''(game, threshold) from a prefix invocation's "Hades, 9.99"; threshold is None without a separating comma.'''
+    separators = list(NAME_SEPARATOR.finditer(text))
+    if not separators:
+        return text, None
+    last = separators[-1]
+    return text[:last.start()], text[last.end():]
+
+def format_wishlist_game(game, entry):
+    '''One wishlist line: the game, its current best price if known, and the user's alert threshold.'''
+    deal = best_deal(entry) if entry else None
+    line = f"**{game['title']}**" + (f" — {format_deal(deal)}" if deal else "")
+    if game.get("target_price") is not None:
+        line += f" · alert at ${game['target_price']}"
+    elif game.get("min_discount") is not None:
+        line += f" · alert at -{game['min_discount']}%"
+    return line
+
+def deal_embeds(title, entry):
+    '''Embeds listing every shop's deal for one game, SHOPS_PER_PAGE shops per embed.'''
+    deals = sorted(entry.get("deals", []), key=lambda deal: deal.get("price", {}).get("amount", float("inf")))
+    history_low = entry.get("historyLow", {}).get("all", {}).get("amount")
+    footer = f"Historical low: ${history_low}" if history_low is not None else None
+    embeds = []
+    for start in range(0, len(deals), SHOPS_PER_PAGE):
+        page = deals[start:start + SHOPS_PER_PAGE]
+        embed = discord.Embed(title=title, description="\n".join(format_deal(deal) for deal in page))
+        if footer:
+            embed.set_footer(text=footer)
+        embeds.append(embed)
+    return embeds
 
 class IsThereAnyDeal(commands.Cog):
     def __init__(self, bot):
@@ -10,149 +90,563 @@ class IsThereAnyDeal(commands.Cog):
         self.BASE_URL = "https://api.isthereanydeal.com"
         self.ERROR_MSG = "Service error. Try again later."
         self.BACKEND_URL = "http://127.0.0.1:8000/api/wishlist/"
+        self.GAMES_URL = "http://127.0.0.1:8000/api/games/"
         self.HEADER = {
             'Authorization': f'Token {db_token}'
         }
+        self.itad_session = None
+        self.backend_session = None
+        self.itad_stats = None
+        self.backend_stats = None
+        self.itad_client = None
+        self.state = None
+        self.lookup_cache = AsyncTTLCache("lookup", lookup_cache_ttl, lookup_cache_size)
+        self.price_cache = AsyncTTLCache("prices", price_cache_ttl, price_cache_size)
+        # (ETag, wishlist) per user; get_wishlist revalidates it on every use, so the TTL only bounds memory
+        self.wishlist_cache = AsyncTTLCache("wishlists", lookup_cache_ttl, lookup_cache_size)
+        self.reactions = ReactionRegistry(timeout=60.0)
+        self.titles = TitleIndex()
+        self.notifier = SaleNotifier(self, batch_size=price_batch_size, send_concurrency=notify_send_concurrency)
 
-    async def fetch(self, session, url, method='GET', **kwargs):
-        async with session.request(method, url, **kwargs) as response:
-            if response.status == 200:
-                return await response.json()
-            else:
-                logger.info(f"Bad Response: \n{await response.text()}")
-                return None
+    async def cog_load(self):
+        await self.open_sessions()
+        await self.load_snapshot()
+        await self.load_titles()
+        self.notify_sales.start()
+        self.expire_reactions.start()
+        metrics.collectors.append(self.collect_metrics)
 
-    @commands.command()
-    async def unwish(self, ctx, *, name: str = None):
-        if not name:
-            await ctx.send("```Usage: !unwish [game name]```")
+    async def cog_unload(self):
+        if self.collect_metrics in metrics.collectors:
+            metrics.collectors.remove(self.collect_metrics)
+        self.notify_sales.cancel()
+        self.expire_reactions.cancel()
+        self.seed_titles.cancel()
+        await self.save()
+        await self.close_sessions()
+
+    async def save(self):
+        '''Persist hot state (ITAD and wishlist caches, pending reactions, notifier cursor, title index) for a warm restart.'''
+        state = {
+            "caches": {cache.name: cache.dump() for cache in (self.lookup_cache, self.price_cache, self.wishlist_cache)},
+            "reactions": self.reactions.dump(),
+            "notifier": {"last_run": self.notifier.last_run},
+        }
+        try:
+            await asyncio.to_thread(write_snapshot, snapshot_path, state)
+            if self.titles.dirty:
+                await asyncio.to_thread(self.titles.save, title_index_path)
+        except OSError as e:
+            logger.info(f"Could not save state: {e}")
             return
-        
-        embed = await ctx.send(embed=discord.Embed(description=f"Removing {name} from your wishlist..."))
-        url = f"{self.BACKEND_URL}{ctx.author.id}/"
-        async with aiohttp.ClientSession(header=self.HEADER) as session:
-            wishlist = await self.fetch(session, url)
-            if not wishlist:
-                await embed.edit(embed=discord.Embed(description="Unexpected error retrieving your wishlist."))
+        counts = ", ".join(f"{len(entries)} {name}" for name, entries in state["caches"].items())
+        logger.info(f"Saved state to {snapshot_path}: {counts}, {len(state['reactions'])} pending reactions.")
+
+    async def load_snapshot(self):
+        '''Restore the state written by save(), so a restart doesn't re-fetch everything from ITAD.'''
+        state = await asyncio.to_thread(read_snapshot, snapshot_path)
+        if state is None:
+            return
+        for cache in (self.lookup_cache, self.price_cache, self.wishlist_cache):
+            cache.restore(state["caches"].get(cache.name, []))
+        self.reactions.restore(state["reactions"])
+        self.notifier.last_run = state["notifier"]["last_run"]
+        logger.info(f"Restored state from {snapshot_path}: {len(self.lookup_cache)} lookups, "
+                    f"{len(self.price_cache)} prices, {len(self.reactions)} pending reactions.")
+
+    async def load_titles(self):
+        '''Load the on-disk title index, then top it up from the backend's Game table in the background.'''
+        if os.path.exists(title_index_path):
+            try:
+                self.titles = await asyncio.to_thread(TitleIndex.load, title_index_path)
+                logger.info(f"Loaded {len(self.titles)} titles from {title_index_path}.")
+            except (OSError, ValueError) as e:
+                logger.info(f"Could not load title index: {e}")
+        self.seed_titles.start()
+
+    @tasks.loop(count=1)
+    async def seed_titles(self):
+        after = ""
+        while after is not None:
+            page = await self.fetch(self.backend_session, f"{self.GAMES_URL}titles/", params={"after": after})
+            if page is None:
                 return
-            
-            games = wishlist.get('games', [])
-            game_in_wishlist = next((game for game in games if game['name'] == name), None)
-            if not game_in_wishlist:
-                await embed.edit(embed=discord.Embed(description=f"{name} is not currently being tracked for you."))
+            self.titles.add_many((game["title"] or game["name"], game["itad_id"]) for game in page["games"])
+            after = page.get("next")
+        logger.info(f"Title index holds {len(self.titles)} titles.")
+
+    async def open_sessions(self):
+        '''Open one pooled session per upstream for the lifetime of the cog.'''
+        self.itad_session, self.itad_stats = create_session("itad")
+        self.backend_session, self.backend_stats = create_session("backend", headers=self.HEADER)
+        # ITAD responses are shared between shard processes when STATE_URL is set
+        self.state = shared_state(state_url)
+        self.lookup_cache.shared = self.price_cache.shared = self.state
+        self.itad_client = ITADClient(self.itad_session, self.BASE_URL, itad_auth, rate=itad_rate, burst=itad_burst,
+                               max_retries=itad_max_retries, timeout=itad_timeout)
+
+    async def close_sessions(self):
+        logger.info(f"Closing HTTP pools: {self.pool_stats()}")
+        for session in (self.itad_session, self.backend_session):
+            if session and not session.closed:
+                await session.close()
+        if self.state:
+            await self.state.close()
+
+    def pool_stats(self):
+        '''Connection reuse counters for each upstream pool.'''
+        pools = (self.itad_stats, self.backend_stats, getattr(self.state, "stats", None))
+        return {stats.name: stats.as_dict() for stats in pools if stats}
+
+    def cache_stats(self):
+        '''Hit/miss/eviction counters for each ITAD response cache.'''
+        return {cache.name: cache.stats() for cache in (self.lookup_cache, self.price_cache)}
+
+    def collect_metrics(self):
+        '''Cache counters as metric samples, read when metrics are rendered.'''
+        for cache in (self.lookup_cache, self.price_cache, self.wishlist_cache):
+            for result in ("hits", "misses", "coalesced", "shared_hits"):
+                yield "demure_cache_requests_total", "counter", {"cache": cache.name, "result": result}, getattr(cache, result)
+            yield "demure_cache_entries", "gauge", {"cache": cache.name}, len(cache)
+
+    @tasks.loop(time=time)
+    async def notify_sales(self):
+        '''Daily pass that DMs users about price changes on their wishlisted games.'''
+        await self.run_notifier()
+
+    @notify_sales.before_loop
+    async def before_notify_sales(self):
+        await self.bot.wait_until_ready()
+        if self.notifier.overdue():
+            logger.info("Missed a sale notification pass while offline, running it now.")
+            await self.run_notifier()
+
+    async def run_notifier(self):
+        try:
+            await self.notifier.run()
+        except Exception:
+            logger.exception("Sale notification pass failed.")
+
+    async def fetch(self, session, url, method='GET', **kwargs):
+        upstream = "itad" if session is self.itad_session else "backend"
+        labels = {"upstream": upstream, "method": method, "endpoint": endpoint(url)}
+        with metrics.timer("demure_request_seconds", **labels):
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    metrics.inc("demure_request_errors_total", status=response.status, **labels)
+                    await log_bad_response(upstream, response)
+                    return None
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                metrics.inc("demure_request_errors_total", status=0, **labels)
+                raise
+
+    @commands.hybrid_command(hidden=True)
+    @commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    async def poolstats(self, ctx):
+        '''Show HTTP connection pool reuse (admin only command)'''
+        if not ctx.author.guild_permissions.administrator:
+            return
+        lines = [f"{name}: {stats}" for name, stats in self.pool_stats().items()]
+        await ctx.send("```" + "\n".join(lines) + "```")
+
+    @commands.hybrid_command(hidden=True)
+    @commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    async def cachestats(self, ctx):
+        '''Show ITAD cache hit rates (admin only command)'''
+        if not ctx.author.guild_permissions.administrator:
+            return
+        lines = [f"{name}: {stats}" for name, stats in self.cache_stats().items()]
+        await ctx.send("```" + "\n".join(lines) + "```")
+
+    @commands.hybrid_command(hidden=True)
+    @commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    async def stats(self, ctx):
+        '''Show command and upstream latency, errors and cache hit rates (admin only command)'''
+        if not ctx.author.guild_permissions.administrator:
+            return
+        lines = ["Commands:"]
+        for labels, count, p50, p95, total in metrics.summary("demure_command_seconds"):
+            errors = metrics.counter("demure_command_errors_total", command=labels["command"])
+            lines.append(f"  {labels['command']}: n={count} p50={p50 * 1000:.0f}ms p95={p95 * 1000:.0f}ms errors={errors}")
+        lines.append("Upstreams:")
+        for labels, count, p50, p95, total in metrics.summary("demure_request_seconds"):
+            errors = metrics.counter("demure_request_errors_total", **labels)
+            lines.append(f"  {labels['upstream']} {labels['method']} {labels['endpoint']}: n={count} "
+                         f"p50={p50 * 1000:.0f}ms p95={p95 * 1000:.0f}ms total={total:.1f}s errors={errors}")
+        lines.append("Caches:")
+        lines.extend(f"  {name}: hit_rate={stats['hit_rate']} size={stats['size']}" for name, stats in self.cache_stats().items())
+        await ctx.send("```" + "\n".join(lines)[:1990] + "```")
+
+    @commands.hybrid_command()
+    @app_commands.describe(names="Game names, comma separated")
+    async def wish(self, ctx, *, names: str = None):
+        """Add one or more games (comma separated) to your wishlist."""
+        requested = split_names(names or "")
+        if not requested:
+            await ctx.send("```Usage: !wish [game name], [game name], ...```")
+            return
+
+        await ctx.defer()
+        lookups = await asyncio.gather(*(self.get_game_by_name(name) for name in requested))
+        titles = list(dict.fromkeys(data["game"]["title"] for data in lookups if data and data.get("found")))
+        unknown = [name for name, data in zip(requested, lookups) if not data or not data.get("found")]
+
+        lines = []
+        if titles:
+            url = f"{self.BACKEND_URL}{ctx.author.id}/add_games/"
+            response = await self.fetch(self.backend_session, url, method='POST', json={"names": titles, "username": ctx.author.name})
+            if not response:
+                await ctx.send(embed=discord.Embed(description="Unexpected error adding games to your wishlist."))
                 return
-        
-        response = await self.fetch(session, f"{url}remove_game/", method='DELETE', json={"name": name})
-        if response:
-            await embed.edit(embed=discord.Embed(description=f"{name} has been removed from your wishlist."))
+            if response["added"]:
+                lines.append(f"Added: {', '.join(response['added'])}")
+            if response["already_present"]:
+                lines.append(f"Already tracked: {', '.join(response['already_present'])}")
+        if unknown:
+            lines.append(f"Could not identify: {', '.join(unknown)}")
+        await ctx.send(embed=discord.Embed(description="\n".join(lines)))
+
+    @commands.hybrid_command()
+    @app_commands.describe(names="Game names, comma separated")
+    async def unwish(self, ctx, *, names: str = None):
+        """Remove one or more games (comma separated) from your wishlist."""
+        requested = split_names(names or "")
+        if not requested:
+            await ctx.send("```Usage: !unwish [game name], [game name], ...```")
+            return
+
+        await ctx.defer()
+        url = f"{self.BACKEND_URL}{ctx.author.id}/remove_games/"
+        response = await self.fetch(self.backend_session, url, method='DELETE', json={"names": requested})
+        if not response:
+            await ctx.send(embed=discord.Embed(description="Unexpected error removing games from your wishlist."))
+            return
+
+        lines = []
+        if response["removed"]:
+            lines.append(f"Removed: {', '.join(response['removed'])}")
+        if response["not_present"]:
+            lines.append(f"Not currently tracked for you: {', '.join(response['not_present'])}")
+        await ctx.send(embed=discord.Embed(description="\n".join(lines)))
+
+    @commands.hybrid_command()
+    @app_commands.describe(game="Game name", threshold="Target price (e.g. 9.99) or minimum discount (e.g. 50%); empty for any sale")
+    async def alert(self, ctx, *, game: str = None, threshold: str = None):
+        """Only alert on a game when it drops to a target price or by a minimum discount."""
+        if game and threshold is None:
+            # Prefix invocations pass everything as one string: "!alert Hades, 9.99", but "!alert Warhammer 40,000"
+            game, threshold = split_alert(game)
+        target, discount = parse_threshold(threshold)
+        if not game or not game.strip() or target is False:
+            await ctx.send("```Usage: !alert [game name], [target price | minimum discount%]```")
+            return
+
+        await ctx.defer()
+        game_data = await self.get_game_by_name(game.strip())
+        if not game_data or not game_data.get("found"):
+            await self.send_error(ctx, "Game could not be identified. Double-check your spelling and try again.")
+            return
+
+        title = game_data["game"]["title"]
+        url = f"{self.BACKEND_URL}{ctx.author.id}/threshold/"
+        payload = {"name": title, "target_price": target, "min_discount": discount, "username": ctx.author.name}
+        response = await self.fetch(self.backend_session, url, method='PUT', json=payload)
+        if not response:
+            await ctx.send(embed=discord.Embed(description="Unexpected error setting your alert."))
+            return
+
+        if target is not None:
+            description = f"You will be alerted when {title} drops to ${target:.2f} or less."
+        elif discount is not None:
+            description = f"You will be alerted when {title} is at least {discount}% off."
         else:
-            await embed.edit(embed=discord.Embed(description="Unexpected error removing game from your wishlist."))
+            description = f"You will be alerted whenever {title} goes on sale."
+        await ctx.send(embed=discord.Embed(description=description))
 
+    @alert.autocomplete("game")
+    async def alert_autocomplete(self, interaction, current):
+        return choices(self.titles.suggest(current, 25))
 
-    @commands.command()
+    @wish.autocomplete("names")
+    async def wish_autocomplete(self, interaction, current):
+        head, _, last = current.rpartition(",")
+        return choices(self.titles.suggest(last, 25), f"{head}, " if head else "")
+
+    @unwish.autocomplete("names")
+    async def unwish_autocomplete(self, interaction, current):
+        return await self.wishlist_autocomplete(interaction, current)
+
+    @commands.hybrid_command()
     async def wishlist(self, ctx):
         """Display user's wishlist."""
-        embed = await ctx.send(embed=discord.Embed(description="Retrieving your wishlist..."))
+        await ctx.defer()
 
-        url = f"{self.BACKEND_URL}{ctx.author.id}/"
-        async with aiohttp.ClientSession(headers=self.HEADER) as session:
-            wishlist = await self.fetch(session, url)
-            if not wishlist:
-                await embed.edit(embed=discord.Embed(description="Unexpected error retrieving your wishlist."))
-                return
-            
-            games = wishlist.get('games', [])
-            if not games:
-                await embed.edit(embed=discord.Embed(description="Your wishlist is currently empty."))
-                return
-            
-            game_list = "\n".join([game['name'] for game in games])
-            await embed.edit(embed=discord.Embed(title=f"{ctx.author.name.replace('_', ' ')}'s Wishlist", description=game_list))
-    
-    async def create_wishlist(self, ctx):
-        wishlist_data = {
-            "userid": ctx.author.id,
-            "username": ctx.author.name
-        }
-        async with aiohttp.ClientSession(headers=self.HEADER) as session:
-            response = await self.fetch(session, self.BACKEND_URL, method='POST', json=wishlist_data)
-            if response:
-                logger.info(f"Wishlist created for {ctx.author.name}.")
+        first = await self.get_wishlist_page(ctx.author.id)
+        if not first:
+            await ctx.send(embed=discord.Embed(description="Unexpected error retrieving your wishlist."))
+            return
+        if not first["games"]:
+            await ctx.send(embed=discord.Embed(description="Your wishlist is currently empty."))
+            return
+
+        # Pages are fetched only when the user gets to them; page n + 1 starts after page n's last name
+        title = f"{ctx.author.name.replace('_', ' ')}'s Wishlist"
+        page_count = -(-first["count"] // GAMES_PER_PAGE)
+        cursors, fetched = {0: ""}, {0: first}
+
+        async def render(index):
+            if cursors[index] is None:
+                # The wishlist shrank since it was opened and an earlier page turned out to be the last
+                page = {"games": [], "next": None}
             else:
-                logger.info("Error creating wishlist.")
+                page = fetched.pop(index, None) or await self.get_wishlist_page(ctx.author.id, cursors[index])
+            if page is None:
+                return discord.Embed(title=title, description="Unexpected error retrieving this page.")
+            cursors[index + 1] = page["next"]
+            embed = discord.Embed(title=title, description=await self.wishlist_lines(page["games"]) or "No more games.")
+            embed.set_footer(text=f"Page {index + 1}/{page_count} · {first['count']} games")
+            return embed
+
+        await PageView(ctx.author.id, page_count, render).start(ctx.send)
+
+    async def get_wishlist_page(self, user_id, after=""):
+        '''One page of the user's wishlist from the backend's keyset-paginated games/ endpoint.'''
+        url = f"{self.BACKEND_URL}{user_id}/games/"
+        return await self.fetch(self.backend_session, url, params={"after": after, "limit": GAMES_PER_PAGE})
+
+    async def wishlist_lines(self, games):
+        '''Lines for one wishlist page, with current prices from a single /games/prices/ call.'''
+        unknown = [game["name"] for game in games if not game.get("itad_id")]
+        lookups = dict(zip(unknown, await asyncio.gather(*(self.lookup_game(name) for name in unknown))))
+        ids = {}
+        for game in games:
+            data = lookups.get(game["name"])
+            ids[game["name"]] = game.get("itad_id") or (data["game"]["id"] if data and data.get("found") else None)
+        prices = await self.get_prices_batch([game_id for game_id in ids.values() if game_id]) or {}
+        return "\n".join(format_wishlist_game(game, prices.get(ids[game["name"]])) for game in games)
+    
+    async def get_wishlist(self, user_id):
+        '''Fetch a wishlist, revalidating the local copy with its ETag so unchanged lists come back as 304.'''
+        cached = self.wishlist_cache.get(user_id)
+        headers = {'If-None-Match': cached[0]} if cached else {}
+        url = f"{self.BACKEND_URL}{user_id}/"
+        labels = {"upstream": "backend", "method": "GET", "endpoint": endpoint(url)}
+        with metrics.timer("demure_request_seconds", **labels):
+            async with self.backend_session.get(url, headers=headers) as response:
+                if response.status == 304 and cached:
+                    return cached[1]
+                if response.status == 404:
+                    # Wishlists are created on the first add, so a missing one is just empty
+                    return {"games": []}
+                if response.status != 200:
+                    metrics.inc("demure_request_errors_total", status=response.status, **labels)
+                    await log_bad_response("backend", response)
+                    return None
+                wishlist = await response.json()
+                if 'ETag' in response.headers:
+                    self.wishlist_cache.set(user_id, (response.headers['ETag'], wishlist))
+                return wishlist
 
-    @commands.command()
+    async def is_tracked(self, user_id, game_name):
+        '''Whether game_name is on the user's wishlist; False if the backend can't say.'''
+        url = f"{self.BACKEND_URL}{user_id}/contains/"
+        try:
+            response = await self.fetch(self.backend_session, url, params={"name": game_name})
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            # The 👀 prompt still works without the backend's answer; adding handles duplicates
+            return False
+        return bool(response and response.get(game_name))
+
+    @commands.hybrid_command()
+    @app_commands.describe(name="Game title")
+    async def deals(self, ctx, *, name: str = None):
+        """List the current price and historical low at every shop."""
+        if not name:
+            await ctx.send("```Usage: !deals [name]```")
+            return
+
+        await ctx.defer()
+        game_data = await self.get_game_by_name(name)
+        if not game_data or not game_data.get("found"):
+            await self.send_error(ctx, "Game could not be identified. Double-check your spelling and try again.")
+            return
+
+        game = game_data["game"]
+        price_data = await self.get_game_prices(game["id"])
+        if price_data is None:
+            await self.send_error(ctx, self.ERROR_MSG)
+            return
+        if not price_data or not price_data[0].get("deals"):
+            await self.send_error(ctx, f"No shops currently list {game['title']}.")
+            return
+
+        await PageView.from_embeds(ctx.author.id, deal_embeds(game["title"], price_data[0])).start(ctx.send)
+
+    @commands.hybrid_command()
+    @app_commands.describe(names="Game names separated by |")
+    async def compare(self, ctx, *, names: str = None):
+        """Compare best prices of several games: !compare a | b | c"""
+        requested = [name.strip() for name in (names or "").split("|") if name.strip()]
+        if len(requested) < 2:
+            await ctx.send("```Usage: !compare [game] | [game] | ...```")
+            return
+
+        await ctx.defer()
+        lookups = await asyncio.gather(*(self.get_game_by_name(name) for name in requested))
+        games = [data["game"] for data in lookups if data and data.get("found")]
+        unknown = [name for name, data in zip(requested, lookups) if not data or not data.get("found")]
+        if not games:
+            await self.send_error(ctx, "None of those games could be identified.")
+            return
+
+        # All titles in a single /games/prices/ request
+        entries = await self.get_prices_batch([game["id"] for game in games])
+        if entries is None:
+            await self.send_error(ctx, self.ERROR_MSG)
+            return
+
+        lines = []
+        for game in games:
+            deal = best_deal(entries.get(game["id"], {}))
+            lines.append(f"**{game['title']}**: {format_deal(deal)}" if deal else f"**{game['title']}**: no current listings")
+        if unknown:
+            lines.append(f"\nCould not identify: {', '.join(unknown)}")
+
+        embeds = [discord.Embed(title="Price comparison", description="\n".join(lines))]
+        for game in games:
+            if entries.get(game["id"], {}).get("deals"):
+                embeds.extend(deal_embeds(game["title"], entries[game["id"]]))
+        await PageView.from_embeds(ctx.author.id, embeds).start(ctx.send)
+
+    @commands.hybrid_command()
+    @app_commands.describe(name="Game title")
     async def itad(self, ctx, *, name: str = None):
         """Find current best price of game by name."""
         if not name:
             await ctx.send("```Usage: !itad [name]```")
             return
     
-        embed = discord.Embed(description=f"Searching for {name} on IsThereAnyDeal...")
-        embed_msg = await ctx.send(embed=embed)
-        
-        game_data = self.get_game_by_name(name, itad_auth)
+        # Acknowledge the interaction while the lookup is in flight
+        game_data, _ = await asyncio.gather(self.get_game_by_name(name), ctx.defer())
         if not game_data or not game_data.get("found"):
             await self.send_error(ctx, "Game could not be identified. Double-check your spelling and try again.")
-            await embed_msg.delete()
             return
         
         game = game_data.get("game")
         game_id = game.get("id")
         game_name = game.get("title")
         
-        price_data = self.get_game_prices(game_id, itad_auth)
-        if not price_data:
-            await embed_msg.delete()
-            await self.send_error(ctx, self.ERROR_MESSAGE)
+        # Prices and wishlist membership only depend on the lookup, not on each other
+        price_data, tracked = await asyncio.gather(self.get_game_prices(game_id), self.is_tracked(ctx.author.id, game_name))
+        if price_data is None:
+            await self.send_error(ctx, self.ERROR_MSG)
             return
 
-        prices = price_data.get("prices", [])
-        current_price = prices[0].get("current", {}) if prices else None
+        current_price = best_deal(price_data[0]) if price_data else None
 
         if not current_price:
-            await embed_msg.delete()
             await self.send_error(ctx, "Unable to retrieve price information. Try again later.")
             return
         
         deal_price = current_price.get("price", {}).get("amount", "N/A")
         reg_price = current_price.get("regular", {}).get("amount", "N/A")
         shop_name = current_price.get("shop", {}).get("name", "Unknown")
+        prompt = "It's already on your wishlist." if tracked else "React with 👀 to add the game to your wishlist."
 
         if deal_price < reg_price:
-            msg = await embed_msg.edit(embed=discord.Embed(title=game_name, description=f"Current best price: ${deal_price} at {shop_name}.\n"
-                                              f"React with 👀 to add the game to your wishlist."))
+            msg = await ctx.send(embed=discord.Embed(title=game_name, description=f"Current best price: ${deal_price} at {shop_name}.\n"
+                                              f"{prompt}"))
         else:
-            msg = await embed_msg.edit(embed=discord.Embed(
+            msg = await ctx.send(embed=discord.Embed(
                 title=name, description=f"There are currently no deals on {name}.\n"
                                         f"Regular price: ${reg_price} from {shop_name}\n"
-                                        f"React with 👀 to add the game to your wishlist."))
+                                        f"{prompt}"))
+
+        if not tracked:
+            await self.handle_reaction(ctx, msg, game_name)
 
-        await self.handle_reaction(ctx, msg, game_name)
+    @deals.autocomplete("name")
+    async def deals_autocomplete(self, interaction, current):
+        return await self.title_autocomplete(interaction, current)
+
+    @itad.autocomplete("name")
+    async def itad_autocomplete(self, interaction, current):
+        return await self.title_autocomplete(interaction, current)
     
+    async def lookup_game(self, name):
+        """Fetch game details by exact name, from the title index or ITAD's cached lookup."""
+        title, game_id = self.titles.exact(name) or (None, None)
+        if game_id:
+            return {"found": True, "game": {"id": game_id, "title": title}}
+
+        result = await self.lookup_cache.get_or_fetch(normalize_title(name), lambda: self.itad_client.lookup(name))
+        if result and result.get("found"):
+            self.titles.add(result["game"]["title"], result["game"]["id"])
+        return result
+
     async def get_game_by_name(self, name):
-        """Fetch game details by name."""
-        async with aiohttp.ClientSession() as session:
-            payload = {"title": name, "key": itad_auth}
-            return await self.fetch(session, f"{self.BASE_URL}/games/lookup/v1", params=payload)
+        """Fetch game details by a name a user typed, resolving typos against the title index."""
+        result = await self.lookup_game(name)
+        if result is not None and not result.get("found"):
+            # ITAD didn't recognise it; fall back to the closest title we know
+            for score, title, game_id in self.titles.search(name, limit=3, min_score=0.4):
+                if game_id:
+                    return {"found": True, "game": {"id": game_id, "title": title}}
+        return result
+
+    async def title_autocomplete(self, interaction, current):
+        """Autocomplete game titles from the local index."""
+        return choices(self.titles.suggest(current, 25))
+
+    async def wishlist_autocomplete(self, interaction, current):
+        """Autocomplete the last comma separated name from the user's own wishlist."""
+        # Revalidating costs a 304 when nothing changed, and keeps removed or newly added games right
+        try:
+            wishlist = await self.get_wishlist(interaction.user.id)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            wishlist = None
+        head, _, last = current.rpartition(",")
+        key = normalize(last)
+        names = [game['name'] for game in (wishlist or {}).get('games', []) if key in normalize(game['name'])]
+        return choices(names, f"{head}, " if head else "")
     
+    async def get_prices_batch(self, game_ids):
+        """Fetch prices for several games in one call, reusing cached entries. Returns {id: entry}."""
+        cached = await self.price_cache.get_many(game_ids)
+        entries = {entry["id"]: entry for response in cached.values() for entry in response}
+        missing = [game_id for game_id in dict.fromkeys(game_ids) if game_id not in cached]
+        if missing:
+            response = await self.itad_client.prices(missing)
+            if response is None:
+                return None
+            await self.price_cache.set_many({entry["id"]: [entry] for entry in response})
+            entries.update((entry["id"], entry) for entry in response)
+        return entries
+
     async def get_game_prices(self, game_id):
-        """Fetch game prices by game ID."""
-        async with aiohttp.ClientSession() as session:
-            params = {"key": itad_auth}
-            body = [game_id]
-            return await self.fetch(session, f"{self.BASE_URL}/games/prices/", params=params, json=body)
+        """Fetch game prices by game ID (cached by ID)."""
+        return await self.price_cache.get_or_fetch(game_id, lambda: self.itad_client.prices([game_id]))
 
     async def handle_reaction(self, ctx, msg, game_name):
-        def check(reaction, user):
-            return user == ctx.author and (reaction.emoji) == '👀' and reaction.message.id == msg.id
-        
-        try:
-            reaction, user = await self.bot.wait_for('reaction_add', timeout=60.0, check=check)
-        except asyncio.TimeoutError:
+        '''Let the command author add the game by reacting with 👀 within the registry timeout.'''
+        self.reactions.register(msg.id, ctx.author.id, '👀', (ctx.channel.id, game_name, ctx.author.name))
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        pending = self.reactions.pop(payload.message_id, payload.user_id, str(payload.emoji))
+        if pending is None:
             return
-        
-        await self.add_game_to_wishlist(ctx, game_name, user.id)
+        channel_id, game_name, username = pending
+        await self.add_game_to_wishlist(channel_id, game_name, payload.user_id, username)
+
+    @tasks.loop(seconds=5)
+    async def expire_reactions(self):
+        self.reactions.expire()
     
     async def send_error(self, ctx, message):
         """Send a standardized error message."""
@@ -160,21 +654,17 @@ class IsThereAnyDeal(commands.Cog):
             logger.info(f"Service error occurred from IsThereAnyDeal API.")
         await ctx.send(embed=discord.Embed(description=message))
 
-    async def add_game_to_wishlist(self, ctx, game_name, user_id):
-        url = f"{self.BACKEND_URL}{user_id}/"
-        async with aiohttp.ClientSession(headers=self.HEADER) as session:
-            wishlist = await self.fetch(session, url)
-            if not wishlist:
-                await ctx.send(embed=discord.Embed(description="Unexpected error retrieving your wishlist."))
-                return
-            
-            games = wishlist.get('games', [])
-            if any(game['name'] == game_name for game in games):
-                await ctx.send(embed=discord.Embed(description=f"{game_name} is already being tracked for you."))
-                return
-            
-            response = await self.fetch(session, f"{url}add_game/", method='POST', json={"name": game_name})
-            if response:
-                await ctx.send(embed=discord.Embed(description=f"{game_name} has been added to your wishlist and you will be notified whenever the game goes on sale anywhere."))
-            else:
-                await ctx.send(embed=discord.Embed(description="Unexpected error adding game to your wishlist."))
\ No newline at end of file
+    async def add_game_to_wishlist(self, channel_id, game_name, user_id, username):
+        '''Add the game (creating the wishlist on a first add) while resolving the channel to answer in.'''
+        async def resolve_channel():
+            return self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+
+        url = f"{self.BACKEND_URL}{user_id}/add_game/"
+        channel, response = await asyncio.gather(resolve_channel(), self.fetch(
+            self.backend_session, url, method='POST', json={"name": game_name, "username": username}))
+        if not response:
+            await channel.send(embed=discord.Embed(description="Unexpected error adding game to your wishlist."))
+        elif response["status"] == "already_present":
+            await channel.send(embed=discord.Embed(description=f"{game_name} is already being tracked for you."))
+        else:
+            await channel.send(embed=discord.Embed(description=f"{game_name} has been added to your wishlist and you will be notified whenever the game goes on sale anywhere."))
\ No newline at end of file
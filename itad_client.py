@@ -0,0 +1,173 @@
+import asyncio
+import json
+import random
+import time
+from email.utils import parsedate_to_datetime
+import aiohttp
+from utils import logger, log_bad_response
+from metrics import metrics
+
+class TokenBucket:
+    '''Client-side rate limit: `rate` requests per second with bursts up to `capacity`.'''
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        '''Hold every caller back, e.g. while the server says we're rate limited.'''
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    async def acquire(self):
+        # The lock queues callers in order, so waiting doesn't race for tokens
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def retry_after(headers):
+    '''Seconds to wait according to Retry-After or X-RateLimit-Reset, or None.'''
+    value = headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+    reset = headers.get("X-RateLimit-Reset")
+    if reset and headers.get("X-RateLimit-Remaining") == "0":
+        try:
+            reset = float(reset)
+        except ValueError:
+            return None
+        # Either an epoch timestamp or a delta in seconds
+        return max(0.0, reset - time.time()) if reset > 1e9 else reset
+    return None
+
+class ITADClient:
+    '''IsThereAnyDeal API client with a token bucket, jittered retries and request coalescing.
+
+    429s and 5xx responses are retried, honoring Retry-After/X-RateLimit-*
+    headers up to max_backoff seconds (longer waits fail the request), and a
+    429 pauses the whole bucket rather than just the caller.
+    Identical requests already in flight share one upstream call. Returns the
+    decoded JSON, or None once retries are exhausted.
+    '''
+    def __init__(self, session, base_url, key, rate=5.0, burst=10, max_retries=3,
+                 backoff=0.5, max_backoff=10.0, timeout=10.0):
+        self.session = session
+        self.base_url = base_url
+        self.key = key
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._inflight = {}
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    async def lookup(self, title):
+        return await self.request('GET', '/games/lookup/v1', params={"title": title})
+
+    async def lookup_ids(self, titles):
+        '''{title: ITAD id or None} for many exact titles in one call.'''
+        return await self.request('POST', '/lookup/id/title/v1', json=list(titles))
+
+    async def prices(self, game_ids):
+        return await self.request('POST', '/games/prices/', json=list(game_ids))
+
+    async def request(self, method, path, params=None, json=None):
+        key = (method, path, tuple(sorted((params or {}).items())), _dumps(json))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._request(method, path, params, json))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def delay(self, attempt):
+        # Full jitter keeps a burst of failing callers from retrying in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def _request(self, method, path, params, json):
+        # One observation per logical request, retries and rate-limit waits included
+        with metrics.timer("demure_request_seconds", upstream="itad", method=method, endpoint=path):
+            return await self._attempts(method, path, params, json)
+
+    def failed(self, method, path, status):
+        metrics.inc("demure_request_errors_total", upstream="itad", method=method, endpoint=path, status=status)
+
+    async def _attempts(self, method, path, params, json):
+        url = f"{self.base_url}{path}"
+        params = dict(params or {})
+        if self.key:
+            params["key"] = self.key
+
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            self.requests += 1
+            try:
+                async with self.session.request(method, url, params=params, json=json, timeout=self.timeout) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    self.failed(method, path, response.status)
+                    wait = retry_after(response.headers)
+                    if response.status == 429:
+                        self.rate_limited += 1
+                        wait = self.delay(attempt) if wait is None else wait
+                        self.bucket.pause(min(wait, self.max_backoff))
+                    elif response.status >= 500:
+                        wait = self.delay(attempt) if wait is None else wait
+                    else:
+                        await log_bad_response("itad", response)
+                        self.failures += 1
+                        return None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.info(f"ITAD request to {path} failed: {e!r}")
+                self.failed(method, path, 0)
+                wait = self.delay(attempt)
+
+            if wait > self.max_backoff:
+                # e.g. Retry-After: 3600 would stall every command well past its interaction's lifetime
+                logger.info(f"ITAD asked to wait {wait:.0f}s before retrying {path}; giving up.")
+                self.failures += 1
+                return None
+            if attempt < self.max_retries:
+                self.retries += 1
+                await asyncio.sleep(wait)
+
+        self.failures += 1
+        logger.info(f"Giving up on {path} after {self.max_retries + 1} attempts.")
+        return None
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+        }
+
+def _dumps(body):
+    return None if body is None else json.dumps(body, sort_keys=True)
@@ -0,0 +1,137 @@
+import bisect
+import re
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from aiohttp import web
+
+# Upper bounds in seconds, Prometheus style (the last bucket is +Inf)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "demure_command_seconds": "Bot command latency, invocation to completion.",
+    "demure_command_errors_total": "Bot commands that raised.",
+    "demure_request_seconds": "Upstream request latency by upstream, method and endpoint.",
+    "demure_request_errors_total": "Upstream requests that failed, by status (0 for connection errors).",
+    "demure_cache_requests_total": "Cache lookups by cache and result.",
+    "demure_cache_entries": "Entries currently held per cache.",
+}
+
+def endpoint(url):
+    '''Path of a URL with numeric ids collapsed, e.g. /api/wishlist/{id}/add_games/, so one endpoint is one series.'''
+    return re.sub(r"/\d+(?=/|$)", "/{id}", urlsplit(str(url)).path)
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        '''Estimate a quantile by linear interpolation inside its bucket.'''
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+class Metrics:
+    '''Process-wide histograms and counters, rendered in the Prometheus text format.
+
+    Collectors are callables returning (name, type, labels, value) samples
+    that are read at render time, for counters that already live elsewhere
+    such as the cache hit counts.
+    '''
+    def __init__(self):
+        self.histograms = {}  # (name, sorted label items) -> Histogram
+        self.counters = {}  # (name, sorted label items) -> value
+        self.collectors = []
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self):
+        samples = {}  # name -> (type, lines)
+        def add(name, kind, line):
+            samples.setdefault(name, (kind, []))[1].append(line)
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                cumulative += count
+                add(name, "histogram", f"{name}_bucket{format_labels(labels, le=bound)} {cumulative}")
+            add(name, "histogram", f"{name}_sum{format_labels(labels)} {histogram.sum}")
+            add(name, "histogram", f"{name}_count{format_labels(labels)} {histogram.count}")
+        for (name, labels), value in sorted(self.counters.items()):
+            add(name, "counter", f"{name}{format_labels(labels)} {value}")
+        for collect in self.collectors:
+            for name, kind, labels, value in collect():
+                add(name, kind, f"{name}{format_labels(tuple(sorted(labels.items())))} {value}")
+
+        lines = []
+        for name, (kind, series) in samples.items():
+            if name in HELP:
+                lines.append(f"# HELP {name} {HELP[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(series)
+        return "\n".join(lines) + "\n"
+
+    def summary(self, name):
+        '''(labels, count, p50, p95, total) per series of a histogram, busiest first.'''
+        rows = [(dict(labels), histogram.count, histogram.quantile(0.5), histogram.quantile(0.95), histogram.sum)
+                for (series, labels), histogram in self.histograms.items() if series == name]
+        return sorted(rows, key=lambda row: -row[1])
+
+    def counter(self, name, **labels):
+        '''Total of a counter over every series matching labels.'''
+        return sum(value for (series, series_labels), value in self.counters.items()
+                   if series == name and labels.items() <= dict(series_labels).items())
+
+def format_labels(labels, **extra):
+    items = [*labels, *extra.items()]
+    if not items:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in items)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(items, escaped)) + "}"
+
+metrics = Metrics()
+
+async def start_metrics_server(port, host="127.0.0.1"):
+    '''Serve metrics.render() at http://host:port/metrics. Returns the runner, for cleanup().'''
+    async def handle(request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,170 @@
+import asyncio
+import time
+import zlib
+import discord
+from utils import logger
+from subscriptions import Subscriptions
+
+def best_deal(entry):
+    '''Cheapest current deal in a /games/prices/ entry, or None.'''
+    deals = entry.get("deals") or []
+    if not deals:
+        return None
+    return min(deals, key=lambda deal: deal.get("price", {}).get("amount", float("inf")))
+
+def partition(name, count):
+    '''Stable partition of a game name, the same in every process.'''
+    return zlib.crc32(name.encode()) % count
+
+def owned_partitions(bot):
+    '''(partition count, partitions this process handles): one per shard, none split when unsharded.'''
+    count = getattr(bot, "shard_count", None) or 1
+    shards = getattr(bot, "shard_ids", None)
+    if shards is None:
+        shard_id = getattr(bot, "shard_id", None)
+        shards = range(count) if shard_id is None else [shard_id]
+    return count, set(shards)
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class SaleNotifier:
+    '''Polls ITAD for every wishlisted game in batches and DMs users whose games changed price.
+
+    One pass costs a handful of paginated backend calls, one batch title lookup
+    per batch_size games whose ITAD id isn't stored yet, and one /games/prices/
+    call per batch_size games, no matter how many wishlists reference those games.
+    Price changes are diffed against the snapshots stored by the backend, and
+    a changed deal alerts the watchers whose target price and minimum discount
+    it meets, checked for all subscriptions at once (see Subscriptions).
+
+    In a sharded cluster each process only checks the games whose partition
+    is one of its shards, and alerts every watcher of those games. Splitting
+    by game rather than by user means each game is priced and snapshotted by
+    exactly one process, so one process can't consume another's price change.
+    '''
+    def __init__(self, cog, batch_size=200, page_size=1000, lookup_concurrency=10, send_concurrency=5):
+        self.cog = cog
+        self.batch_size = batch_size
+        self.page_size = page_size
+        self.lookup_semaphore = asyncio.Semaphore(lookup_concurrency)
+        self.send_semaphore = asyncio.Semaphore(send_concurrency)
+        self.last_run = None  # wall-clock time of the last completed pass, kept across restarts
+
+    def overdue(self, interval=86400):
+        '''True if a pass has completed before but not within the last interval seconds, e.g. the bot was down at run time.'''
+        return self.last_run is not None and time.time() - self.last_run > interval
+
+    async def collect_watchers(self):
+        '''Every subscription to a wishlisted game, plus the ITAD ids already stored.'''
+        subscriptions = Subscriptions()
+        known_ids = {}
+        count, owned = owned_partitions(self.cog.bot)
+        after = ""
+        while after is not None:
+            params = {"after": after, "limit": self.page_size}
+            page = await self.cog.fetch(self.cog.backend_session, f"{self.cog.BACKEND_URL}watched/", params=params)
+            if page is None:
+                raise RuntimeError("Could not retrieve watched games from the backend.")
+            for game in page.get("games", []):
+                if count > 1 and partition(game["name"], count) not in owned:
+                    continue
+                subscriptions.add(game["name"], game["users"], game.get("targets"), game.get("discounts"))
+                if game.get("itad_id"):
+                    known_ids[game["name"]] = game["itad_id"]
+            after = page.get("next")
+        return subscriptions.freeze(), known_ids
+
+    async def resolve_ids(self, names):
+        '''Resolve game names to (ITAD id, title or None), batch_size names per batch title lookup.'''
+        # Exact matches only, never the commands' fuzzy fallback: the id is stored on the game for good
+        resolved, missing = {}, []
+        for name in names:
+            title, game_id = self.cog.titles.exact(name) or (None, None)
+            if game_id:
+                resolved[name] = (game_id, title)
+            else:
+                missing.append(name)
+
+        async def lookup_batch(batch):
+            async with self.lookup_semaphore:
+                found = await self.cog.itad_client.lookup_ids(batch) or {}
+            return [(name, found[name]) for name in batch if found.get(name)]
+
+        batches = await asyncio.gather(*(lookup_batch(batch) for batch in chunked(missing, self.batch_size)))
+        for name, game_id in (pair for batch in batches for pair in batch):
+            resolved[name] = (game_id, None)
+            self.cog.titles.add(name, game_id)
+        return resolved
+
+    async def fetch_prices(self, game_ids):
+        '''Fetch prices for many games, batch_size ids per /games/prices/ call.'''
+        async def fetch_batch(batch):
+            return await self.cog.itad_client.prices(batch) or []
+
+        batches = await asyncio.gather(*(fetch_batch(batch) for batch in chunked(list(game_ids), self.batch_size)))
+        return {entry["id"]: entry for batch in batches for entry in batch}
+
+    async def record_snapshots(self, rows):
+        '''Store the new deals in the backend and return the names whose deal changed.'''
+        url = f"{self.cog.GAMES_URL}snapshots/"
+
+        async def post(batch):
+            response = await self.cog.fetch(self.cog.backend_session, url, method='POST', json=batch)
+            if response is None:
+                raise RuntimeError("Could not store price snapshots in the backend.")
+            return response["changed"]
+
+        results = await asyncio.gather(*(post(batch) for batch in chunked(rows, self.page_size)))
+        return {name for changed in results for name in changed}
+
+    async def send_alerts(self, alerts):
+        '''DM each user one message listing all of their changed games.'''
+        async def send(user_id, lines):
+            async with self.send_semaphore:
+                try:
+                    user = self.cog.bot.get_user(user_id) or await self.cog.bot.fetch_user(user_id)
+                    await user.send(embed=discord.Embed(title="Wishlist deals", description="\n".join(lines)))
+                    return True
+                except discord.HTTPException as e:
+                    logger.info(f"Could not notify user {user_id}: {e}")
+                    return False
+
+        results = await asyncio.gather(*(send(user_id, lines) for user_id, lines in alerts.items()))
+        return sum(results)
+
+    async def run(self):
+        '''Run one full notification pass. Returns the number of users notified.'''
+        subscriptions, ids = await self.collect_watchers()
+        resolved = await self.resolve_ids([name for name in subscriptions.games if name not in ids])
+        ids.update({name: game_id for name, (game_id, title) in resolved.items()})
+        prices = await self.fetch_prices(set(ids.values()))
+
+        rows, deals = [], {}
+        for name, game_id in ids.items():
+            deal = best_deal(prices.get(game_id, {}))
+            if not deal or "amount" not in deal.get("price", {}) or "amount" not in deal.get("regular", {}):
+                continue
+            deals[name] = deal
+            row = {"name": name, "itad_id": game_id, "price": deal["price"]["amount"],
+                   "regular": deal["regular"]["amount"], "shop": deal.get("shop", {}).get("name", "Unknown")}
+            if name in resolved and resolved[name][1]:
+                row["title"] = resolved[name][1]
+            rows.append(row)
+
+        # A game seen for the first time only records a baseline snapshot
+        changed = await self.record_snapshots(rows)
+
+        lines = {}
+        for name in changed:
+            deal = deals[name]
+            lines[name] = f"{name}: ${deal['price']['amount']} at {deal.get('shop', {}).get('name', 'Unknown')} (regular ${deal['regular']['amount']})"
+        alerts = {}
+        for user_id, name in subscriptions.alerts({name: (deals[name]["price"]["amount"], deals[name]["regular"]["amount"]) for name in changed}):
+            alerts.setdefault(user_id, []).append(lines[name])
+
+        notified = await self.send_alerts(alerts)
+        self.last_run = time.time()
+        logger.info(f"Sale check: {len(subscriptions.games)} games, {len(subscriptions)} subscriptions, {len(changed)} changed, {notified} users notified.")
+        return notified
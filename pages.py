@@ -0,0 +1,71 @@
+import discord
+
+class PageView(discord.ui.View):
+    '''Prev/next buttons over embeds produced by render_page(index).
+
+    Each page is rendered at most once per view and reused when the user pages
+    back, so flipping through results never re-fetches anything. Only the
+    user who ran the command can press the buttons.
+    '''
+    def __init__(self, author_id, page_count, render_page, timeout=180.0):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.page_count = page_count
+        self.render_page = render_page
+        self.index = 0
+        self.rendered = {}
+        self.message = None
+
+    @classmethod
+    def from_embeds(cls, author_id, embeds, **kwargs):
+        async def render(index):
+            return embeds[index]
+        return cls(author_id, len(embeds), render, **kwargs)
+
+    async def page(self, index):
+        if index not in self.rendered:
+            self.rendered[index] = await self.render_page(index)
+        return self.rendered[index]
+
+    async def start(self, send):
+        '''Render the first page and post it with send(embed=..., view=...), e.g. ctx.send.'''
+        self.update_buttons()
+        embed = await self.page(0)
+        if self.page_count <= 1:
+            self.message = await send(embed=embed)
+            self.stop()
+        else:
+            self.message = await send(embed=embed, view=self)
+        return self.message
+
+    def update_buttons(self):
+        self.previous.disabled = self.index == 0
+        self.next.disabled = self.index >= self.page_count - 1
+
+    async def interaction_check(self, interaction):
+        return interaction.user.id == self.author_id
+
+    async def show(self, interaction, index):
+        self.index = index
+        self.update_buttons()
+        if index in self.rendered:
+            await interaction.response.edit_message(embed=self.rendered[index], view=self)
+            return
+        # Rendering may hit the backend and ITAD; answer within Discord's 3 second deadline first
+        await interaction.response.defer()
+        await interaction.edit_original_response(embed=await self.page(index), view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction, button):
+        await self.show(interaction, max(0, self.index - 1))
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction, button):
+        await self.show(interaction, min(self.page_count - 1, self.index + 1))
+
+    async def on_timeout(self):
+        if self.message:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
@@ -0,0 +1,73 @@
+import os
+import aiohttp
+
+def pool_settings(prefix):
+    '''Connection pool settings for an upstream. PREFIX_* env vars override the shared HTTP_* ones.'''
+    def setting(key, default, cast):
+        return cast(os.getenv(f"{prefix}_{key}", os.getenv(f"HTTP_{key}", default)))
+
+    return {
+        "limit": setting("POOL_LIMIT", 100, int),
+        "limit_per_host": setting("POOL_LIMIT_PER_HOST", 20, int),
+        "keepalive_timeout": setting("KEEPALIVE_TIMEOUT", 30.0, float),
+        "dns_cache_ttl": setting("DNS_CACHE_TTL", 300, int),
+        "total_timeout": setting("TOTAL_TIMEOUT", 15.0, float),
+        "connect_timeout": setting("CONNECT_TIMEOUT", 5.0, float),
+    }
+
+class PoolStats:
+    '''Request and connection counters for one pooled session.'''
+    def __init__(self, name):
+        self.name = name
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+
+    @property
+    def reuse_rate(self):
+        acquired = self.connections_created + self.connections_reused
+        return self.connections_reused / acquired if acquired else 0.0
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_rate": round(self.reuse_rate, 3),
+            "dns_cache_hits": self.dns_cache_hits,
+            "dns_cache_misses": self.dns_cache_misses,
+        }
+
+    def trace_config(self):
+        '''Hook the counters into aiohttp's tracing signals.'''
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._count("requests"))
+        trace.on_connection_create_end.append(self._count("connections_created"))
+        trace.on_connection_reuseconn.append(self._count("connections_reused"))
+        trace.on_dns_cache_hit.append(self._count("dns_cache_hits"))
+        trace.on_dns_cache_miss.append(self._count("dns_cache_misses"))
+        return trace
+
+    def _count(self, attr):
+        async def callback(session, context, params):
+            setattr(self, attr, getattr(self, attr) + 1)
+        return callback
+
+def create_session(name, headers=None, **overrides):
+    '''Create a long-lived pooled session for one upstream. Returns (session, stats).'''
+    settings = pool_settings(name.upper())
+    settings.update(overrides)
+    stats = PoolStats(name)
+    connector = aiohttp.TCPConnector(
+        limit=settings["limit"],
+        limit_per_host=settings["limit_per_host"],
+        keepalive_timeout=settings["keepalive_timeout"],
+        use_dns_cache=True,
+        ttl_dns_cache=settings["dns_cache_ttl"],
+    )
+    timeout = aiohttp.ClientTimeout(total=settings["total_timeout"], sock_connect=settings["connect_timeout"])
+    session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers,
+                                    trace_configs=[stats.trace_config()])
+    return session, stats
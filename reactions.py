@@ -0,0 +1,65 @@
+import heapq
+import time
+
+class ReactionRegistry:
+    '''Pending reaction prompts keyed by message id.
+
+    A single raw reaction listener dispatches through this registry in O(1)
+    instead of every prompt registering its own wait_for check. Deadlines sit
+    in a min-heap and are dropped lazily, so no task is held per message.
+    '''
+    def __init__(self, timeout=60.0):
+        self.timeout = timeout
+        self._pending = {}  # message id -> (user id, emoji, deadline, payload)
+        self._deadlines = []  # heap of (deadline, message id)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def register(self, message_id, user_id, emoji, payload, timeout=None):
+        deadline = time.time() + (self.timeout if timeout is None else timeout)
+        self._pending[message_id] = (user_id, emoji, deadline, payload)
+        heapq.heappush(self._deadlines, (deadline, message_id))
+
+    def pop(self, message_id, user_id, emoji):
+        '''Claim the prompt on message_id if this user reacted with its emoji in time. Returns its payload or None.'''
+        entry = self._pending.get(message_id)
+        if entry is None:
+            return None
+        expected_user, expected_emoji, deadline, payload = entry
+        if deadline <= time.time():
+            del self._pending[message_id]
+            return None
+        if user_id != expected_user or emoji != expected_emoji:
+            return None
+        del self._pending[message_id]
+        return payload
+
+    def expire(self, now=None):
+        '''Drop prompts whose deadline has passed. Returns how many were removed.'''
+        now = time.time() if now is None else now
+        removed = 0
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, message_id = heapq.heappop(self._deadlines)
+            entry = self._pending.get(message_id)
+            # Skip heap entries left behind by claimed or re-registered prompts
+            if entry is not None and entry[2] == deadline:
+                del self._pending[message_id]
+                removed += 1
+        return removed
+
+    def dump(self):
+        '''[message id, user id, emoji, deadline, payload] for every prompt still pending.'''
+        now = time.time()
+        return [[message_id, *entry] for message_id, entry in self._pending.items() if entry[2] > now]
+
+    def restore(self, entries):
+        '''Re-register prompts written by dump() with their original deadlines.'''
+        now = time.time()
+        for message_id, user_id, emoji, deadline, payload in entries:
+            if deadline > now:
+                self.register(message_id, user_id, emoji, tuple(payload), timeout=deadline - now)
+
+    def items(self):
+        '''(message id, (user id, emoji, deadline, payload)) for every pending prompt.'''
+        return self._pending.items()
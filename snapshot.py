@@ -0,0 +1,30 @@
+import gzip
+import json
+import os
+import tempfile
+
+VERSION = 1
+
+def write_snapshot(path, state):
+    '''Write state as gzipped JSON to a temporary file, fsync it, then swap it in so a crash never leaves half a file.'''
+    # A unique temporary name, so two writers of the same path can't interleave their bytes
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=6) as compressed:
+                compressed.write(json.dumps({"version": VERSION, **state}, separators=(",", ":")).encode())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def read_snapshot(path):
+    '''State written by write_snapshot(), or None if the file is missing, unreadable or from another version.'''
+    try:
+        with gzip.open(path, "rb") as f:
+            state = json.loads(f.read())
+    except (OSError, EOFError, ValueError):
+        return None
+    return state if state.get("version") == VERSION else None
@@ -0,0 +1,107 @@
+import argparse
+import aiohttp
+from aiohttp import web
+from cache import AsyncTTLCache
+from pool import create_session
+from utils import logger, log_bad_response
+
+class MemoryState:
+    '''Shared key/value store held in this process: TTL'd JSON values behind batch get/set/delete.
+
+    This is the backing store of StateServer, and lets tests share one store
+    between several cogs in a single process.
+    '''
+    def __init__(self, maxsize=100_000):
+        self.cache = AsyncTTLCache("state", 3600, maxsize)
+
+    async def get_many(self, keys):
+        '''{key: value} for the keys that are present and fresh.'''
+        return {key: value for key in keys if (value := self.cache.get(key)) is not None}
+
+    async def set_many(self, items, ttl):
+        for key, value in items.items():
+            self.cache.set(key, value, ttl)
+
+    async def delete_many(self, keys):
+        for key in keys:
+            self.cache.invalidate(key)
+
+class HTTPState:
+    '''Client for a StateServer shared by every bot process.
+
+    The store is an optimisation, never a dependency: if it can't be reached
+    the caller just sees misses and falls back to the upstream.
+    '''
+    def __init__(self, url):
+        self.session, self.stats = create_session("state")
+        self.url = url.rstrip("/")
+        self.errors = 0
+
+    async def close(self):
+        if not self.session.closed:
+            await self.session.close()
+
+    async def call(self, op, payload):
+        try:
+            async with self.session.post(f"{self.url}/{op}", json=payload) as response:
+                if response.status == 200:
+                    return await response.json()
+                await log_bad_response("state", response)
+        except (aiohttp.ClientError, TimeoutError) as e:
+            logger.info(f"State server unreachable: {e!r}")
+        self.errors += 1
+        return None
+
+    async def get_many(self, keys):
+        return await self.call("get", {"keys": list(keys)}) or {}
+
+    async def set_many(self, items, ttl):
+        await self.call("set", {"items": items, "ttl": ttl})
+
+    async def delete_many(self, keys):
+        await self.call("delete", {"keys": list(keys)})
+
+class StateServer:
+    '''Serves a MemoryState over HTTP so separate shard processes can share caches.
+
+    A local stand-in for a dedicated store: run `python state.py --port 8765`
+    and point every process at it with STATE_URL=http://127.0.0.1:8765.
+    '''
+    def __init__(self, store=None):
+        self.store = store or MemoryState()
+
+    async def get(self, request):
+        body = await request.json()
+        return web.json_response(await self.store.get_many(body["keys"]))
+
+    async def set(self, request):
+        body = await request.json()
+        await self.store.set_many(body["items"], body["ttl"])
+        return web.json_response({"stored": len(body["items"])})
+
+    async def delete(self, request):
+        body = await request.json()
+        await self.store.delete_many(body["keys"])
+        return web.json_response({"deleted": len(body["keys"])})
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/get", self.get)
+        app.router.add_post("/set", self.set)
+        app.router.add_post("/delete", self.delete)
+        return app
+
+def shared_state(url):
+    '''State backend for STATE_URL: None (each process keeps its own in-memory caches) or an HTTPState.'''
+    if not url or url.startswith("memory://"):
+        return None
+    if url.startswith(("http://", "https://")):
+        return HTTPState(url)
+    raise ValueError(f"Unsupported STATE_URL: {url}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared cache server for multi-process bot clusters.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    web.run_app(StateServer().app(), host=args.host, port=args.port)
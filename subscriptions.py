@@ -0,0 +1,75 @@
+import numpy as np
+
+class Subscriptions:
+    '''Every (user, game, alert threshold) row of a notifier pass, held as NumPy columns.
+
+    games lists the watched game names, and each row stores the index of its
+    game in that list. Checking a pass gathers per-game price vectors by that
+    index and compares them with the thresholds element-wise, so the cost
+    doesn't grow with a Python loop per subscription. A missing target price
+    is stored as +inf and a missing minimum discount as 0, which any sale
+    meets.
+    '''
+    def __init__(self):
+        self.games = []
+        self.index = {}  # game name -> position in games
+        self._rows = ([], [], [], [])  # game position + row count, users, targets, discounts while pages are still coming in
+        self.game = np.empty(0, dtype=np.int32)
+        self.user = np.empty(0, dtype=np.int64)
+        self.target = np.empty(0)
+        self.discount = np.empty(0)
+
+    def __len__(self):
+        return len(self.user) + len(self._rows[1])
+
+    def add(self, name, users, targets=None, discounts=None):
+        '''Append the watchers of one game, as listed by the backend's watched/ endpoint.'''
+        position = self.index.setdefault(name, len(self.games))
+        if position == len(self.games):
+            self.games.append(name)
+        game, user, target, discount = self._rows
+        game.append((position, len(users)))
+        user.extend(users)
+        target.extend(targets or [None] * len(users))
+        discount.extend(discounts or [None] * len(users))
+
+    def freeze(self):
+        '''Turn the appended rows into the column arrays. Call once every page has been added.'''
+        game, user, target, discount = self._rows
+        if user:
+            # None becomes NaN in a float array, then the "no threshold" value
+            positions, counts = np.array(game, dtype=np.int32).reshape(-1, 2).T
+            self.game = np.concatenate([self.game, np.repeat(positions, counts)])
+            self.user = np.concatenate([self.user, np.array(user, dtype=np.int64)])
+            self.target = np.concatenate([self.target, np.nan_to_num(np.array(target, dtype=float), nan=np.inf)])
+            self.discount = np.concatenate([self.discount, np.nan_to_num(np.array(discount, dtype=float), nan=0.0)])
+        self._rows = ([], [], [], [])
+        return self
+
+    def price_vectors(self, deals):
+        '''Per-game (price, regular) arrays from name -> (price, regular); games without a deal get NaN.'''
+        price = np.full(len(self.games), np.nan)
+        regular = np.full(len(self.games), np.nan)
+        for name, (amount, regular_amount) in deals.items():
+            position = self.index.get(name)
+            if position is not None:
+                price[position] = amount
+                regular[position] = regular_amount
+        return price, regular
+
+    def matches(self, price, regular):
+        '''Mask of the rows whose game is on sale at or under the target and with at least the minimum discount.
+
+        Comparisons against NaN are false, so games without a deal never match.
+        '''
+        with np.errstate(invalid="ignore", divide="ignore"):
+            on_sale = price < regular
+            cut = (1 - price / regular) * 100
+        # Round so that e.g. 5.00 off 10.00 meets a 50% minimum despite float error
+        cut = np.round(cut, 6)
+        return on_sale[self.game] & (price[self.game] <= self.target) & (cut[self.game] >= self.discount)
+
+    def alerts(self, deals):
+        '''(user id, game name) for every subscription that the given deals satisfy.'''
+        rows = np.flatnonzero(self.matches(*self.price_vectors(deals)))
+        return [(user, self.games[game]) for user, game in zip(self.user[rows].tolist(), self.game[rows].tolist())]
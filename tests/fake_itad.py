@@ -0,0 +1,121 @@
+import asyncio
+import random
+import time
+from aiohttp import web
+
+class FakeITAD:
+    '''Local stand-in for the parts of the IsThereAnyDeal API the bot uses.
+
+    games maps title -> {"id", "price", "regular", "shop"}. Prices can be changed
+    between requests with set_price(), and every call is recorded in self.calls.
+
+    Failure injection: rate_limit/burst enforce a server-side limit answered
+    with 429 + Retry-After, throttle_first answers the first N requests with
+    429, and error_rate answers that fraction of requests with a 503.
+    '''
+    def __init__(self, games=None, latency=0.0, rate_limit=None, burst=1, throttle_first=0,
+                 error_rate=0.0, retry_after=0.2, seed=0):
+        self.games = {title: dict(game) for title, game in (games or {}).items()}
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.throttle_first = throttle_first
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.calls = []
+        self.rejected = 0
+        self.errors = 0
+        self.runner = None
+        self.url = None
+
+    def set_price(self, title, price):
+        self.games[title]["price"] = price
+
+    def count(self, path):
+        return sum(1 for call_path, _ in self.calls if call_path == path)
+
+    async def lookup(self, request):
+        await self._record(request, None)
+        if failure := self._failure():
+            return failure
+        game = self.games.get(request.query.get("title"))
+        if not game:
+            return web.json_response({"found": False})
+        return web.json_response({"found": True, "game": {"id": game["id"], "title": request.query["title"]}})
+
+    async def lookup_ids(self, request):
+        titles = await request.json()
+        await self._record(request, titles)
+        if failure := self._failure():
+            return failure
+        return web.json_response({title: self.games[title]["id"] if title in self.games else None for title in titles})
+
+    async def prices(self, request):
+        ids = await request.json()
+        await self._record(request, ids)
+        if failure := self._failure():
+            return failure
+        by_id = {game["id"]: game for game in self.games.values()}
+        return web.json_response([self._entry(by_id[game_id]) for game_id in ids if game_id in by_id])
+
+    def _entry(self, game):
+        return {
+            "id": game["id"],
+            "deals": [{
+                "shop": {"id": 1, "name": game["shop"]},
+                "price": {"amount": game["price"], "currency": "USD"},
+                "regular": {"amount": game["regular"], "currency": "USD"},
+                "cut": round(100 * (1 - game["price"] / game["regular"])) if game["regular"] else 0,
+                "storeLow": {"amount": min(game["price"], game.get("low", game["price"])), "currency": "USD"},
+            }],
+            "historyLow": {"all": {"amount": min(game["price"], game.get("low", game["price"])), "currency": "USD"}},
+        }
+
+    def _failure(self):
+        '''An injected error response for this request, or None.'''
+        if self.throttle_first > 0:
+            self.throttle_first -= 1
+            self.rejected += 1
+            return web.json_response({"error": "rate limited"}, status=429,
+                                     headers={"Retry-After": str(self.retry_after)})
+        if self.rate_limit:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate_limit)
+            self.updated = now
+            if self.tokens < 1:
+                self.rejected += 1
+                return web.json_response({"error": "rate limited"}, status=429,
+                                         headers={"Retry-After": str(self.retry_after)})
+            self.tokens -= 1
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"error": "unavailable"}, status=503)
+        return None
+
+    async def _record(self, request, body):
+        self.calls.append((request.path, body))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/games/lookup/v1", self.lookup)
+        app.router.add_post("/lookup/id/title/v1", self.lookup_ids)
+        app.router.add_post("/games/prices/", self.prices)
+        return app
+
+    async def start(self, app=None):
+        self.runner = web.AppRunner(app or self.app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def close(self):
+        if self.runner:
+            await self.runner.cleanup()
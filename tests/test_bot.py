@@ -0,0 +1,19 @@
+import bot
+
+def test_importing_bot_does_not_connect():
+    # The module sets up the bot and its hooks; only running it as a script logs in
+    assert bot.bot.user is None
+    assert bot.bot.get_command("shutdown") is not None
+
+def test_every_command_has_a_slash_command():
+    # With PREFIX_COMMANDS=0 the bot doesn't read messages, so a prefix-only command couldn't be run at all
+    from itad import IsThereAnyDeal
+    from test_notifier import FakeBot
+    cog = IsThereAnyDeal(FakeBot())
+    commands = cog.get_commands() + [bot.bot.get_command("shutdown")]
+    slash = {command.name: command.app_command for command in commands if getattr(command, "app_command", None)}
+
+    assert set(slash) == {command.name for command in commands}
+    for name in ("shutdown", "stats", "poolstats", "cachestats"):
+        assert slash[name].default_permissions.administrator
+        assert slash[name].guild_only
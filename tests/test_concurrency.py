@@ -0,0 +1,117 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from aiohttp import web
+from discord.ext import commands
+from fake_itad import FakeITAD
+from itad import IsThereAnyDeal
+from test_notifier import GAMES, FakeBot
+from test_sharding import start_cog
+
+LATENCY = 0.1
+
+class FakeContext:
+    '''Slash-command context whose Discord round trips take LATENCY (sends half that).'''
+    def __init__(self):
+        self.author = SimpleNamespace(id=7, name="user7")
+        self.channel = SimpleNamespace(id=99)
+        self.guild = None
+        self.sent = []
+
+    async def defer(self):
+        await asyncio.sleep(LATENCY)
+
+    async def send(self, content=None, embed=None):
+        await asyncio.sleep(LATENCY / 2)
+        self.sent.append(embed or content)
+        return SimpleNamespace(id=len(self.sent))
+
+class FakeChannel:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, embed=None):
+        self.sent.append(embed)
+
+class ChannelBot(FakeBot):
+    '''A bot without the channel in its cache, so resolving it costs a REST call.'''
+    def __init__(self):
+        super().__init__()
+        self.channel = FakeChannel()
+
+    def get_channel(self, channel_id):
+        return None
+
+    async def fetch_channel(self, channel_id):
+        await asyncio.sleep(LATENCY)
+        return self.channel
+
+def wishlist_routes(app, tracked):
+    async def contains(request):
+        await asyncio.sleep(LATENCY)
+        return web.json_response({name: name in tracked for name in request.query.getall("name")})
+
+    async def add_game(request):
+        await asyncio.sleep(LATENCY)
+        body = await request.json()
+        tracked.add(body["name"])
+        return web.json_response({"name": body["name"], "status": "added"})
+
+    app.router.add_get("/api/wishlist/{id}/contains/", contains)
+    app.router.add_post("/api/wishlist/{id}/add_game/", add_game)
+
+def run(bot, tracked, body):
+    fake = FakeITAD(GAMES, latency=LATENCY)
+
+    async def scenario():
+        app = fake.app()
+        wishlist_routes(app, tracked)
+        url = await fake.start(app)
+        cog = await start_cog(bot, url)
+        try:
+            start = time.perf_counter()
+            await body(cog)
+            return cog, time.perf_counter() - start
+        finally:
+            await cog.close_sessions()
+            await fake.close()
+
+    return asyncio.run(scenario())
+
+def test_itad_overlaps_independent_awaits():
+    ctx = FakeContext()
+    cog, elapsed = run(FakeBot(), set(), lambda cog: IsThereAnyDeal.itad.callback(cog, ctx, name="Game 1"))
+
+    # (defer | lookup) -> (prices | membership) -> send: 0.25s, against 0.45s one after another
+    assert 2.5 * LATENCY <= elapsed < 3.5 * LATENCY
+    assert "React with 👀" in ctx.sent[-1].description
+    assert len(cog.reactions) == 1
+    # The HTTP client lives under its own name, so the instance still exposes the command
+    assert isinstance(cog.itad, commands.Command)
+
+def test_itad_skips_the_prompt_for_tracked_games():
+    ctx = FakeContext()
+    cog, _ = run(FakeBot(), {"Game 1"}, lambda cog: IsThereAnyDeal.itad.callback(cog, ctx, name="Game 1"))
+
+    assert "already on your wishlist" in ctx.sent[-1].description
+    assert len(cog.reactions) == 0
+
+def test_reaction_add_resolves_the_channel_during_the_post():
+    bot, tracked = ChannelBot(), set()
+    cog, elapsed = run(bot, tracked, lambda cog: cog.add_game_to_wishlist(99, "Game 1", 7, "user7"))
+
+    assert LATENCY <= elapsed < 1.5 * LATENCY
+    assert tracked == {"Game 1"}
+    assert "has been added" in bot.channel.sent[-1].description
+
+def test_itad_prompts_when_the_backend_is_unreachable():
+    ctx = FakeContext()
+
+    async def body(cog):
+        cog.BACKEND_URL = "http://127.0.0.1:1/api/wishlist/"
+        await IsThereAnyDeal.itad.callback(cog, ctx, name="Game 1")
+
+    cog, _ = run(FakeBot(), set(), body)
+
+    assert "React with 👀" in ctx.sent[-1].description
+    assert len(cog.reactions) == 1
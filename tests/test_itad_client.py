@@ -0,0 +1,74 @@
+import asyncio
+import gc
+import time
+import aiohttp
+from fake_itad import FakeITAD
+from itad_client import ITADClient
+
+GAMES = {f"Game {n}": {"id": f"id-{n}", "price": 5.0, "regular": 10.0, "shop": "GOG"} for n in range(100)}
+
+async def with_client(fake, scenario, **client_options):
+    url = await fake.start()
+    async with aiohttp.ClientSession() as session:
+        client = ITADClient(session, url, "key", **client_options)
+        try:
+            return await scenario(client)
+        finally:
+            await fake.close()
+
+def test_stays_at_server_ceiling_without_rejections():
+    # The server allows 40 req/s (burst 6, one token of slack for jitter); the client uses 40 req/s, burst 5
+    fake = FakeITAD(GAMES, rate_limit=40, burst=6)
+
+    async def scenario(client):
+        start = time.monotonic()
+        results = await asyncio.gather(*(client.lookup(f"Game {n}") for n in range(45)))
+        return results, time.monotonic() - start
+
+    # A full collection mid-burst delays and bunches requests by more than the one token of slack
+    gc.collect()
+    results, elapsed = asyncio.run(with_client(fake, scenario, rate=40, burst=5))
+
+    assert all(result and result["found"] for result in results)
+    assert fake.rejected == 0
+    # 5 burst tokens, then 40 more at 40/s
+    assert elapsed >= 0.9
+
+def test_retries_429_and_5xx():
+    fake = FakeITAD(GAMES, throttle_first=3, error_rate=0.3, retry_after=0.05)
+
+    async def scenario(client):
+        return await asyncio.gather(*(client.prices([f"id-{n}"]) for n in range(20))), client
+
+    results, client = asyncio.run(with_client(fake, scenario, rate=1000, burst=50, max_retries=8, backoff=0.01))
+
+    assert all(len(result) == 1 for result in results)
+    assert client.rate_limited == 3
+    assert client.retries == fake.rejected + fake.errors
+    assert client.failures == 0
+
+def test_long_retry_after_fails_fast_instead_of_stalling():
+    fake = FakeITAD(GAMES, throttle_first=1, retry_after=3600)
+
+    async def scenario(client):
+        start = time.monotonic()
+        result = await client.lookup("Game 1")
+        return result, time.monotonic() - start, client.bucket.paused_until - time.monotonic()
+
+    result, elapsed, paused = asyncio.run(with_client(fake, scenario))
+
+    assert result is None and elapsed < 1
+    # Other callers wait out at most max_backoff, not the hour the server asked for
+    assert paused <= 10
+
+def test_coalesces_identical_requests():
+    fake = FakeITAD(GAMES, latency=0.1)
+
+    async def scenario(client):
+        return await asyncio.gather(*(client.lookup("Game 1") for _ in range(10))), client
+
+    results, client = asyncio.run(with_client(fake, scenario, rate=1000, burst=50))
+
+    assert all(result["game"]["id"] == "id-1" for result in results)
+    assert fake.count("/games/lookup/v1") == 1
+    assert client.coalesced == 9
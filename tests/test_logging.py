@@ -0,0 +1,67 @@
+import asyncio
+import json
+import logging
+import utils
+from yarl import URL
+from utils import JsonFormatter, log_bad_response
+
+class FakeResponse:
+    method = "GET"
+    status = 404
+    url = URL("https://api.isthereanydeal.com/games/lookup/v1?key=secret&title=x")
+
+    async def read(self):
+        return b"not found " * 100
+
+def test_json_lines_carry_structured_fields():
+    record = logging.LogRecord("bot", logging.INFO, __file__, 1, "itad took %sms", (12.5,), None)
+    record.command, record.user, record.latency_ms = "itad", 7, 12.5
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["msg"] == "itad took 12.5ms"
+    assert (entry["command"], entry["user"], entry["latency_ms"]) == ("itad", 7, 12.5)
+    assert "upstream" not in entry
+
+def test_bad_response_bodies_are_sampled_and_truncated(monkeypatch, caplog):
+    monkeypatch.setattr(utils, "log_body_limit", 20)
+    caplog.set_level(logging.INFO, logger="bot")
+    for sample in (0.0, 1.0):
+        monkeypatch.setattr(utils, "log_body_sample", sample)
+        asyncio.run(log_bad_response("itad", FakeResponse()))
+
+    skipped, sampled = caplog.records
+    assert not hasattr(skipped, "body")
+    assert sampled.body == "not found not found "
+    assert sampled.status == 404
+    assert "secret" not in sampled.url and "secret" not in sampled.getMessage()
+
+def test_tracebacks_reach_json_lines_as_their_own_field():
+    lines, plain = [], []
+
+    class Collect(logging.Handler):
+        def __init__(self, formatter, out):
+            super().__init__()
+            self.setFormatter(formatter)
+            self.out = out
+
+        def emit(self, record):
+            self.out.append(self.format(record))
+
+    logger = logging.getLogger("test_tracebacks")
+    logger.propagate = False
+    listener = utils.queue_logging(logger, [Collect(JsonFormatter(), lines), Collect(logging.Formatter(), plain)])
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Sale notification pass failed.")
+    finally:
+        listener.stop()
+        logger.handlers.clear()
+
+    entry = json.loads(lines[0])
+    assert entry["msg"] == "Sale notification pass failed."
+    assert entry["exc"].startswith("Traceback") and "ValueError: boom" in entry["exc"]
+    # Plain formatters still print the traceback under the message
+    assert plain[0].startswith("Sale notification pass failed.\nTraceback") and "ValueError: boom" in plain[0]
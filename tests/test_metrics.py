@@ -0,0 +1,47 @@
+import asyncio
+import aiohttp
+from fake_itad import FakeITAD
+from itad_client import ITADClient
+from metrics import Metrics, endpoint, metrics
+
+def test_render_and_quantiles():
+    registry = Metrics()
+    for seconds in (0.003, 0.02, 0.02, 0.3):
+        registry.observe("demure_command_seconds", seconds, command="itad")
+    registry.inc("demure_command_errors_total", command="itad")
+    registry.collectors.append(lambda: [("demure_cache_entries", "gauge", {"cache": "lookup"}, 3)])
+
+    text = registry.render()
+
+    assert '# TYPE demure_command_seconds histogram' in text
+    assert 'demure_command_seconds_bucket{command="itad",le="0.005"} 1' in text
+    assert 'demure_command_seconds_bucket{command="itad",le="0.025"} 3' in text
+    assert 'demure_command_seconds_bucket{command="itad",le="+Inf"} 4' in text
+    assert 'demure_command_seconds_count{command="itad"} 4' in text
+    assert 'demure_command_errors_total{command="itad"} 1' in text
+    assert 'demure_cache_entries{cache="lookup"} 3' in text
+    (labels, count, p50, p95, total), = registry.summary("demure_command_seconds")
+    assert labels == {"command": "itad"} and count == 4
+    assert 0.01 <= p50 <= 0.025 and 0.25 <= p95 <= 0.5
+
+def test_endpoint_collapses_ids():
+    assert endpoint("http://127.0.0.1:8000/api/wishlist/1234/add_games/?x=1") == "/api/wishlist/{id}/add_games/"
+    assert endpoint("https://api.isthereanydeal.com/games/lookup/v1") == "/games/lookup/v1"
+
+def test_itad_client_records_latency_and_errors():
+    fake = FakeITAD({"Game 1": {"id": "id-1", "price": 5.0, "regular": 10.0, "shop": "GOG"}},
+                    throttle_first=1, retry_after=0.01)
+    labels = {"upstream": "itad", "method": "GET", "endpoint": "/games/lookup/v1"}
+    errors_before = metrics.counter("demure_request_errors_total", status=429, **labels)
+
+    async def scenario():
+        url = await fake.start()
+        async with aiohttp.ClientSession() as session:
+            try:
+                return await ITADClient(session, url, "key", rate=1000, burst=10).lookup("Game 1")
+            finally:
+                await fake.close()
+
+    assert asyncio.run(scenario())["found"]
+    assert metrics.counter("demure_request_errors_total", status=429, **labels) == errors_before + 1
+    assert any(series == labels for series, *_ in metrics.summary("demure_request_seconds"))
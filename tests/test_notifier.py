@@ -0,0 +1,186 @@
+import asyncio
+from types import SimpleNamespace
+from aiohttp import web
+from fake_itad import FakeITAD
+from itad import IsThereAnyDeal
+
+GAMES = {
+    f"Game {n}": {"id": f"id-{n}", "price": 20.0, "regular": 20.0, "shop": "Steam"}
+    for n in range(450)
+}
+
+class FakeUser:
+    def __init__(self, user_id, inbox):
+        self.id = user_id
+        self.inbox = inbox
+
+    async def send(self, embed=None):
+        self.inbox.setdefault(self.id, []).append(embed.description)
+
+class FakeBot:
+    def __init__(self):
+        self.inbox = {}
+
+    def get_user(self, user_id):
+        return None
+
+    async def fetch_user(self, user_id):
+        return FakeUser(user_id, self.inbox)
+
+class FakeBackend:
+    """Watched-games and snapshot endpoints of the wishlist API. thresholds maps (name, user) -> (target, discount)."""
+    def __init__(self, watchers, thresholds=None):
+        self.watchers = watchers
+        self.thresholds = thresholds or {}
+        self.itad_ids = {}
+        self.snapshots = {}
+
+    async def watched(self, request):
+        names = sorted(name for name in self.watchers if name > request.query.get("after", ""))
+        limit = int(request.query["limit"])
+        page = names[:limit]
+        def column(name, field):
+            return [self.thresholds.get((name, user), (None, None))[field] for user in self.watchers[name]]
+
+        return web.json_response({
+            "games": [{"name": name, "itad_id": self.itad_ids.get(name), "users": self.watchers[name],
+                       "targets": column(name, 0), "discounts": column(name, 1)} for name in page],
+            "next": page[-1] if len(page) == limit else None,
+        })
+
+    async def record(self, request):
+        changed = []
+        for row in await request.json():
+            self.itad_ids[row["name"]] = row["itad_id"]
+            previous = self.snapshots.get(row["name"])
+            if previous is not None and previous != (row["price"], row["shop"]):
+                changed.append(row["name"])
+            self.snapshots[row["name"]] = (row["price"], row["shop"])
+        return web.json_response({"changed": changed})
+
+    def mount(self, app):
+        app.router.add_get("/api/wishlist/watched/", self.watched)
+        app.router.add_post("/api/games/snapshots/", self.record)
+
+async def run_passes(watchers, change, thresholds=None, backend=None, titles=()):
+    fake = FakeITAD(GAMES)
+    app = fake.app()
+    (backend or FakeBackend(watchers, thresholds)).mount(app)
+    url = await fake.start(app)
+
+    bot = FakeBot()
+    cog = IsThereAnyDeal(bot)
+    cog.BASE_URL = url
+    cog.BACKEND_URL = f"{url}/api/wishlist/"
+    cog.GAMES_URL = f"{url}/api/games/"
+    cog.titles.add_many(titles)
+    await cog.open_sessions()
+    cog.itad_client.bucket.rate = cog.itad_client.bucket.capacity = 1000
+    cog.notifier.page_size = 100
+    try:
+        first = await cog.notifier.run()
+        change(fake)
+        second = await cog.notifier.run()
+    finally:
+        await cog.close_sessions()
+        await fake.close()
+    return fake, bot, first, second
+
+def test_batches_prices_and_only_notifies_changed_watchers():
+    # 1000 users, each watching three games
+    watchers = {}
+    for user_id in range(1000):
+        for n in (user_id % 450, (user_id * 7) % 450, (user_id * 13) % 450):
+            watchers.setdefault(f"Game {n}", []).append(user_id)
+    watchers = {name: sorted(set(users)) for name, users in watchers.items()}
+
+    def change(fake):
+        fake.set_price("Game 5", 10.0)
+        fake.set_price("Game 6", 15.0)
+
+    fake, bot, first, second = asyncio.run(run_passes(watchers, change))
+
+    # First pass only records a baseline
+    assert first == 0
+    # Two passes over 450 games at 200 ids per call
+    assert fake.count("/games/prices/") == 6
+    # Titles are looked up once, 200 per batch call; the second pass uses the stored ITAD ids
+    assert fake.count("/lookup/id/title/v1") == 3
+    assert fake.count("/games/lookup/v1") == 0
+
+    expected = set(watchers["Game 5"]) | set(watchers["Game 6"])
+    assert second == len(expected)
+    assert set(bot.inbox) == expected
+    assert all(len(messages) == 1 for messages in bot.inbox.values())
+
+def test_alerts_respect_target_price_and_minimum_discount():
+    watchers = {"Game 5": [1, 2, 3, 4, 5], "Game 6": [6]}
+    thresholds = {
+        ("Game 5", 1): (12.0, None),  # met: 10.00 <= 12.00
+        ("Game 5", 2): (9.0, None),  # not met
+        ("Game 5", 3): (None, 60),  # not met: 50% off
+        ("Game 5", 4): (12.0, 50),  # both met
+        ("Game 6", 6): (5.0, None),
+    }
+
+    def change(fake):
+        fake.set_price("Game 5", 10.0)
+        fake.set_price("Game 6", 25.0)
+
+    fake, bot, first, second = asyncio.run(run_passes(watchers, change, thresholds))
+
+    assert set(bot.inbox) == {1, 4, 5}
+    assert second == 3
+
+def test_unknown_names_are_never_snapshotted_under_a_similar_game():
+    watchers = {"Game 5": [1], "Game 5x": [2]}
+    backend = FakeBackend(watchers)
+
+    def change(fake):
+        fake.set_price("Game 5", 10.0)
+
+    fake, bot, first, second = asyncio.run(run_passes(watchers, change, backend=backend, titles=[("Game 5", "id-5")]))
+
+    # ITAD doesn't know "Game 5x"; the closest indexed title must not stand in for it
+    assert backend.itad_ids == {"Game 5": "id-5"}
+    assert set(bot.inbox) == {1}
+
+def test_alert_keeps_commas_inside_numbers():
+    games = {**GAMES, "Warhammer 40,000": {"id": "id-w40k", "price": 20.0, "regular": 20.0, "shop": "Steam"}}
+    fake = FakeITAD(games)
+    stored, sent = [], []
+
+    async def threshold(request):
+        stored.append(await request.json())
+        return web.json_response({"status": "ok"})
+
+    async def send(content=None, embed=None):
+        sent.append(embed.description if embed else content)
+
+    async def defer():
+        pass
+
+    async def scenario():
+        app = fake.app()
+        app.router.add_put("/api/wishlist/{id}/threshold/", threshold)
+        url = await fake.start(app)
+        cog = IsThereAnyDeal(FakeBot())
+        cog.BASE_URL = url
+        cog.BACKEND_URL = f"{url}/api/wishlist/"
+        await cog.open_sessions()
+        ctx = SimpleNamespace(author=SimpleNamespace(id=7, name="user7"), send=send, defer=defer)
+        try:
+            for text in ("Warhammer 40,000", "Warhammer 40,000, 9.99", "Warhammer 40,000 ,50%"):
+                await IsThereAnyDeal.alert.callback(cog, ctx, game=text)
+        finally:
+            await cog.close_sessions()
+            await fake.close()
+
+    asyncio.run(scenario())
+
+    assert [(body["name"], body["target_price"], body["min_discount"]) for body in stored] == [
+        ("Warhammer 40,000", None, None),
+        ("Warhammer 40,000", 9.99, None),
+        ("Warhammer 40,000", None, 50),
+    ]
+    assert sent[0] == "You will be alerted whenever Warhammer 40,000 goes on sale."
@@ -0,0 +1,42 @@
+import asyncio
+from fake_itad import FakeITAD
+from itad import IsThereAnyDeal, deal_embeds
+
+GAMES = {f"Game {n}": {"id": f"id-{n}", "price": 5.0 + n, "regular": 20.0, "shop": "GOG"} for n in range(30)}
+
+async def with_cog(fake, scenario):
+    url = await fake.start()
+    cog = IsThereAnyDeal(bot=None)
+    cog.BASE_URL = url
+    await cog.open_sessions()
+    try:
+        return await scenario(cog)
+    finally:
+        await cog.close_sessions()
+        await fake.close()
+
+def test_batch_prices_fetch_only_uncached_ids_in_one_call():
+    fake = FakeITAD(GAMES)
+
+    async def scenario(cog):
+        first = await cog.get_prices_batch(["id-1", "id-2", "id-3"])
+        second = await cog.get_prices_batch(["id-2", "id-3", "id-4"])
+        return first, second
+
+    first, second = asyncio.run(with_cog(fake, scenario))
+
+    assert set(first) == {"id-1", "id-2", "id-3"}
+    assert set(second) == {"id-2", "id-3", "id-4"}
+    assert [body for path, body in fake.calls if path == "/games/prices/"] == [["id-1", "id-2", "id-3"], ["id-4"]]
+
+def test_deal_embeds_page_shops():
+    entry = {
+        "id": "id-1",
+        "deals": [{"shop": {"name": f"Shop {n}"}, "price": {"amount": 30 - n}} for n in range(25)],
+        "historyLow": {"all": {"amount": 1.0}},
+    }
+    embeds = deal_embeds("Game", entry)
+    assert len(embeds) == 3
+    # Cheapest shop first
+    assert embeds[0].description.splitlines()[0].startswith("$6 at Shop 24")
+    assert embeds[0].footer.text == "Historical low: $1.0"
@@ -0,0 +1,25 @@
+import time
+from reactions import ReactionRegistry
+
+def test_pop_only_matches_author_and_emoji():
+    registry = ReactionRegistry(timeout=60.0)
+    registry.register(1, 100, '👀', (5, "Hades"))
+
+    assert registry.pop(1, 200, '👀') is None
+    assert registry.pop(1, 100, '👍') is None
+    assert registry.pop(1, 100, '👀') == (5, "Hades")
+    # Claimed prompts can't be claimed twice
+    assert registry.pop(1, 100, '👀') is None
+
+def test_expired_prompts_are_dropped():
+    registry = ReactionRegistry(timeout=60.0)
+    registry.register(1, 100, '👀', "old", timeout=-1)
+    registry.register(2, 100, '👀', "new")
+
+    assert registry.pop(1, 100, '👀') is None
+    assert registry.expire() == 0
+    assert len(registry) == 1
+
+    registry.register(3, 100, '👀', "soon", timeout=10)
+    assert registry.expire(now=time.time() + 100) == 2
+    assert len(registry) == 0
@@ -0,0 +1,78 @@
+import asyncio
+from aiohttp import web
+import itad
+from fake_itad import FakeITAD
+from itad import IsThereAnyDeal
+from state import StateServer
+from test_notifier import GAMES, FakeBackend, FakeBot
+
+class ShardedBot(FakeBot):
+    def __init__(self, shard_count, shard_ids):
+        super().__init__()
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+
+async def start_cog(bot, url):
+    cog = IsThereAnyDeal(bot)
+    cog.BASE_URL = url
+    cog.BACKEND_URL = f"{url}/api/wishlist/"
+    cog.GAMES_URL = f"{url}/api/games/"
+    await cog.open_sessions()
+    cog.itad_client.bucket.rate = cog.itad_client.bucket.capacity = 1000
+    return cog
+
+def test_processes_share_itad_responses(monkeypatch):
+    fake = FakeITAD(GAMES)
+
+    async def scenario():
+        state = web.AppRunner(StateServer().app())
+        await state.setup()
+        site = web.TCPSite(state, "127.0.0.1", 0)
+        await site.start()
+        monkeypatch.setattr(itad, "state_url", f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}")
+
+        url = await fake.start()
+        first, second = await start_cog(FakeBot(), url), await start_cog(FakeBot(), url)
+        try:
+            found = await first.get_game_by_name("Game 1")
+            reused = await second.get_game_by_name("Game 1")
+            await first.get_prices_batch(["id-1", "id-2", "id-3"])
+            prices = await second.get_prices_batch(["id-1", "id-2", "id-3", "id-4"])
+            return found, reused, prices, second
+        finally:
+            for cog in (first, second):
+                await cog.close_sessions()
+            await fake.close()
+            await state.cleanup()
+
+    found, reused, prices, second = asyncio.run(scenario())
+
+    assert reused == found
+    assert fake.count("/games/lookup/v1") == 1
+    assert set(prices) == {"id-1", "id-2", "id-3", "id-4"}
+    # The second process only asked ITAD for the id nobody had fetched yet
+    assert [body for path, body in fake.calls if path == "/games/prices/"] == [["id-1", "id-2", "id-3"], ["id-4"]]
+    assert second.lookup_cache.shared_hits == 1
+    assert second.price_cache.shared_hits == 3
+
+def test_notifier_partitions_games_across_shards():
+    watchers = {f"Game {n}": [n] for n in range(450)}
+    fake = FakeITAD(GAMES)
+
+    async def scenario():
+        app = fake.app()
+        FakeBackend(watchers).mount(app)
+        url = await fake.start(app)
+        cogs = [await start_cog(ShardedBot(3, [0, 1]), url), await start_cog(ShardedBot(3, [2]), url)]
+        try:
+            return [set((await cog.notifier.collect_watchers())[0].games) for cog in cogs]
+        finally:
+            for cog in cogs:
+                await cog.close_sessions()
+            await fake.close()
+
+    first, second = asyncio.run(scenario())
+
+    assert first and second
+    assert not first & second
+    assert first | second == set(watchers)
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import time
+import itad
+from fake_itad import FakeITAD
+from itad import IsThereAnyDeal
+from test_notifier import GAMES, FakeBot
+
+def test_restart_restores_caches_reactions_and_cursor(tmp_path, monkeypatch):
+    monkeypatch.setattr(itad, "snapshot_path", str(tmp_path / "snapshot.json.gz"))
+    monkeypatch.setattr(itad, "title_index_path", str(tmp_path / "titles.idx"))
+    fake = FakeITAD(GAMES)
+
+    async def start(url):
+        cog = IsThereAnyDeal(FakeBot())
+        cog.BASE_URL = url
+        await cog.open_sessions()
+        await cog.load_snapshot()
+        cog.itad_client.bucket.rate = cog.itad_client.bucket.capacity = 1000
+        return cog
+
+    async def scenario():
+        url = await fake.start()
+        try:
+            before = await start(url)
+            await before.get_game_by_name("Game 1")
+            await before.get_prices_batch(["id-1", "id-2"])
+            before.price_cache.set("id-3", [{"id": "id-3"}], ttl=0.01)
+            before.reactions.register(42, 7, '👀', (99, "Game 1", "user7"))
+            before.reactions.register(43, 7, '👀', (99, "Game 2", "user7"), timeout=0.01)
+            before.notifier.last_run = time.time() - 2 * 86400
+            await asyncio.sleep(0.02)
+            await before.cog_unload()
+
+            after = await start(url)
+            game = await after.get_game_by_name("game 1")
+            prices = await after.get_prices_batch(["id-1", "id-2"])
+            await after.close_sessions()
+            return after, game, prices
+        finally:
+            await fake.close()
+
+    after, game, prices = asyncio.run(scenario())
+
+    # Everything came from the snapshot, not from a second round of ITAD calls
+    assert game["game"]["id"] == "id-1"
+    assert set(prices) == {"id-1", "id-2"}
+    assert fake.count("/games/lookup/v1") == 1
+    assert fake.count("/games/prices/") == 1
+    # Expired entries are not carried over
+    assert after.price_cache.get("id-3") is None
+    assert len(after.reactions) == 1
+    assert after.reactions.pop(42, 7, '👀') == (99, "Game 1", "user7")
+    assert after.notifier.overdue()
+
+def test_missing_or_corrupt_snapshot_starts_cold(tmp_path, monkeypatch):
+    path = tmp_path / "snapshot.json.gz"
+    path.write_bytes(b"not a snapshot")
+    monkeypatch.setattr(itad, "snapshot_path", str(path))
+
+    cog = IsThereAnyDeal(FakeBot())
+    asyncio.run(cog.load_snapshot())
+
+    assert len(cog.lookup_cache) == 0
+    assert cog.notifier.last_run is None
+
+def test_cluster_processes_save_to_their_own_files(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from cluster import process_path, shard_blocks
+    from snapshot import read_snapshot, write_snapshot
+
+    paths = [process_path(str(tmp_path / "snapshot.json.gz"), block[0]) for block in shard_blocks(16, 4)]
+    assert [os.path.basename(path) for path in paths] == [f"snapshot-{shard}.json.gz" for shard in (0, 4, 8, 12)]
+
+    # Concurrent writers of one path each use their own temporary file, so the survivor is always whole
+    shared = str(tmp_path / "shared.json.gz")
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda n: write_snapshot(shared, {"writer": n, "padding": "x" * 100_000}), range(32)))
+    assert read_snapshot(shared)["writer"] in range(32)
+    assert sorted(os.listdir(tmp_path)) == ["shared.json.gz"]
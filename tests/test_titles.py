@@ -0,0 +1,33 @@
+from titles import TitleIndex
+
+def make_index():
+    index = TitleIndex()
+    index.add_many([("Elden Ring", "id-1"), ("Hades", "id-2"), ("Hades II", "id-3"),
+                    ("The Witcher 3: Wild Hunt", "id-4"), ("Hollow Knight", None)])
+    return index
+
+def test_exact_and_prefix_ignore_case_and_punctuation():
+    index = make_index()
+    assert index.exact("the witcher 3 wild hunt") == ("The Witcher 3: Wild Hunt", "id-4")
+    assert index.suggest("HAD") == ["Hades", "Hades II"]
+
+def test_typos_and_partial_names():
+    index = make_index()
+    assert index.search("eldn ring", limit=1)[0][1] == "Elden Ring"
+    assert index.suggest("witcher") == ["The Witcher 3: Wild Hunt"]
+
+def test_add_fills_in_missing_id():
+    index = make_index()
+    index.add("hollow knight", "id-5")
+    assert index.exact("Hollow Knight") == ("Hollow Knight", "id-5")
+    assert len(index) == 5
+
+def test_save_and_load_round_trip(tmp_path):
+    index = make_index()
+    path = tmp_path / "titles.idx"
+    index.save(path)
+    loaded = TitleIndex.load(path)
+    assert loaded.titles == index.titles
+    assert loaded.ids == index.ids
+    assert loaded.suggest("had") == index.suggest("had")
+    assert loaded.search("eldn ring") == index.search("eldn ring")
@@ -0,0 +1,198 @@
+import asyncio
+from types import SimpleNamespace
+import discord
+from aiohttp import web
+from fake_itad import FakeITAD
+from itad import IsThereAnyDeal
+from pages import PageView
+from test_notifier import GAMES, FakeBot
+from test_sharding import start_cog
+
+class FakeWishlistPages:
+    '''The backend's keyset-paginated wishlist games/ endpoint over a fixed list of names.'''
+    def __init__(self, names, stored_ids):
+        self.names = sorted(names)
+        self.stored_ids = stored_ids
+        self.requests = []
+
+    async def games(self, request):
+        after, limit = request.query.get("after", ""), int(request.query["limit"])
+        self.requests.append(after)
+        page = [name for name in self.names if name > after][:limit]
+        data = {
+            "games": [{"name": name, "title": name, "itad_id": self.stored_ids.get(name),
+                       "target_price": "9.99" if name == "Game 1" else None, "min_discount": None} for name in page],
+            "next": page[-1] if len(page) == limit else None,
+        }
+        if not after:
+            data["count"] = len(self.names)
+        return web.json_response(data)
+
+    def mount(self, app):
+        app.router.add_get("/api/wishlist/{id}/games/", self.games)
+
+class FakeInteraction:
+    def __init__(self, user_id):
+        self.user = SimpleNamespace(id=user_id)
+        self.response = self
+        self.shown = []
+
+        self.events = []
+
+    async def edit_message(self, embed=None, view=None):
+        self.events.append("edit")
+        self.shown.append(embed)
+
+    async def defer(self):
+        self.events.append("defer")
+
+    async def edit_original_response(self, embed=None, view=None):
+        self.events.append("edit")
+        self.shown.append(embed)
+
+def test_wishlist_fetches_and_prices_one_page_at_a_time():
+    names = [f"Game {n}" for n in range(25)]
+    # The notifier stores ITAD ids over time; Game 10 hasn't got one yet
+    backend = FakeWishlistPages(names, {name: GAMES[name]["id"] for name in names if name != "Game 10"})
+    fake = FakeITAD(GAMES)
+    sent = []
+
+    async def send(embed=None, view=None):
+        sent.append((embed, view))
+        return SimpleNamespace(id=1)
+
+    async def defer():
+        pass
+
+    async def scenario():
+        app = fake.app()
+        backend.mount(app)
+        url = await fake.start(app)
+        cog = await start_cog(FakeBot(), url)
+        ctx = SimpleNamespace(author=SimpleNamespace(id=7, name="user_7"), send=send, defer=defer)
+        try:
+            await IsThereAnyDeal.wishlist.callback(cog, ctx)
+            opened = (list(backend.requests), fake.count("/games/prices/"))
+            view = sent[0][1]
+            interaction = FakeInteraction(7)
+            await view.show(interaction, 1)
+            await view.show(interaction, 2)
+            await view.show(interaction, 0)
+            return opened, view, interaction
+        finally:
+            await cog.close_sessions()
+            await fake.close()
+
+    (requests, prices), view, interaction = asyncio.run(scenario())
+
+    # Opening the wishlist costs one backend page and one batched price call
+    assert requests == [""]
+    assert prices == 1
+    first = sent[0][0]
+    assert first.footer.text == "Page 1/3 · 25 games"
+    assert "**Game 1** — $20.0 at Steam" in first.description
+    assert "alert at $9.99" in first.description
+    assert "**Game 10** — $20.0 at Steam" in first.description
+    assert fake.count("/games/lookup/v1") == 1
+
+    # Each new page follows the previous page's cursor; paging back reuses the rendered embed
+    assert backend.requests == ["", "Game 17", "Game 4"]
+    assert [call for call in fake.calls if call[0] == "/games/prices/"][1][1] == [GAMES[name]["id"] for name in sorted(names)[10:20]]
+    assert fake.count("/games/prices/") == 3
+    assert interaction.shown[-1] is first
+    assert interaction.shown[1].description.count("\n") == 4
+
+def test_slow_pages_acknowledge_the_interaction_before_rendering():
+    interaction = FakeInteraction(7)
+
+    async def render(index):
+        interaction.events.append(f"render {index}")
+        await asyncio.sleep(0.05)
+        return discord.Embed(description=f"page {index}")
+
+    async def scenario():
+        async def send(embed=None, view=None):
+            return SimpleNamespace()
+
+        view = PageView(7, 3, render)
+        await view.start(send)
+        await view.show(interaction, 1)
+        await view.show(interaction, 0)
+
+    asyncio.run(scenario())
+
+    # A rendered page is shown straight away; a new one is deferred so the button doesn't time out
+    assert interaction.events == ["render 0", "defer", "render 1", "edit", "edit"]
+    assert [embed.description for embed in interaction.shown] == ["page 1", "page 0"]
+
+def test_pages_past_a_shrunken_wishlist_are_empty():
+    names = [f"Game {n}" for n in range(25)]
+    backend = FakeWishlistPages(names, {name: GAMES[name]["id"] for name in names})
+    fake = FakeITAD(GAMES)
+    sent = []
+
+    async def send(embed=None, view=None):
+        sent.append((embed, view))
+        return SimpleNamespace(id=1)
+
+    async def defer():
+        pass
+
+    async def scenario():
+        app = fake.app()
+        backend.mount(app)
+        url = await fake.start(app)
+        cog = await start_cog(FakeBot(), url)
+        ctx = SimpleNamespace(author=SimpleNamespace(id=7, name="user_7"), send=send, defer=defer)
+        try:
+            await IsThereAnyDeal.wishlist.callback(cog, ctx)
+            # Games removed while the view is open: page 2 is now the last one
+            backend.names = backend.names[:15]
+            view, interaction = sent[0][1], FakeInteraction(7)
+            await view.show(interaction, 1)
+            await view.show(interaction, 2)
+            return interaction
+        finally:
+            await cog.close_sessions()
+            await fake.close()
+
+    interaction = asyncio.run(scenario())
+
+    assert interaction.shown[0].description.count("\n") == 4
+    assert interaction.shown[1].description == "No more games."
+    assert backend.requests == ["", "Game 17"]
+
+def test_unwish_autocomplete_revalidates_the_cached_wishlist():
+    names = ["Hades", "Hollow Knight"]
+    statuses = []
+
+    async def detail(request):
+        etag = f'"{len(names)}"'
+        if request.headers.get("If-None-Match") == etag:
+            statuses.append(304)
+            return web.Response(status=304)
+        statuses.append(200)
+        return web.json_response({"games": [{"name": name} for name in names]}, headers={"ETag": etag})
+
+    async def scenario():
+        fake = FakeITAD(GAMES)
+        app = fake.app()
+        app.router.add_get("/api/wishlist/{id}/", detail)
+        url = await fake.start(app)
+        cog = await start_cog(FakeBot(), url)
+        interaction = SimpleNamespace(user=SimpleNamespace(id=7))
+        try:
+            first = await cog.unwish_autocomplete(interaction, "h")
+            unchanged = await cog.unwish_autocomplete(interaction, "h")
+            names.remove("Hades")
+            after_removal = await cog.unwish_autocomplete(interaction, "h")
+            return first, unchanged, after_removal
+        finally:
+            await cog.close_sessions()
+            await fake.close()
+
+    first, unchanged, after_removal = asyncio.run(scenario())
+
+    assert [choice.value for choice in first] == [choice.value for choice in unchanged] == ["Hades", "Hollow Knight"]
+    assert [choice.value for choice in after_removal] == ["Hollow Knight"]
+    assert statuses == [200, 304, 200]
@@ -0,0 +1,175 @@
+import bisect
+import json
+import math
+import os
+import re
+import struct
+import tempfile
+from array import array
+from collections import Counter
+
+MAGIC = b"TIDX1\n"
+
+def normalize(title):
+    '''Index key for a title: casefolded, punctuation stripped, whitespace collapsed.'''
+    return " ".join(re.sub(r"[^\w\s]", " ", title.casefold()).split())
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TitleIndex:
+    '''In-memory trigram index of known game titles for typo-tolerant lookup and autocomplete.
+
+    Titles map to their ITAD id (None for names only known from the backend).
+    Exact and prefix matches use a sorted list of normalized keys, fuzzy
+    matches rank candidates sharing trigrams with the query by similarity.
+    '''
+    def __init__(self):
+        self.titles = []  # position -> display title
+        self.ids = []  # position -> ITAD id or None
+        self.keys = {}  # normalized title -> position
+        self.sorted_keys = []  # normalized titles, for prefix search
+        self.postings = {}  # trigram -> array of positions
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, title, game_id=None):
+        '''Add a title, or fill in the id of one already indexed.'''
+        key = self._insert(title, game_id)
+        if key:
+            bisect.insort(self.sorted_keys, key)
+
+    def add_many(self, pairs):
+        '''Bulk add (title, id) pairs, sorting the prefix list once at the end.'''
+        added = [key for key in (self._insert(title, game_id) for title, game_id in pairs) if key]
+        if added:
+            self.sorted_keys = sorted(self.sorted_keys + added)
+
+    def _insert(self, title, game_id):
+        '''Index a title. Returns its key if it is new, else None.'''
+        key = normalize(title)
+        if not key:
+            return None
+        position = self.keys.get(key)
+        if position is not None:
+            if game_id and self.ids[position] != game_id:
+                self.ids[position] = game_id
+                self.dirty = True
+            return None
+        position = len(self.titles)
+        self.titles.append(title)
+        self.ids.append(game_id)
+        self.keys[key] = position
+        for gram in trigrams(key):
+            self.postings.setdefault(gram, array("I")).append(position)
+        self.dirty = True
+        return key
+
+    def exact(self, title):
+        '''(title, id) for an exact normalized match, or None.'''
+        position = self.keys.get(normalize(title))
+        return None if position is None else (self.titles[position], self.ids[position])
+
+    def prefix(self, text, limit=10):
+        key = normalize(text)
+        start = bisect.bisect_left(self.sorted_keys, key)
+        matches = []
+        for candidate in self.sorted_keys[start:start + limit]:
+            if not candidate.startswith(key):
+                break
+            position = self.keys[candidate]
+            matches.append((self.titles[position], self.ids[position]))
+        return matches
+
+    def search(self, text, limit=10, min_score=0.3, partial=False, max_postings=2000):
+        '''Fuzzy matches as (score, title, id), best first.
+
+        The score is trigram Jaccard similarity, or with partial=True the share of
+        the query's trigrams found in the title (so "witcher" matches the full
+        title), ties broken by similarity. Candidates come from the query's rarer
+        trigrams (posting lists longer than max_postings are skipped when rarer
+        ones exist) and the best of them are then scored exactly.
+        '''
+        grams = trigrams(normalize(text))
+        lists = sorted((self.postings[gram] for gram in grams if gram in self.postings), key=len)
+        if not lists:
+            return []
+        # A title scoring >= min_score shares at least min_score * len(grams) trigrams
+        # with the query, so it must appear in one of the rarest (len(grams) - that + 1) lists.
+        needed = len(lists) - math.ceil(min_score * len(grams)) + 1
+        counts = Counter()
+        for postings in lists[:max(1, needed)]:
+            if len(postings) > max_postings and counts:
+                break
+            counts.update(postings)
+
+        results = []
+        for position, _ in counts.most_common(limit * 5):
+            candidate = trigrams(normalize(self.titles[position]))
+            shared = len(grams & candidate)
+            similarity = shared / (len(grams) + len(candidate) - shared)
+            score = shared / len(grams) if partial else similarity
+            if score >= min_score:
+                results.append((score, similarity, self.titles[position], self.ids[position]))
+        results.sort(key=lambda result: (-result[0], -result[1]))
+        return [(score, title, game_id) for score, _, title, game_id in results[:limit]]
+
+    def suggest(self, text, limit=25):
+        '''Autocomplete titles: prefix matches first, then fuzzy matches.'''
+        titles = [title for title, _ in self.prefix(text, limit)]
+        if len(titles) < limit:
+            seen = set(titles)
+            titles.extend(title for _, title, _ in self.search(text, limit, min_score=0.5, partial=True) if title not in seen)
+        return titles[:limit]
+
+    def save(self, path):
+        '''Write the index atomically: a JSON header with titles and ids, then the postings as raw uint32 arrays.'''
+        grams = list(self.postings)
+        offsets = array("I", [0])
+        flat = array("I")
+        for gram in grams:
+            flat.extend(self.postings[gram])
+            offsets.append(len(flat))
+        keys = [None] * len(self.titles)
+        for key, position in self.keys.items():
+            keys[position] = key
+        header = json.dumps({"titles": self.titles, "ids": self.ids, "keys": keys, "trigrams": grams},
+                            separators=(",", ":")).encode()
+
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(MAGIC)
+                f.write(struct.pack("<III", len(header), len(offsets), len(flat)))
+                f.write(header)
+                f.write(offsets.tobytes())
+                f.write(flat.tobytes())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        '''Load an index written by save() without re-normalizing titles or recomputing trigrams.'''
+        index = cls()
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a title index file.")
+            header_size, offset_count, flat_count = struct.unpack("<III", f.read(12))
+            header = json.loads(f.read(header_size))
+            offsets = array("I")
+            offsets.frombytes(f.read(offset_count * 4))
+            flat = array("I")
+            flat.frombytes(f.read(flat_count * 4))
+
+        index.titles = header["titles"]
+        index.ids = header["ids"]
+        index.keys = {key: position for position, key in enumerate(header["keys"])}
+        index.sorted_keys = sorted(index.keys)
+        index.postings = {gram: flat[offsets[i]:offsets[i + 1]] for i, gram in enumerate(header["trigrams"])}
+        return index
@@ -1,28 +1,155 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+import random
+import re
 import datetime
 import os
 from dotenv import load_dotenv
 
+load_dotenv()
+
+# LOGGING SETTINGS
+# Size-based rotation by default; LOG_ROTATE_WHEN (e.g. "midnight") switches to time-based rotation.
+# LOG_JSON=1 writes one JSON object per line to the log file. Bodies of bad upstream responses are logged
+# for a LOG_BODY_SAMPLE fraction of them, cut to LOG_BODY_LIMIT characters. cluster.py gives each process
+# its own LOG_FILE (runtime-4.log), since rotating one file from several processes loses lines.
+log_file = os.getenv("LOG_FILE", "runtime.log")
+log_max_bytes = int(os.getenv("LOG_MAX_BYTES", 10_000_000))
+log_backups = int(os.getenv("LOG_BACKUPS", 5))
+log_rotate_when = os.getenv("LOG_ROTATE_WHEN", "")
+log_json = os.getenv("LOG_JSON", "0") == "1"
+log_body_sample = float(os.getenv("LOG_BODY_SAMPLE", 0.05))
+log_body_limit = int(os.getenv("LOG_BODY_LIMIT", 500))
+
+# Structured fields passed with extra={...}, copied into JSON lines when present
+LOG_FIELDS = ("command", "user", "guild", "latency_ms", "upstream", "method", "url", "status", "body")
+
+class JsonFormatter(logging.Formatter):
+    '''One JSON object per record: time, level, logger, message and any LOG_FIELDS set on the record.'''
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update((field, getattr(record, field)) for field in LOG_FIELDS if hasattr(record, field))
+        if record.exc_info or record.exc_text:
+            entry["exc"] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def log_handlers(path=log_file, json_lines=log_json):
+    '''Console handler plus a rotating file handler.'''
+    formatter = logging.Formatter('%(asctime)s:%(levelname)s:%(name)s: %(message)s')
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    if log_rotate_when:
+        file_handler = logging.handlers.TimedRotatingFileHandler(path, when=log_rotate_when, backupCount=log_backups)
+    else:
+        file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=log_max_bytes, backupCount=log_backups)
+    file_handler.setFormatter(JsonFormatter() if json_lines else formatter)
+    return [console_handler, file_handler]
+
+class TracebackQueueHandler(logging.handlers.QueueHandler):
+    '''QueueHandler that keeps a record's traceback in exc_text instead of merging it into the message.
+
+    The stock prepare() formats the traceback into msg and clears exc_info, so
+    JsonFormatter could never give it its own "exc" field. The traceback is
+    still rendered to text here, so no frames are held while the record waits.
+    '''
+    def prepare(self, record):
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = logging.Formatter().formatException(record.exc_info)
+        record = copy.copy(record)
+        record.exc_info = record.exc_text = None
+        record = super().prepare(record)
+        record.exc_text = exc_text
+        return record
+
+def queue_logging(target, handlers):
+    '''Route target's records through a queue to handlers running on a listener thread. Returns the started listener.'''
+    records = queue.SimpleQueue()
+    target.addHandler(TracebackQueueHandler(records))
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
 # SETUP LOGGING
+# Coroutines only enqueue records; formatting and file/console I/O happen on the listener thread
 logger = logging.getLogger("bot")
 logger.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s:%(levelname)s:%(name)s: %(message)s')
+log_listener = queue_logging(logger, log_handlers())
+atexit.register(log_listener.stop)
 
-# CONSOLE HANDLER
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
-
-# FILE HANDLER
-file_handler = logging.FileHandler("runtime.log", mode='a')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+async def log_bad_response(upstream, response):
+    '''Log a failed aiohttp response, attaching a truncated body only for a sample of them.'''
+    # Reading the body either way lets the connection go back to the pool
+    body = await response.read()
+    url = response.url.with_query(None)  # query strings can carry API keys
+    fields = {"upstream": upstream, "method": response.method, "url": str(url), "status": response.status}
+    message = f"Bad Response ({response.status}) from {upstream} {response.method} {url}"
+    if body and random.random() < log_body_sample:
+        fields["body"] = body[:log_body_limit].decode(errors="replace")
+        message += f": \n{fields['body']}"
+    logger.info(message, extra=fields)
 
 # INITIALIZE TOKENS
-load_dotenv()
 itad_auth = os.getenv("ITAD_TOKEN")  # ITAD TOKEN
 bot_token = os.getenv("BOT_TOKEN") # BOT TOKEN
 db_token = os.getenv("DB_TOKEN") # DATABASE TOKEN
 
+# CACHE SETTINGS (seconds / entries)
+lookup_cache_ttl = float(os.getenv("LOOKUP_CACHE_TTL", 86400))
+lookup_cache_size = int(os.getenv("LOOKUP_CACHE_SIZE", 10000))
+price_cache_ttl = float(os.getenv("PRICE_CACHE_TTL", 300))
+price_cache_size = int(os.getenv("PRICE_CACHE_SIZE", 5000))
+
+# ITAD CLIENT SETTINGS (requests per second, burst size, retries, seconds)
+itad_rate = float(os.getenv("ITAD_RATE", 5))
+itad_burst = int(os.getenv("ITAD_BURST", 10))
+itad_max_retries = int(os.getenv("ITAD_MAX_RETRIES", 3))
+itad_timeout = float(os.getenv("ITAD_TIMEOUT", 10))
+
+# COMMAND SETTINGS
+# Prefix (!) commands need the message_content intent; with PREFIX_COMMANDS=0 only slash commands are served
+prefix_commands = os.getenv("PREFIX_COMMANDS", "1") == "1"
+
+# SHARDING SETTINGS
+# SHARDED=1 runs an AutoShardedBot. SHARD_COUNT/SHARD_IDS pin this process to some shards of a cluster
+# (left unset, discord.py picks the shard count and runs them all). STATE_URL points every process at a
+# shared cache server (state.py); unset, each process keeps its own in-memory caches.
+sharded = os.getenv("SHARDED", "0") == "1"
+shard_count = int(os.getenv("SHARD_COUNT", 0)) or None
+shard_ids = [int(shard) for shard in os.getenv("SHARD_IDS", "").split(",") if shard.strip()] or None
+state_url = os.getenv("STATE_URL", "")
+
+# METRICS SETTINGS
+# Port of the local Prometheus text endpoint (0 disables it); cluster.py gives each process its own port
+metrics_port = int(os.getenv("METRICS_PORT", 0))
+
+# LOCAL STATE FILES (title index, and the cache/reaction snapshot written on shutdown)
+title_index_path = os.getenv("TITLE_INDEX_PATH", "titles.idx")
+snapshot_path = os.getenv("SNAPSHOT_PATH", "snapshot.json.gz")
+
+# SALE NOTIFIER SETTINGS
+price_batch_size = int(os.getenv("PRICE_BATCH_SIZE", 200))
+notify_send_concurrency = int(os.getenv("NOTIFY_SEND_CONCURRENCY", 5))
+
+# A comma that separates names, as opposed to one inside a number ("40,000")
+NAME_SEPARATOR = re.compile(r"(?<!\d),|,(?!\d)")
+
+def split_names(text):
+    '''Split a comma separated list of game names, keeping commas inside numbers ("40,000").'''
+    return [name.strip() for name in NAME_SEPARATOR.split(text) if name.strip()]
+
+def normalize_title(name):
+    '''Cache key for a user-typed title: casefolded with collapsed whitespace.'''
+    return " ".join(name.casefold().split())
+
 # TIME
 time = datetime.time(hour=20)
\ No newline at end of file